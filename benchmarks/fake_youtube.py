@@ -0,0 +1,177 @@
+"""
+Fake YouTube Data API and thumbnail host, for offline benchmarks.
+
+Serves the three endpoints the scraper uses (search for a channel handle,
+search for a channel's videos, and video durations) plus the thumbnail JPEGs
+they point to. Every fourth video is a Short. Responses are deterministic, and
+the server counts the requests and bytes it serves.
+"""
+
+import hashlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image, ImageDraw
+
+_PAGE_SIZE_LIMIT = 50
+
+
+class FakeYouTube:
+    """
+    Fake YouTube server running on a background thread.
+
+    Args:
+        videos_per_channel: Videos each channel has, across all result pages
+        latency_seconds: Simulated delay before each response
+        latency: Function drawing the delay before each response, instead of a
+            constant
+    """
+
+    def __init__(
+        self,
+        videos_per_channel: int = 60,
+        latency_seconds: float = 0.0,
+        latency: Optional[Callable[[], float]] = None,
+    ):
+        self.videos_per_channel = videos_per_channel
+        self.latency_seconds = latency_seconds
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_served = 0
+        self.requests_by_path: Dict[str, int] = {}
+        self._thumbnails: Dict[str, bytes] = {}
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base_url(self) -> str:
+        """Value for YOUTUBE_API_BASE_URL."""
+        return f"{self.base_url}/youtube/v3"
+
+    def start(self) -> "FakeYouTube":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "bytes_served": self.bytes_served,
+                "requests_by_path": dict(self.requests_by_path),
+            }
+
+    def _record(self, path: str, size: int) -> None:
+        with self.lock:
+            self.requests += 1
+            self.bytes_served += size
+            self.requests_by_path[path] = self.requests_by_path.get(path, 0) + 1
+
+    def _search(self, params: Dict[str, str]) -> Dict:
+        if params.get("type") == "channel":
+            handle = params.get("q", "")
+            channel_id = "UC" + hashlib.sha256(handle.encode()).hexdigest()[:22]
+            return {"items": [{"snippet": {"channelId": channel_id}}]}
+
+        channel_id = params.get("channelId", "")
+        page_size = min(int(params.get("maxResults", 25)), _PAGE_SIZE_LIMIT)
+        start = int(params.get("pageToken") or 0)
+        end = min(start + page_size, self.videos_per_channel)
+        video_ids = [f"{channel_id[-6:]}v{index:05d}" for index in range(start, end)]
+        items = [
+            {
+                "id": {"videoId": video_id},
+                "snippet": {
+                    "thumbnails": {
+                        "high": {"url": f"{self.base_url}/thumbnails/{video_id}.jpg"}
+                    }
+                },
+            }
+            for video_id in video_ids
+        ]
+        response = {"items": items}
+        if end < self.videos_per_channel:
+            response["nextPageToken"] = str(end)
+        return response
+
+    def _videos(self, params: Dict[str, str]) -> Dict:
+        items = []
+        for video_id in params.get("id", "").split(","):
+            if not video_id:
+                continue
+            index = int(video_id.rsplit("v", 1)[-1])
+            duration = "PT45S" if index % 4 == 3 else "PT12M30S"
+            items.append({"id": video_id, "contentDetails": {"duration": duration}})
+        return {"items": items}
+
+    def _thumbnail(self, video_id: str) -> bytes:
+        with self.lock:
+            cached = self._thumbnails.get(video_id)
+        if cached is not None:
+            return cached
+
+        seed = hashlib.sha256(video_id.encode()).digest()
+        image = Image.new("RGB", (480, 360), tuple(seed[:3]))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((40, 40, 280, 200), fill=tuple(seed[3:6]))
+        draw.ellipse((260, 120, 440, 320), fill=tuple(seed[6:9]))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        data = buffer.getvalue()
+        with self.lock:
+            self._thumbnails[video_id] = data
+        return data
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                delay = fake.latency() if fake.latency else fake.latency_seconds
+                if delay > 0:
+                    time.sleep(delay)
+
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path == "/youtube/v3/search":
+                    route = "search"
+                    body = json.dumps(fake._search(params)).encode()
+                    content_type = "application/json"
+                elif url.path == "/youtube/v3/videos":
+                    route = "videos"
+                    body = json.dumps(fake._videos(params)).encode()
+                    content_type = "application/json"
+                elif url.path.startswith("/thumbnails/"):
+                    route = "thumbnails"
+                    video_id = url.path.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+                    body = fake._thumbnail(video_id)
+                    content_type = "image/jpeg"
+                else:
+                    self.send_error(404)
+                    return
+
+                fake._record(route, len(body))
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,91 @@
+"""
+Latency distributions for the benchmark stand-ins.
+
+A distribution is written as KIND:MEAN[:SPREAD], or as a bare number for a
+constant delay:
+- "0.2" or "constant:0.2": always 0.2 seconds
+- "uniform:0.2:0.1": uniformly between 0.1 and 0.3 seconds
+- "exponential:0.2": exponential with a 0.2 second mean
+- "lognormal:0.2:0.5": log-normal with a 0.2 second median and sigma 0.5,
+  for the long tail of real API calls
+"""
+
+import math
+import random
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+KINDS = ("constant", "uniform", "exponential", "lognormal")
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    A latency distribution, in seconds.
+
+    Args:
+        kind: One of KINDS
+        mean: Constant value, mean, or median for lognormal
+        spread: Half-width for uniform, sigma for lognormal
+    """
+
+    kind: str = "constant"
+    mean: float = 0.0
+    spread: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """
+        Parse a KIND:MEAN[:SPREAD] distribution spec.
+
+        Raises:
+            ValueError: If the spec is malformed or the kind is unknown
+        """
+        fields = str(spec).split(":")
+        if len(fields) == 1:
+            fields = ["constant"] + fields
+        if fields[0] not in KINDS or len(fields) > 3:
+            raise ValueError(
+                f"Invalid latency '{spec}'. Use KIND:MEAN[:SPREAD] with KIND one of "
+                f"{', '.join(KINDS)}."
+            )
+        return cls(
+            kind=fields[0],
+            mean=float(fields[1]),
+            spread=float(fields[2]) if len(fields) == 3 else 0.0,
+        )
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one delay, never negative."""
+        if self.kind == "uniform":
+            value = rng.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.kind == "exponential":
+            value = rng.expovariate(1 / self.mean) if self.mean > 0 else 0.0
+        elif self.kind == "lognormal":
+            value = (
+                rng.lognormvariate(math.log(self.mean), self.spread)
+                if self.mean > 0
+                else 0.0
+            )
+        else:
+            value = self.mean
+        return max(0.0, value)
+
+    def sampler(self, seed: int = 0) -> Callable[[], float]:
+        """Return a thread-safe function that draws delays from a seeded stream."""
+        rng = random.Random(seed)
+        lock = threading.Lock()
+
+        def sample() -> float:
+            with lock:
+                return self.sample(rng)
+
+        return sample
+
+    def __str__(self) -> str:
+        if self.kind == "constant":
+            return f"{self.mean:g}"
+        if self.spread:
+            return f"{self.kind}:{self.mean:g}:{self.spread:g}"
+        return f"{self.kind}:{self.mean:g}"
@@ -0,0 +1,331 @@
+"""
+Concurrent-session load test of the thumbnail_agent flow.
+
+Drives many sessions at once through the root agent, each one running the
+full benchmark conversation (scrape, analysis, prompt, image) for its own
+channel, against the same offline stand-ins as run_benchmark. Model, API and
+image latencies are drawn from configurable distributions (see latency.py).
+
+Reports, as JSON:
+- throughput in completed sessions per second
+- p50/p95/p99 latency per phase and per session
+- event-loop blocking: how late a 10 ms heartbeat task woke up, in total and
+  at worst, which exposes synchronous work on the loop
+- peak memory, and peak memory growth per concurrent session
+
+Usage:
+    python -m benchmarks.load_test --sessions 50 --concurrency 25 \\
+        --model-latency lognormal:0.5:0.6 --image-latency uniform:8:4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .fake_youtube import FakeYouTube
+from .latency import Latency
+from .run_benchmark import (
+    APP_NAME,
+    USER_ID,
+    conversation_turns,
+    git_commit,
+    peak_rss_mb,
+    phase_by_author,
+    run_conversation,
+    run_in_scratch_directory,
+    use_offline_services,
+)
+from .scripted_llm import ScriptedLlm, use_scripted_llm
+
+PERCENTILES = (50, 95, 99)
+
+# Heartbeat interval, and the lateness below which the loop counts as free
+_HEARTBEAT_SECONDS = 0.01
+_BLOCKED_THRESHOLD_SECONDS = 0.005
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Linearly interpolated percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values: List[float]) -> Dict:
+    """Count, mean, max and PERCENTILES of a list of latencies."""
+    summary = {"count": len(values)}
+    if values:
+        summary["mean"] = round(sum(values) / len(values), 3)
+        summary["max"] = round(max(values), 3)
+        for p in PERCENTILES:
+            summary[f"p{p}"] = round(percentile(values, p), 3)
+    return summary
+
+
+def _current_rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class LoopMonitor:
+    """
+    Heartbeat task that measures event-loop blocking and samples memory.
+
+    Every heartbeat sleeps for a fixed interval; anything past that interval
+    before it wakes up is time the loop spent running something else without
+    yielding.
+    """
+
+    def __init__(self, interval: float = _HEARTBEAT_SECONDS):
+        self.interval = interval
+        self.blocked_seconds = 0.0
+        self.blocked_count = 0
+        self.max_lag_seconds = 0.0
+        self.heartbeats = 0
+        self.peak_rss_bytes = _current_rss_bytes()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - expected
+            self.heartbeats += 1
+            if lag > _BLOCKED_THRESHOLD_SECONDS:
+                self.blocked_seconds += lag
+                self.blocked_count += 1
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+            rss = _current_rss_bytes()
+            if rss is not None:
+                self.peak_rss_bytes = max(self.peak_rss_bytes or 0, rss)
+
+    def stats(self) -> Dict:
+        return {
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "blocked_count": self.blocked_count,
+            "max_lag_ms": round(self.max_lag_seconds * 1000, 1),
+            "heartbeats": self.heartbeats,
+        }
+
+
+async def _run_session(
+    runner, session_service, index: int, phases: Dict[str, str]
+) -> Dict:
+    """Run one session through the whole conversation and time it."""
+    session = session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+    started_at = time.time()
+    try:
+        conversation = await run_conversation(
+            runner, session.id, phases, conversation_turns(f"@load{index}")
+        )
+        state = session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session.id
+        ).state
+        completed = bool(state.get("prompt") and state.get("thumbnail_path"))
+        error = None if completed else "Session ended without a thumbnail"
+    except Exception as e:
+        conversation, completed, error = {"phase_seconds": {}}, False, str(e)
+    finally:
+        session_service.delete_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session.id
+        )
+
+    return {
+        "completed": completed,
+        "error": error,
+        "seconds": time.time() - started_at,
+        "phase_seconds": conversation["phase_seconds"],
+    }
+
+
+def _image_backend(latency: Latency, failure_rate: float, seed: int):
+    """Local image backend whose render times follow a latency distribution."""
+    from youtube_thumbnail_agent.shared_lib.image_backends import LocalImageBackend
+
+    class SampledLatencyImageBackend(LocalImageBackend):
+        def _sample_outcome(self) -> Tuple[float, bool]:
+            with self.lock:
+                return latency.sample(self.random), (
+                    self.random.random() < self.failure_rate
+                )
+
+    return SampledLatencyImageBackend(failure_rate=failure_rate, seed=seed)
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict:
+    """
+    Run the load test in the current directory and collect its results.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Dict: The load test results
+    """
+    fake = FakeYouTube(
+        videos_per_channel=args.videos_per_channel,
+        latency=args.http_latency.sampler(args.seed),
+    ).start()
+    use_offline_services(fake)
+
+    from google.adk.artifacts import InMemoryArtifactService
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    from youtube_thumbnail_agent.agent import root_agent
+    from youtube_thumbnail_agent.shared_lib.asset_writer import (
+        wait_for_pending_asset_writes,
+    )
+    from youtube_thumbnail_agent.shared_lib.image_backends import set_image_backend
+
+    llm = ScriptedLlm(
+        analysis_chars=args.analysis_chars,
+        latency=args.model_latency.sampler(args.seed + 1),
+    )
+    use_scripted_llm(root_agent, llm)
+    set_image_backend(
+        _image_backend(args.image_latency, args.image_failure_rate, args.seed + 2)
+    )
+
+    session_service = InMemorySessionService()
+    runner = Runner(
+        app_name=APP_NAME,
+        agent=root_agent,
+        session_service=session_service,
+        artifact_service=InMemoryArtifactService(),
+    )
+    phases = phase_by_author(root_agent)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def session_slot(index: int) -> Dict:
+        async with semaphore:
+            return await _run_session(runner, session_service, index, phases)
+
+    monitor = LoopMonitor()
+    baseline_rss = _current_rss_bytes()
+    monitor.start()
+    started_at = time.time()
+    try:
+        sessions = await asyncio.gather(
+            *(session_slot(index) for index in range(args.sessions))
+        )
+        wait_for_pending_asset_writes()
+    finally:
+        wall_seconds = time.time() - started_at
+        await monitor.stop()
+        fake.stop()
+        set_image_backend(None)
+
+    completed = [session for session in sessions if session["completed"]]
+    phase_latencies: Dict[str, List[float]] = {}
+    for session in completed:
+        for phase, seconds in session["phase_seconds"].items():
+            phase_latencies.setdefault(phase, []).append(seconds)
+
+    memory = {"peak_rss_mb": peak_rss_mb()}
+    if baseline_rss is not None and monitor.peak_rss_bytes is not None:
+        growth = monitor.peak_rss_bytes - baseline_rss
+        memory["baseline_rss_mb"] = round(baseline_rss / 2**20, 1)
+        memory["per_session_mb"] = round(
+            growth / min(args.concurrency, args.sessions) / 2**20, 2
+        )
+
+    errors: Dict[str, int] = {}
+    for session in sessions:
+        if session["error"]:
+            errors[session["error"]] = errors.get(session["error"], 0) + 1
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "videos_per_channel": args.videos_per_channel,
+            "analysis_chars": args.analysis_chars,
+            "model_latency": str(args.model_latency),
+            "http_latency": str(args.http_latency),
+            "image_latency": str(args.image_latency),
+            "image_failure_rate": args.image_failure_rate,
+            "seed": args.seed,
+        },
+        "completed": len(completed),
+        "failed": len(sessions) - len(completed),
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_sessions_per_second": round(len(completed) / wall_seconds, 3),
+        "session_latency": summarize([session["seconds"] for session in completed]),
+        "phase_latency": {
+            phase: summarize(values) for phase, values in phase_latencies.items()
+        },
+        "event_loop": monitor.stats(),
+        "memory": memory,
+        "model": llm.stats(),
+        "http": fake.stats(),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Sessions in flight at once (default: all of them)",
+    )
+    parser.add_argument("--videos-per-channel", type=int, default=60)
+    parser.add_argument("--analysis-chars", type=int, default=2000)
+    for name, default, what in (
+        ("model", "0", "model call"),
+        ("http", "0", "API request"),
+        ("image", "0", "image render"),
+    ):
+        parser.add_argument(
+            f"--{name}-latency",
+            type=Latency.parse,
+            default=Latency.parse(default),
+            help=f"Seconds per {what}, as KIND:MEAN[:SPREAD] (see latency.py)",
+        )
+    parser.add_argument("--image-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=random.randrange(2**16))
+    args = parser.parse_args(argv)
+    args.concurrency = args.concurrency or args.sessions
+
+    output = os.path.abspath(args.output) if args.output else None
+    results = run_in_scratch_directory(run_load_test(args))
+
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0 if not results["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
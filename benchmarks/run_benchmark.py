@@ -0,0 +1,288 @@
+"""
+End-to-end offline benchmark of the thumbnail_agent flow.
+
+Runs the root agent through a full conversation (clone a channel's style,
+describe the video, generate the thumbnail) against three local stand-ins:
+FakeYouTube for the YouTube Data API, ScriptedLlm for Gemini, and the local
+image backend for image generation. Nothing leaves the machine, so runs are
+repeatable and can be compared across commits.
+
+Reports, as JSON:
+- wall time per phase (scrape, analyze, prompt, image, routing), measured
+  from the timestamps of the events each phase's agents emit
+- model calls and estimated tokens in and out, in total and per agent
+- bytes served by the fake API, written under the image directory and the
+  state blob store, and the size of the final session state
+- peak resident set size
+
+Usage:
+    python -m benchmarks.run_benchmark --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import google.genai.types as types
+
+from .fake_youtube import FakeYouTube
+from .scripted_llm import ScriptedLlm, use_scripted_llm
+
+APP_NAME = "thumbnail_benchmark"
+USER_ID = "benchmark"
+CHANNEL = "@benchmark"
+
+
+def conversation_turns(channel: str = CHANNEL) -> Tuple[str, ...]:
+    """User messages that take one session from scraping to a finished thumbnail."""
+    return (
+        f"Clone the thumbnail style of the YouTube channel {channel}",
+        "Video Title: Ten Benchmarks Every Pipeline Needs\n"
+        "Brief Topic Summary: How to measure an agent pipeline end to end.",
+        "Generate the thumbnail",
+    )
+
+
+# Top-level sub-agents of thumbnail_agent, and the phase each one's subtree is
+PHASES = {
+    "ThumbnailScraper": "scrape",
+    "ThumbnailAnalyzerRoot": "analyze",
+    "thumbnail_prompt_generator": "prompt",
+    "generate_image_agent": "image",
+}
+
+
+def phase_by_author(root_agent) -> Dict[str, str]:
+    """Map every agent name in the tree to its benchmark phase."""
+    phases = {root_agent.name: "routing"}
+
+    def walk(agent, phase):
+        phases[agent.name] = phase
+        for sub_agent in agent.sub_agents:
+            walk(sub_agent, phase)
+
+    for sub_agent in root_agent.sub_agents:
+        walk(sub_agent, PHASES.get(sub_agent.name, sub_agent.name))
+    return phases
+
+
+def use_offline_services(fake: FakeYouTube) -> None:
+    """Point the agents at the fake YouTube API and the local image backend."""
+    os.environ["YOUTUBE_API_BASE_URL"] = fake.api_base_url
+    os.environ["YOUTUBE_API_KEY"] = "benchmark"
+    os.environ["IMAGE_BACKEND"] = "local"
+
+
+def run_in_scratch_directory(main_coroutine):
+    """
+    Run a coroutine with an empty temporary directory as the working directory.
+
+    Image files and the image catalog are created relative to the working
+    directory, so every run starts from nothing.
+
+    Args:
+        main_coroutine: The coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="thumbnail_benchmark_") as workdir:
+        sys.path.insert(0, original_dir)
+        os.chdir(workdir)
+        try:
+            return asyncio.run(main_coroutine)
+        finally:
+            os.chdir(original_dir)
+
+
+def directory_bytes(path: str) -> int:
+    total = 0
+    for directory, _, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(directory, filename))
+    return total
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_conversation(
+    runner, session_id: str, phases: Dict[str, str], turns: Tuple[str, ...] = None
+) -> Dict:
+    """
+    Send each benchmark turn and time the events by phase.
+
+    The time since the previous event is charged to the phase of the agent
+    that emitted the current one.
+
+    Args:
+        runner: Runner for the root agent
+        session_id: The session to run in
+        phases: Phase of each agent, from phase_by_author
+        turns: User messages to send, conversation_turns() by default
+
+    Returns:
+        Dict: Seconds per phase, events per phase and the turn count
+    """
+    turns = turns or conversation_turns()
+    phase_seconds: Dict[str, float] = {}
+    phase_events: Dict[str, int] = {}
+    for turn in turns:
+        message = types.Content(role="user", parts=[types.Part(text=turn)])
+        previous = time.time()
+        async for event in runner.run_async(
+            user_id=USER_ID, session_id=session_id, new_message=message
+        ):
+            now = time.time()
+            phase = phases.get(event.author, event.author)
+            phase_seconds[phase] = phase_seconds.get(phase, 0.0) + now - previous
+            phase_events[phase] = phase_events.get(phase, 0) + 1
+            previous = now
+
+    return {
+        "phase_seconds": {
+            phase: round(seconds, 3) for phase, seconds in phase_seconds.items()
+        },
+        "phase_events": phase_events,
+        "turns": len(turns),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    """
+    Run the benchmark in the current directory and collect its results.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Dict: The benchmark results
+    """
+    fake = FakeYouTube(
+        videos_per_channel=args.videos_per_channel,
+        latency_seconds=args.http_latency,
+    ).start()
+    use_offline_services(fake)
+    os.environ["LOCAL_IMAGE_BACKEND_LATENCY"] = str(args.image_latency)
+
+    # Import after the environment is set so .env can't override it
+    from google.adk.artifacts import InMemoryArtifactService
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
+    from youtube_thumbnail_agent.agent import root_agent
+    from youtube_thumbnail_agent.constants import IMAGE_ROOT_DIR, STATE_BLOB_DIR
+    from youtube_thumbnail_agent.shared_lib.asset_writer import (
+        wait_for_pending_asset_writes,
+    )
+    from youtube_thumbnail_agent.shared_lib.metrics import metrics
+
+    llm = ScriptedLlm(
+        channel=CHANNEL,
+        analysis_chars=args.analysis_chars,
+        latency_seconds=args.model_latency,
+    )
+    use_scripted_llm(root_agent, llm)
+
+    session_service = InMemorySessionService()
+    runner = Runner(
+        app_name=APP_NAME,
+        agent=root_agent,
+        session_service=session_service,
+        artifact_service=InMemoryArtifactService(),
+    )
+    session = session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+
+    started_at = time.time()
+    try:
+        conversation = await run_conversation(
+            runner, session.id, phase_by_author(root_agent)
+        )
+        wait_for_pending_asset_writes()
+    finally:
+        fake.stop()
+    wall_seconds = time.time() - started_at
+
+    state = session_service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session.id
+    ).state
+    http = fake.stats()
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "videos_per_channel": args.videos_per_channel,
+            "analysis_chars": args.analysis_chars,
+            "model_latency_seconds": args.model_latency,
+            "http_latency_seconds": args.http_latency,
+            "image_latency_seconds": args.image_latency,
+        },
+        "completed": bool(state.get("prompt") and state.get("thumbnail_path")),
+        "wall_seconds": round(wall_seconds, 3),
+        **conversation,
+        "model": llm.stats(),
+        "agents": metrics.to_json(by_session=False)["agents"],
+        "bytes": {
+            "http_served": http["bytes_served"],
+            "images_on_disk": directory_bytes(IMAGE_ROOT_DIR),
+            "state_blobs_on_disk": directory_bytes(STATE_BLOB_DIR),
+            "session_state": len(json.dumps(state, default=str)),
+        },
+        "http_requests": http["requests_by_path"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--videos-per-channel", type=int, default=60)
+    parser.add_argument("--analysis-chars", type=int, default=2000)
+    parser.add_argument(
+        "--model-latency", type=float, default=0.0, help="Seconds per model call"
+    )
+    parser.add_argument(
+        "--http-latency", type=float, default=0.0, help="Seconds per API request"
+    )
+    parser.add_argument(
+        "--image-latency", type=float, default=0.0, help="Seconds per image render"
+    )
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output) if args.output else None
+    results = run_in_scratch_directory(run_benchmark(args))
+
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0 if results["completed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
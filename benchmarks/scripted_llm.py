@@ -0,0 +1,279 @@
+"""
+Scripted stand-in for the Gemini model, for offline benchmarks.
+
+ScriptedLlm plugs into ADK's model interface and plays each agent's part
+deterministically. It recognizes the agent from the tools in the request and
+picks the next tool call from the last tool result, so every phase of the
+pipeline runs its real tools, callbacks and state handling without a network
+call. Token counts are estimated at four characters per token.
+"""
+
+import asyncio
+import re
+import threading
+from typing import AsyncGenerator, Callable, Dict, Optional
+
+import google.genai.types as types
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from pydantic import PrivateAttr
+
+# Gemini bills an inline image at a flat number of tokens
+_IMAGE_TOKENS = 258
+
+_ROUTES = (
+    ("generate", "generate_image_agent"),
+    ("video title", "thumbnail_prompt_generator"),
+    ("channel", "ThumbnailScraper"),
+)
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def _call(name: str, **args) -> types.Part:
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _text(text: str) -> types.Part:
+    return types.Part(text=text)
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Deterministic model that drives the thumbnail agents through one run.
+
+    Args:
+        channel: Channel the scraper is asked to scrape if the user message has none
+        prompt: Image prompt saved by the prompt generator
+        analysis_chars: Length of each generated thumbnail analysis
+        latency_seconds: Simulated time per model call
+        latency: Function drawing the time per model call, instead of a constant
+    """
+
+    model: str = "scripted"
+    channel: str = "@benchmark"
+    prompt: str = "A bold, high-contrast benchmark thumbnail with large text"
+    analysis_chars: int = 2000
+    latency_seconds: float = 0.0
+    latency: Optional[Callable[[], float]] = None
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _stats: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {"calls": 0, "tokens_in": 0, "tokens_out": 0}
+    )
+    _calls_by_agent: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def stats(self) -> Dict:
+        """Return model call and estimated token counts so far."""
+        with self._lock:
+            return {**self._stats, "calls_by_agent": dict(self._calls_by_agent)}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        delay = self.latency() if self.latency else self.latency_seconds
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        agent, parts = self._respond(llm_request)
+        tokens_in = _request_tokens(llm_request)
+        tokens_out = sum(
+            _estimate_tokens(part.text or str(part.function_call.args or ""))
+            for part in parts
+        )
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["tokens_in"] += tokens_in
+            self._stats["tokens_out"] += tokens_out
+            self._calls_by_agent[agent] = self._calls_by_agent.get(agent, 0) + 1
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            custom_metadata={"tokens_in": tokens_in, "tokens_out": tokens_out},
+        )
+
+    def _respond(self, llm_request: LlmRequest):
+        """Pick the agent being played and its next response parts."""
+        tools = set(llm_request.tools_dict)
+        instruction = _system_instruction(llm_request)
+        last_tool = _last_tool_response(llm_request)
+        user_text = _latest_user_text(llm_request)
+
+        if "scrape_channel_async" in tools:
+            # Later turns resume at the scraper; hand them to the right peer
+            route = _route(user_text, tools)
+            if last_tool is None and route not in (None, "ThumbnailScraper"):
+                return "scraper", [_call("transfer_to_agent", agent_name=route)]
+            if last_tool is None:
+                channel = _find_channel(user_text) or self.channel
+                return "scraper", [_call("scrape_channel_async", channel_name=channel)]
+            if "transfer_to_agent" in tools and "ThumbnailAnalyzerRoot" in instruction:
+                return "scraper", [
+                    _call("transfer_to_agent", agent_name="ThumbnailAnalyzerRoot")
+                ]
+            return "scraper", [_text("Thumbnails scraped.")]
+
+        if "select_thumbnail" in tools:
+            if last_tool is not None:
+                return "selector", [_text("Done.")]
+            pending = re.findall(r"'([^']+)': ''", instruction)
+            if pending:
+                return "selector", [
+                    _call("select_thumbnail", thumbnail_filename=pending[0])
+                ]
+            return "selector", [_call("exit_analysis")]
+
+        if "analyze_thumbnail" in tools:
+            filename = _field(instruction, "thumbnail_to_analyze")
+            if last_tool is None:
+                return "analyzer", [
+                    _call("analyze_thumbnail", thumbnail_filename=filename)
+                ]
+            return "analyzer", [_text(self._analysis(filename))]
+
+        if "save_analysis" in tools:
+            if last_tool is not None:
+                return "saver", [_text("Analysis saved.")]
+            return "saver", [
+                _call(
+                    "save_analysis",
+                    thumbnail_filename=_field(instruction, "thumbnail_to_analyze"),
+                    analysis=_field(instruction, "thumbnail_analysis_result"),
+                )
+            ]
+
+        if "save_prompt" in tools:
+            if "generate" in user_text.lower() and "transfer_to_agent" in tools:
+                return "prompt_generator", [
+                    _call("transfer_to_agent", agent_name="generate_image_agent")
+                ]
+            if last_tool is None:
+                return "prompt_generator", [_call("save_prompt", prompt=self.prompt)]
+            return "prompt_generator", [_text(f"Final prompt:\n{self.prompt}")]
+
+        if "create_image_async" in tools or "create_image" in tools:
+            tool = (
+                "create_image_async"
+                if "create_image_async" in tools
+                else "create_image"
+            )
+            if last_tool is None:
+                return "image_generator", [_call(tool, prompt=self.prompt, draft=False)]
+            if last_tool == tool and "export_thumbnail" in tools:
+                return "image_generator", [_call("export_thumbnail")]
+            return "image_generator", [_text("Your thumbnail is ready.")]
+
+        if "Style Guide" in instruction:
+            return "style_guide", [_text(self._style_guide())]
+
+        route = _route(user_text, tools)
+        if route:
+            return "root", [_call("transfer_to_agent", agent_name=route)]
+        return "other", [_text("Which YouTube channel should I analyze?")]
+
+    def _analysis(self, filename: str) -> str:
+        line = (
+            f"{filename}: bold saturated colors, large sans-serif text, close-up face. "
+        )
+        return (line * (self.analysis_chars // len(line) + 1))[: self.analysis_chars]
+
+    def _style_guide(self) -> str:
+        return (
+            "# Style Guide\n"
+            "- Palette: saturated yellow and black with a red accent\n"
+            "- Typography: heavy condensed sans-serif, at most four words\n"
+            "- Composition: subject on the right third, text on the left\n"
+        )
+
+
+def use_scripted_llm(agent: BaseAgent, llm: ScriptedLlm) -> int:
+    """
+    Point every LLM agent in a tree at the scripted model.
+
+    Args:
+        agent: Root of the agent tree
+        llm: The scripted model
+
+    Returns:
+        int: Number of agents updated
+    """
+    updated = 0
+    if isinstance(agent, LlmAgent):
+        agent.model = llm
+        updated += 1
+    for sub_agent in agent.sub_agents:
+        updated += use_scripted_llm(sub_agent, llm)
+    return updated
+
+
+def _system_instruction(llm_request: LlmRequest) -> str:
+    config = llm_request.config
+    instruction = config.system_instruction if config else None
+    if isinstance(instruction, str):
+        return instruction
+    if isinstance(instruction, types.Content):
+        return "".join(part.text or "" for part in instruction.parts or [])
+    return str(instruction or "")
+
+
+def _last_tool_response(llm_request: LlmRequest) -> Optional[str]:
+    """Name of the tool whose result is the last content, if any."""
+    if not llm_request.contents:
+        return None
+    for part in llm_request.contents[-1].parts or []:
+        if part.function_response:
+            return part.function_response.name
+    return None
+
+
+def _latest_user_text(llm_request: LlmRequest) -> str:
+    """Text of the latest message typed by the user, skipping other agents' context."""
+    for content in reversed(llm_request.contents):
+        parts = content.parts or []
+        if content.role != "user" or not parts:
+            continue
+        if parts[0].text == "For context:":
+            continue
+        text = "".join(part.text or "" for part in parts)
+        if text:
+            return text
+    return ""
+
+
+def _route(user_text: str, tools) -> Optional[str]:
+    """Agent the root would delegate the user's message to, if it can transfer."""
+    if "transfer_to_agent" not in tools:
+        return None
+    lowered = user_text.lower()
+    for keyword, agent_name in _ROUTES:
+        if keyword in lowered:
+            return agent_name
+    return None
+
+
+def _find_channel(text: str) -> Optional[str]:
+    match = re.search(r"(@[\w.-]+|https?://\S+)", text)
+    return match.group(1) if match else None
+
+
+def _field(instruction: str, name: str) -> str:
+    """Value injected after a "name:" line in an agent instruction."""
+    match = re.search(rf"{name}:\s*\n(.*?)(?:\n\s*\n|\Z)", instruction, re.S)
+    return match.group(1).strip() if match else ""
+
+
+def _request_tokens(llm_request: LlmRequest) -> int:
+    tokens = _estimate_tokens(_system_instruction(llm_request))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                tokens += _estimate_tokens(part.text)
+            elif part.inline_data:
+                tokens += _IMAGE_TOKENS
+            elif part.function_call:
+                tokens += _estimate_tokens(str(part.function_call.args or ""))
+            elif part.function_response:
+                tokens += _estimate_tokens(str(part.function_response.response or ""))
+    return tokens
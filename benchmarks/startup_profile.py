@@ -0,0 +1,153 @@
+"""
+Cold-start profile of the agent package.
+
+Imports each target in fresh interpreters, the way a newly started worker
+would, and reports:
+- wall time of the import (median over --runs interpreters)
+- import time per top-level package, from python -X importtime
+- the slowest individual modules
+- which optional heavy dependencies were loaded
+
+Usage:
+    python -m benchmarks.startup_profile --output startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+from .run_benchmark import git_commit
+
+# What a worker might import, from cheapest to the whole agent tree
+TARGETS = {
+    "catalog": "youtube_thumbnail_agent.shared_lib.catalog",
+    "analyzer": "youtube_thumbnail_agent.sub_agents.thumbnail_analyzer_agent.agent",
+    "root_agent": "youtube_thumbnail_agent.agent",
+}
+
+# Dependencies that only some code paths need
+HEAVY_MODULES = ("google.adk", "openai", "requests", "httpx", "dotenv", "PIL", "numpy")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+_PROBE = """
+import json, sys, time
+started_at = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started_at
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+
+def _run_probe(module: str, cwd: str) -> Dict:
+    """Import a module in a fresh interpreter with -X importtime."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            _PROBE.format(module=module, heavy=HEAVY_MODULES),
+        ],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    probe["modules"] = [
+        (match.group(4), int(match.group(1)), int(match.group(2)))
+        for match in map(_IMPORTTIME_LINE.match, result.stderr.splitlines())
+        if match
+    ]
+    return probe
+
+
+def profile_target(module: str, runs: int, top: int, cwd: str) -> Dict:
+    """
+    Profile cold imports of one module.
+
+    Args:
+        module: Dotted module name to import
+        runs: Number of fresh interpreters to time
+        top: Number of slowest modules to list
+        cwd: Directory to run the interpreters in
+
+    Returns:
+        Dict: The target's profile
+    """
+    probes = [_run_probe(module, cwd) for _ in range(runs)]
+    # Per-module times from the median run, to avoid mixing runs
+    seconds = [probe["seconds"] for probe in probes]
+    median_probe = sorted(probes, key=lambda probe: probe["seconds"])[runs // 2]
+
+    by_package: Dict[str, int] = {}
+    for name, self_us, _ in median_probe["modules"]:
+        package = name.split(".")[0]
+        if package == "google":
+            package = ".".join(name.split(".")[:2])
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    slowest = sorted(median_probe["modules"], key=lambda row: row[1], reverse=True)
+    return {
+        "module": module,
+        "wall_seconds": {
+            "median": round(statistics.median(seconds), 3),
+            "min": round(min(seconds), 3),
+            "max": round(max(seconds), 3),
+        },
+        "modules_imported": len(median_probe["modules"]),
+        "package_seconds": {
+            package: round(us / 1e6, 3)
+            for package, us in sorted(
+                by_package.items(), key=lambda item: item[1], reverse=True
+            )[:top]
+        },
+        "slowest_modules": [
+            {"module": name, "self_seconds": round(self_us / 1e6, 3)}
+            for name, self_us, _ in slowest[:top]
+        ],
+        "heavy_modules_loaded": median_probe["loaded"],
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument(
+        "--target",
+        action="append",
+        choices=sorted(TARGETS),
+        help="Target to profile; repeat for several (default: all)",
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    results = {
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "targets": {
+            name: profile_target(TARGETS[name], args.runs, args.top, cwd)
+            for name in args.target or TARGETS
+        },
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
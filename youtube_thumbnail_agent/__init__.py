@@ -1 +1,15 @@
-from . import agent
+"""
+YouTube thumbnail generator agent.
+
+The agent tree is built on first access to the `agent` submodule (which is
+what the ADK CLI loads), so importing a single sub-agent, tool or helper
+doesn't construct every agent and import every dependency.
+"""
+
+import importlib
+
+
+def __getattr__(name):
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,22 +1,25 @@
 from google.adk.agents import Agent
 
-from .constants import GEMINI_MODEL
+from .shared_lib.metrics import instrument_agent_tree
+from .shared_lib.model_routing import model_for
 from .sub_agents.generate_image_agent.agent import generate_image_agent
 from .sub_agents.prompt_generator.agent import prompt_generator
 from .sub_agents.thumbnail_analyzer_agent.agent import thumbnail_analyzer_agent
 from .sub_agents.thumbnail_scraper.agent import thumbnail_scraper_agent
+from .tools.style_lookup import find_similar_styles, use_stored_style
 
 # Create the YouTube Thumbnail Generator Agent
 thumbnail_agent = Agent(
     name="youtube_thumbnail_generator",
     description="A manager agent that orchestrates the YouTube thumbnail cloning process.",
-    model=GEMINI_MODEL,
+    model=model_for("youtube_thumbnail_generator"),
     sub_agents=[
         prompt_generator,
         generate_image_agent,
         thumbnail_scraper_agent,
         thumbnail_analyzer_agent,
     ],
+    tools=[find_similar_styles, use_stored_style],
     instruction="""
     # 🚀 YouTube Thumbnail Style Cloner
 
@@ -34,6 +37,14 @@ thumbnail_agent = Agent(
     - Channel URL
     - Any specific thumbnail style elements they particularly like from this channel (Optional)
     
+    Before scraping, call find_similar_styles with the channel (or, if the creator
+    describes a style instead of naming a channel, with their description):
+    - If a match is marked reusable, tell the creator which channel's stored style guide
+      matches and, unless they ask for a fresh analysis, call use_stored_style with that
+      channel and skip straight to Phase 4
+    - Otherwise continue with Phase 2; non-reusable matches can still be mentioned as
+      channels with a similar style
+    
     ## Phase 2: Thumbnail Collection
     
     Delegate to: thumbnail_scraper_agent
@@ -88,5 +99,8 @@ thumbnail_agent = Agent(
     """,
 )
 
+# Record per-agent metrics and trace spans
+instrument_agent_tree(thumbnail_agent)
+
 # Set the root agent
 root_agent = thumbnail_agent
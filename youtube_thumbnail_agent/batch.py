@@ -0,0 +1,866 @@
+"""
+Headless batch runner for producing many thumbnails without a chat operator.
+
+Reads jobs from a CSV or JSONL file and drives each one through the same phase
+agents the interactive thumbnail_agent delegates to: scrape, analysis and style
+guide, prompt, and image. Jobs run concurrently, progress is appended to a
+JSONL file so an interrupted batch can be resumed, and a results manifest is
+written at the end.
+
+By default scraping and analysis are pipelined: each thumbnail is handed to
+the analysis agents through a bounded queue as soon as it is downloaded, so
+downloading, fetching further result pages and analyzing overlap. The style
+guide is then written from all the analyses. --no-pipeline runs the scraper
+and the analysis loop one after the other, as the interactive app does.
+
+Every phase checkpoints its output per channel (see shared_lib/checkpoints.py),
+so a job that failed or was interrupted resumes where it stopped: a recent
+scrape, the thumbnails already analyzed, the style guide and the prompt are
+restored instead of being produced again. Jobs of the same channel go through
+scraping, analysis and the style guide one at a time, so only the first one
+does the work and the others restore its results and reuse its style guide.
+
+Prompts for the jobs of a channel that have no assets are written together:
+the first of those jobs to reach the prompt phase sends all of them to the
+batch prompt generator, BATCH_PROMPT_CHUNK_SIZE videos per structured call,
+and checkpoints every prompt it returns. The first call is sent alone and the
+rest together once it returns, so they can reuse the style context it cached.
+Each job's prompt phase then restores its prompt instead of running the prompt
+generator; a job the batch missed falls back to it. --no-batch-prompts writes
+every prompt on its own.
+
+Each job needs a channel, a video title and a summary. Assets are optional
+image paths (a JSON list in JSONL, or separated by ";" in CSV). A job may set
+its own id; otherwise one is derived from its inputs so it is stable across runs.
+Identical rows get the same id with a "-2", "-3"... suffix for each repeat.
+
+Usage:
+    python -m youtube_thumbnail_agent.batch jobs.csv --concurrency 4
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+import google.genai.types as types
+from google.adk.agents import BaseAgent, LlmAgent, SequentialAgent
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from .constants import (
+    BATCH_CONCURRENCY,
+    BATCH_OUTPUT_DIR,
+    BATCH_PIPELINE_QUEUE_SIZE,
+    BATCH_PROMPT_CHUNK_SIZE,
+)
+from .shared_lib.blob_store import blob_handle, resolve_blobs
+from .shared_lib.checkpoints import (
+    checkpoint_prompt,
+    checkpoint_scrape,
+    prompt_request_key,
+    restore_analyses,
+    restore_prompt,
+    restore_scrape,
+)
+from .shared_lib.env import load_environment
+from .shared_lib.file_io import link_atomic
+from .shared_lib.metrics import instrument_agent_tree, write_metrics
+from .shared_lib.workspace import cleanup_session_workspace, workspace_for_session
+from .sub_agents.generate_image_agent.agent import generate_image_agent
+from .sub_agents.prompt_generator.agent import prompt_generator
+from .sub_agents.prompt_generator.batch_agent import batch_prompt_generator
+from .sub_agents.thumbnail_analyzer_agent.agent import thumbnail_analyzer_agent
+from .sub_agents.thumbnail_analyzer_agent.sub_agents.save_analysis_agent import (
+    save_analysis_agent,
+)
+from .sub_agents.thumbnail_analyzer_agent.sub_agents.single_thumbnail_analyzer_agent import (
+    single_thumbnail_analyzer_agent,
+)
+from .sub_agents.thumbnail_analyzer_agent.sub_agents.style_guide_generator_agent import (
+    style_guide_generator_agent,
+)
+from .sub_agents.thumbnail_scraper.agent import thumbnail_scraper_agent
+from .sub_agents.thumbnail_scraper.tools.scrape_channel import (
+    extract_channel_id,
+    iter_channel_thumbnails,
+)
+
+APP_NAME = "youtube_thumbnail_batch"
+USER_ID = "batch"
+
+logger = logging.getLogger(__name__)
+
+# Told to every agent so it doesn't wait for a reply that will never come
+_UNATTENDED = (
+    "This is an unattended batch run: there is no user to answer questions or "
+    "give feedback. Make every decision yourself and finish the task in this turn."
+)
+
+
+def load_jobs(path: str) -> List[Dict]:
+    """
+    Read batch jobs from a CSV or JSONL file.
+
+    Args:
+        path: Path to a .csv or .jsonl file
+
+    Returns:
+        List[Dict]: Jobs with job_id, channel, title, summary and assets
+
+    Raises:
+        ValueError: If a job is missing a required field, or two jobs set
+            the same id
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    # How often each derived id was seen, to tell identical rows apart
+    derived_ids: Dict[str, int] = {}
+    job_ids = set()
+    for number, row in enumerate(rows, 1):
+        missing = [key for key in ("channel", "title", "summary") if not row.get(key)]
+        if missing:
+            raise ValueError(f"Job {number} in {path} is missing {', '.join(missing)}")
+
+        assets = row.get("assets") or []
+        if isinstance(assets, str):
+            assets = [asset.strip() for asset in assets.split(";") if asset.strip()]
+
+        job_id = row.get("job_id") or row.get("id")
+        if not job_id:
+            digest = hashlib.sha256(
+                json.dumps(
+                    [row["channel"], row["title"], row["summary"], assets]
+                ).encode("utf-8")
+            ).hexdigest()
+            job_id = digest[:12]
+            derived_ids[job_id] = derived_ids.get(job_id, 0) + 1
+            if derived_ids[job_id] > 1:
+                job_id = f"{job_id}-{derived_ids[job_id]}"
+        if str(job_id) in job_ids:
+            raise ValueError(f"Job {number} in {path} repeats job_id {job_id}")
+        job_ids.add(str(job_id))
+
+        jobs.append(
+            {
+                "job_id": str(job_id),
+                "channel": row["channel"],
+                "title": row["title"],
+                "summary": row["summary"],
+                "assets": assets,
+            }
+        )
+    return jobs
+
+
+def load_progress(progress_path: str) -> Dict[str, Dict]:
+    """
+    Read the latest recorded result of each job from a progress file.
+
+    Args:
+        progress_path: Path to the JSONL progress file
+
+    Returns:
+        Dict[str, Dict]: Latest result for each job ID
+    """
+    results = {}
+    if os.path.exists(progress_path):
+        with open(progress_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by an interrupted run
+                    continue
+                results[result["job_id"]] = result
+    return results
+
+
+def _standalone(agent: LlmAgent) -> LlmAgent:
+    """
+    Copy a phase agent so it runs on its own.
+
+    In the interactive app these agents can hand off to their parent and
+    peers; in a batch the runner decides what runs next.
+    """
+    return agent.model_copy(
+        update={
+            "parent_agent": None,
+            "disallow_transfer_to_parent": True,
+            "disallow_transfer_to_peers": True,
+        }
+    )
+
+
+def _phase_agents(pipeline: bool) -> List[Tuple[str, BaseAgent]]:
+    if pipeline:
+        phases = [
+            # Runs once per thumbnail as the thumbnails arrive from the scraper
+            (
+                "scrape_analyze",
+                SequentialAgent(
+                    name="PipelinedThumbnailAnalysis",
+                    sub_agents=[
+                        _standalone(single_thumbnail_analyzer_agent),
+                        _standalone(save_analysis_agent),
+                    ],
+                ),
+            ),
+            ("style_guide", _standalone(style_guide_generator_agent)),
+        ]
+    else:
+        phases = [
+            ("scrape", _standalone(thumbnail_scraper_agent)),
+            ("analyze", thumbnail_analyzer_agent),
+        ]
+    phases += [
+        ("prompt", _standalone(prompt_generator)),
+        ("image", _standalone(generate_image_agent)),
+    ]
+    # The phase agents are used without the root agent, which instruments them
+    for _, agent in phases:
+        instrument_agent_tree(agent)
+    return phases
+
+
+def _job_channel(job: Dict) -> str:
+    """The channel ID of a job, or its channel as given if it has none."""
+    return extract_channel_id(job["channel"]) or job["channel"]
+
+
+def _text(text: str) -> types.Part:
+    return types.Part(text=text)
+
+
+def _asset_parts(assets: List[str]) -> List[types.Part]:
+    """Attach asset images inline, the way they arrive from the chat UI."""
+    parts = []
+    for asset_path in assets:
+        mime_type = mimetypes.guess_type(asset_path)[0] or "image/png"
+        with open(asset_path, "rb") as f:
+            parts.append(
+                types.Part(inline_data=types.Blob(data=f.read(), mime_type=mime_type))
+            )
+    return parts
+
+
+def _phase_message(
+    phase: str, job: Dict, state: Dict, refresh: bool = False
+) -> types.Content:
+    """Build the user message that starts a phase."""
+    if phase == "scrape":
+        parts = [
+            _text(
+                f"Scrape thumbnails from this YouTube channel: {job['channel']}"
+                + ("\nRefresh it to pick up new videos." if refresh else "")
+            )
+        ]
+    elif phase == "analyze":
+        parts = [_text("Analyze the scraped thumbnails and create the style guide.")]
+    elif phase == "scrape_analyze":
+        parts = [
+            _text(
+                f"Analyze the thumbnail {state['thumbnail_to_analyze']} "
+                "and save the analysis."
+            )
+        ]
+    elif phase == "style_guide":
+        parts = [
+            _text(
+                f"{_UNATTENDED}\n\n"
+                "Create the style guide from the thumbnail analyses."
+            )
+        ]
+    elif phase == "prompt":
+        parts = [
+            _text(
+                f"{_UNATTENDED}\n\n"
+                f"Video Title: {job['title']}\n"
+                f"Brief Topic Summary: {job['summary']}\n\n"
+                "Write the final thumbnail prompt in the analyzed style"
+                + (", using every attached image," if job["assets"] else "")
+                + " and save it with save_prompt."
+            )
+        ] + _asset_parts(job["assets"])
+    else:
+        parts = [
+            _text(
+                f"{_UNATTENDED}\n\n"
+                "Call create_image_async with draft set to false and this prompt "
+                "exactly as provided, then call export_thumbnail.\n\n"
+                f"{resolve_blobs(state['prompt'])}"
+            )
+        ]
+    return types.Content(role="user", parts=parts)
+
+
+def _batch_prompt_message(videos: List[Dict]) -> types.Content:
+    """Build the user message that asks for the prompts of several videos."""
+    listing = "\n\n".join(
+        f"request_id: {video['request_id']}\n"
+        f"Video Title: {video['title']}\n"
+        f"Brief Topic Summary: {video['summary']}"
+        for video in videos
+    )
+    return types.Content(
+        role="user",
+        parts=[
+            _text(
+                f"{_UNATTENDED}\n\n"
+                f"Write a thumbnail prompt in the analyzed style for each of these "
+                f"{len(videos)} videos.\n\n{listing}"
+            )
+        ],
+    )
+
+
+def _phase_error(phase: str, state: Dict) -> Optional[str]:
+    """Check that a phase left behind what the next phase needs."""
+    if phase == "scrape" and not state.get("thumbnail_analysis"):
+        return "No thumbnails were scraped"
+    if phase == "scrape_analyze" and not state.get("thumbnail_analysis"):
+        return "No thumbnails were scraped"
+    if phase == "scrape_analyze" and not all(state["thumbnail_analysis"].values()):
+        return "Not every thumbnail was analyzed"
+    if phase in ("analyze", "style_guide") and not state.get("style_guide"):
+        return "No style guide was generated"
+    if phase == "prompt" and not state.get("prompt"):
+        return "No prompt was saved"
+    if phase == "image" and not state.get("thumbnail_path"):
+        return "No thumbnail was generated"
+    return None
+
+
+def _collect_outputs(job_id: str, state: Dict, output_dir: str) -> Dict[str, str]:
+    """Link a job's deliverables out of its session workspace into output_dir."""
+    job_dir = os.path.join(output_dir, job_id)
+    outputs = {}
+    for key, state_key in (
+        ("thumbnail", "thumbnail_path"),
+        ("export", "thumbnail_export_path"),
+    ):
+        source_path = state.get(state_key)
+        if source_path and os.path.exists(source_path):
+            path = os.path.join(job_dir, os.path.basename(source_path))
+            link_atomic(source_path, path)
+            outputs[key] = path
+    return outputs
+
+
+class BatchRunner:
+    """Runs batch jobs through the phase agents with bounded concurrency."""
+
+    def __init__(
+        self,
+        output_dir: str = BATCH_OUTPUT_DIR,
+        concurrency: int = BATCH_CONCURRENCY,
+        progress_path: Optional[str] = None,
+        pipeline: bool = True,
+        refresh: bool = False,
+        batch_prompts: bool = True,
+    ):
+        self.output_dir = output_dir
+        self.concurrency = max(1, concurrency)
+        self.progress_path = progress_path or os.path.join(output_dir, "progress.jsonl")
+        self.session_service = InMemorySessionService()
+        self.artifact_service = InMemoryArtifactService()
+        self.runners = [
+            (
+                phase,
+                Runner(
+                    app_name=APP_NAME,
+                    agent=agent,
+                    session_service=self.session_service,
+                    artifact_service=self.artifact_service,
+                ),
+            )
+            for phase, agent in _phase_agents(pipeline)
+        ]
+        self.progress_lock = asyncio.Lock()
+        # Scrape every channel again instead of restoring checkpointed scrapes;
+        # only the first job of each channel does, the others restore its scrape
+        self.refresh = refresh
+        self.refreshed_channels: Set[str] = set()
+        # Write the prompts of a channel's jobs without assets together
+        self.batch_prompts = batch_prompts
+        instrument_agent_tree(batch_prompt_generator)
+        self.prompt_batch_runner = Runner(
+            app_name=APP_NAME,
+            agent=batch_prompt_generator,
+            session_service=self.session_service,
+            artifact_service=self.artifact_service,
+        )
+        # Pending jobs without assets, by channel, and the batches written
+        # for them, by channel and style guide
+        self.channel_jobs: Dict[str, List[Dict]] = {}
+        self.prompt_batches: Dict[Tuple[str, str], asyncio.Task] = {}
+        # Held by the job of a channel that is scraping and analyzing it
+        self.channel_locks: Dict[str, asyncio.Lock] = {}
+
+    async def _record(self, result: Dict) -> None:
+        """Append a job result to the progress file."""
+        async with self.progress_lock:
+            os.makedirs(os.path.dirname(self.progress_path) or ".", exist_ok=True)
+            with open(self.progress_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+
+    def _update_state(self, session_id: str, state_delta: Dict) -> Dict:
+        """Write to a session's state between agent runs; return the new state."""
+        session = self.session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+        self.session_service.append_event(
+            session,
+            Event(
+                author="user",
+                invocation_id=f"batch-{uuid.uuid4().hex}",
+                actions=EventActions(state_delta=state_delta),
+            ),
+        )
+        return session.state
+
+    def _takes_refresh(self, channel: str) -> bool:
+        """Whether a job scrapes its channel again: the first one of the run does."""
+        if not self.refresh or channel in self.refreshed_channels:
+            return False
+        self.refreshed_channels.add(channel)
+        return True
+
+    async def _run_phase(
+        self, runner: Runner, phase: str, job: Dict, session_id: str, state: Dict
+    ) -> None:
+        refresh = phase == "scrape" and self._takes_refresh(_job_channel(job))
+        async for _ in runner.run_async(
+            user_id=USER_ID,
+            session_id=session_id,
+            new_message=_phase_message(phase, job, state, refresh),
+        ):
+            pass
+
+    async def _scrape_and_analyze(
+        self, runner: Runner, job: Dict, session_id: str
+    ) -> None:
+        """
+        Scrape a job's channel and analyze each thumbnail as soon as it lands.
+
+        The scraper feeds a queue of at most BATCH_PIPELINE_QUEUE_SIZE
+        thumbnails, so it waits for the analysis when it gets too far ahead.
+        A checkpointed scrape replaces the scraper, and thumbnails with a
+        checkpointed analysis are not analyzed again.
+        """
+        workspace = await asyncio.to_thread(workspace_for_session, session_id)
+        ref_dir = workspace.reference_images
+        channel = _job_channel(job)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=BATCH_PIPELINE_QUEUE_SIZE)
+
+        refresh = self._takes_refresh(channel)
+
+        async def produce() -> None:
+            try:
+                restored = (
+                    None
+                    if refresh
+                    else await asyncio.to_thread(
+                        restore_scrape, channel, ref_dir, session_id
+                    )
+                )
+                if restored is not None:
+                    for filename in restored:
+                        await queue.put(filename)
+                else:
+                    scraped = []
+                    async for filename in iter_channel_thumbnails(
+                        job["channel"], ref_dir, session_id
+                    ):
+                        scraped.append(os.path.join(ref_dir, filename))
+                        await queue.put(filename)
+                    if scraped:
+                        await asyncio.to_thread(checkpoint_scrape, channel, scraped)
+            except Exception:
+                await queue.put(None)
+                raise
+            await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (filename := await queue.get()) is not None:
+                state = self.session_service.get_session(
+                    app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+                ).state
+                checkpointed = await asyncio.to_thread(
+                    restore_analyses, channel, ref_dir, [filename]
+                )
+                analyses = {**state.get("thumbnail_analysis", {}), **checkpointed}
+                state = self._update_state(
+                    session_id,
+                    {"thumbnail_analysis": analyses, "thumbnail_to_analyze": filename},
+                )
+                if not analyses[filename]:
+                    await self._run_phase(
+                        runner, "scrape_analyze", job, session_id, state
+                    )
+        finally:
+            if not producer.done():
+                producer.cancel()
+        # Surface scraping errors
+        await producer
+
+    async def _write_prompt_chunk(
+        self, channel: str, state: Dict, videos: List[Dict]
+    ) -> None:
+        """Write the prompts of a chunk of videos in one call and checkpoint them."""
+        session_id = f"batch-prompts-{uuid.uuid4().hex}"
+        self.session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session_id,
+            state={
+                "channel": channel,
+                "style_guide": state["style_guide"],
+                "thumbnail_analysis": state.get("thumbnail_analysis", {}),
+            },
+        )
+        try:
+            async for _ in self.prompt_batch_runner.run_async(
+                user_id=USER_ID,
+                session_id=session_id,
+                new_message=_batch_prompt_message(videos),
+            ):
+                pass
+            written = (
+                self.session_service.get_session(
+                    app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+                ).state.get("batch_prompts")
+                or {}
+            )
+        except Exception as e:
+            # Invalid structured output included: these jobs write their own
+            logger.warning("Batch prompts for %s failed: %s", channel, e)
+            return
+        finally:
+            self.session_service.delete_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+            )
+
+        prompts = {
+            item["request_id"]: item["prompt"]
+            for item in written.get("prompts", [])
+            if item.get("prompt", "").strip()
+        }
+
+        def save() -> None:
+            for video in videos:
+                if video["request_id"] in prompts:
+                    checkpoint_prompt(
+                        channel,
+                        video["request_key"],
+                        prompts[video["request_id"]],
+                        state["style_guide"],
+                    )
+
+        await asyncio.to_thread(save)
+        missing = sum(1 for video in videos if video["request_id"] not in prompts)
+        if missing:
+            logger.warning("Batch prompts for %s missed %d video(s)", channel, missing)
+
+    async def _write_prompt_batch(self, channel: str, state: Dict) -> None:
+        """Write the prompts of a channel's jobs that have none checkpointed."""
+        videos = []
+        for job in self.channel_jobs.get(channel, []):
+            request_key = await asyncio.to_thread(
+                prompt_request_key, job["title"], job["summary"], []
+            )
+            restored = await asyncio.to_thread(
+                restore_prompt, channel, request_key, state["style_guide"]
+            )
+            if restored is None:
+                videos.append(
+                    {
+                        "request_id": job["job_id"],
+                        "request_key": request_key,
+                        "title": job["title"],
+                        "summary": job["summary"],
+                    }
+                )
+        chunks = [
+            videos[start : start + BATCH_PROMPT_CHUNK_SIZE]
+            for start in range(0, len(videos), BATCH_PROMPT_CHUNK_SIZE)
+        ]
+        if not chunks:
+            return
+        # The first call gets the style context cached; the others then hit it
+        await self._write_prompt_chunk(channel, state, chunks[0])
+        await asyncio.gather(
+            *(self._write_prompt_chunk(channel, state, chunk) for chunk in chunks[1:])
+        )
+
+    async def _batch_prompts(self, state: Dict) -> None:
+        """
+        Make sure the prompts of the job's channel were written as a batch.
+
+        The first job of a channel to get here starts the batch for every
+        pending job of that channel without assets; the others wait for it.
+        A new style guide, such as a refreshed one, gets a batch of its own.
+        """
+        channel = state["channel"]
+        key = (channel, blob_handle(state["style_guide"]))
+        if key not in self.prompt_batches:
+            self.prompt_batches[key] = asyncio.create_task(
+                self._write_prompt_batch(channel, dict(state))
+            )
+        try:
+            # A job that is cancelled must not cancel the batch the others wait for
+            await asyncio.shield(self.prompt_batches[key])
+        except Exception as e:
+            # The prompt phase writes whatever prompts the batch didn't
+            logger.warning("Batch prompts for %s failed: %s", channel, e)
+
+    async def _run_phases(
+        self,
+        phases: List[Tuple[str, Runner]],
+        job: Dict,
+        session_id: str,
+        state: Dict,
+        result: Dict,
+    ) -> Dict:
+        """Run a job's session through some of the phases; return its state."""
+        for phase, runner in phases:
+            result["phase"] = phase
+            phase_started_at = time.time()
+            if phase == "scrape_analyze":
+                await self._scrape_and_analyze(runner, job, session_id)
+            else:
+                if phase == "prompt" and self.batch_prompts and not job["assets"]:
+                    await self._batch_prompts(state)
+                await self._run_phase(runner, phase, job, session_id, state)
+            result["phase_seconds"][phase] = round(time.time() - phase_started_at, 2)
+
+            state = self.session_service.get_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+            ).state
+            error = _phase_error(phase, state)
+            if error:
+                raise RuntimeError(error)
+        return state
+
+    async def run_job(self, job: Dict) -> Dict:
+        """
+        Run one job through every phase in a fresh session.
+
+        Args:
+            job: A job from load_jobs
+
+        Returns:
+            Dict: The job result, as recorded in the progress file
+        """
+        session_id = f"batch-{job['job_id']}"
+        self.session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+        result = {
+            "job_id": job["job_id"],
+            "channel": job["channel"],
+            "title": job["title"],
+            "status": "running",
+            "phase_seconds": {},
+        }
+        started_at = time.time()
+        state: Dict = {}
+        try:
+            # Lets the phase agents find and update the channel's checkpoint
+            state = self._update_state(
+                session_id,
+                {
+                    "channel": _job_channel(job),
+                    "prompt_request": await asyncio.to_thread(
+                        prompt_request_key, job["title"], job["summary"], job["assets"]
+                    ),
+                },
+            )
+            split = [phase for phase, _ in self.runners].index("prompt")
+            channel_lock = self.channel_locks.setdefault(
+                state["channel"], asyncio.Lock()
+            )
+            async with channel_lock:
+                state = await self._run_phases(
+                    self.runners[:split], job, session_id, state, result
+                )
+            state = await self._run_phases(
+                self.runners[split:], job, session_id, state, result
+            )
+
+            result["status"] = "succeeded"
+            result["prompt"] = resolve_blobs(state.get("prompt"))
+            result["outputs"] = _collect_outputs(job["job_id"], state, self.output_dir)
+            del result["phase"]
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+        finally:
+            self.session_service.delete_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+            )
+            # The deliverables were linked out of the workspace above
+            await asyncio.to_thread(cleanup_session_workspace, session_id)
+
+        result["seconds"] = round(time.time() - started_at, 2)
+        await self._record(result)
+        logger.info(
+            "Job %s %s in %ss", job["job_id"], result["status"], result["seconds"]
+        )
+        return result
+
+    async def run(self, jobs: List[Dict], resume: bool = True) -> List[Dict]:
+        """
+        Run jobs concurrently, skipping ones that already succeeded.
+
+        Args:
+            jobs: Jobs from load_jobs
+            resume: Skip jobs the progress file records as succeeded
+
+        Returns:
+            List[Dict]: The latest result for every job, in input order
+        """
+        previous = load_progress(self.progress_path) if resume else {}
+        pending = [
+            job
+            for job in jobs
+            if previous.get(job["job_id"], {}).get("status") != "succeeded"
+        ]
+        if len(pending) < len(jobs):
+            logger.info("Skipping %d finished job(s)", len(jobs) - len(pending))
+
+        self.channel_jobs = {}
+        self.prompt_batches = {}
+        self.channel_locks = {}
+        self.refreshed_channels = set()
+        for job in pending:
+            if not job["assets"]:
+                self.channel_jobs.setdefault(_job_channel(job), []).append(job)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_bounded(job: Dict) -> Dict:
+            async with semaphore:
+                return await self.run_job(job)
+
+        finished = await asyncio.gather(*(run_bounded(job) for job in pending))
+        latest = {**previous, **{result["job_id"]: result for result in finished}}
+        return [latest[job["job_id"]] for job in jobs]
+
+
+def write_manifest(results: List[Dict], manifest_path: str) -> Dict:
+    """
+    Write the results manifest for a batch.
+
+    Args:
+        results: The result of every job
+        manifest_path: Where to write the manifest JSON
+
+    Returns:
+        Dict: The manifest
+    """
+    manifest = {
+        "generated_at": time.time(),
+        "total": len(results),
+        "succeeded": sum(1 for result in results if result["status"] == "succeeded"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "jobs": results,
+    }
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate thumbnails for a batch of channel/title jobs."
+    )
+    parser.add_argument("jobs", help="CSV or JSONL file of jobs")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help="Number of jobs to run at the same time",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=BATCH_OUTPUT_DIR,
+        help="Directory for thumbnails, progress and the manifest",
+    )
+    parser.add_argument("--progress", help="Progress file (default: in output dir)")
+    parser.add_argument("--manifest", help="Manifest file (default: in output dir)")
+    parser.add_argument(
+        "--metrics",
+        help="Write per-agent metrics here, as Prometheus text for .prom files "
+        "and JSON otherwise",
+    )
+    parser.add_argument(
+        "--no-pipeline",
+        dest="pipeline",
+        action="store_false",
+        help="Finish scraping before analysis starts, instead of overlapping them",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Scrape channels again for new videos; only new thumbnails are "
+        "analyzed and merged into each channel's style guide",
+    )
+    parser.add_argument(
+        "--no-batch-prompts",
+        dest="batch_prompts",
+        action="store_false",
+        help="Write each job's prompt in its own conversation, instead of "
+        "writing a channel's prompts together",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore recorded progress and run every job again",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    load_environment()
+    jobs = load_jobs(args.jobs)
+    runner = BatchRunner(
+        output_dir=args.output_dir,
+        concurrency=args.concurrency,
+        progress_path=args.progress,
+        pipeline=args.pipeline,
+        refresh=args.refresh,
+        batch_prompts=args.batch_prompts,
+    )
+    results = asyncio.run(runner.run(jobs, resume=not args.restart))
+    manifest = write_manifest(
+        results, args.manifest or os.path.join(args.output_dir, "manifest.json")
+    )
+    if args.metrics:
+        write_metrics(args.metrics)
+    print(
+        f"[Batch] {manifest['succeeded']}/{manifest['total']} jobs succeeded, "
+        f"{manifest['failed']} failed"
+    )
+    return 0 if manifest["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
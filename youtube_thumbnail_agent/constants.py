@@ -1,12 +1,138 @@
 GEMINI_MODEL = "gemini-2.5-flash-preview-04-17"
+GEMINI_FAST_MODEL = "gemini-2.0-flash-lite"
+GEMINI_STANDARD_MODEL = "gemini-2.0-flash"
+
+# Model routing constants (see shared_lib/model_routing.py)
+MODEL_TIERS = {  # Models of each tier, in order of preference
+    "fast": [GEMINI_FAST_MODEL, GEMINI_STANDARD_MODEL],
+    "standard": [GEMINI_STANDARD_MODEL, GEMINI_MODEL],
+    "deep": [GEMINI_MODEL, GEMINI_STANDARD_MODEL],
+}
+MODEL_TIER_TIMEOUT_SECONDS = {  # Wait for a response before trying the next model
+    "fast": 20,
+    "standard": 60,
+    "deep": None,  # Long visual analyses; fall back on errors only
+}
+AGENT_MODEL_TIERS = {
+    "youtube_thumbnail_generator": "fast",  # Delegation turns
+    "ThumbnailScraper": "fast",
+    "ThumbnailSelector": "fast",
+    "SaveAnalysisAgent": "fast",
+    "generate_image_agent": "standard",
+    "SingleThumbnailAnalyzer": "deep",
+    "StyleGuideGenerator": "deep",
+    "thumbnail_prompt_generator": "deep",
+    "BatchPromptGenerator": "deep",
+}
+DEFAULT_MODEL_TIER = "deep"  # For agents not listed above
+MODEL_FAILURES_BEFORE_COOLDOWN = 3  # Consecutive failures before a model is tried last
+MODEL_COOLDOWN_SECONDS = 60
+
+# Metrics constants (see shared_lib/metrics.py)
+# A span still open after this long lost its closing callback (e.g. the model
+# call raised) and is closed as an error
+OPEN_SPAN_TTL_SECONDS = 30 * 60
 
 # OpenAI image generation constants
+OPENAI_IMAGE_MODEL = "gpt-image-1"
+LOCAL_IMAGE_MODEL = "local-procedural"  # Offline stub backend for benchmarks
 THUMBNAIL_IMAGE_SIZE = "1536x1024"  # Landscape format for YouTube thumbnails
+THUMBNAIL_DRAFT_QUALITY = "low"  # Fast, cheap renders while iterating on feedback
+THUMBNAIL_FINAL_QUALITY = "high"  # Full-quality render of the accepted prompt
+
+# Network request constants
+YOUTUBE_API_BASE_URL = "https://www.googleapis.com/youtube/v3"
+YOUTUBE_API_TIMEOUT_SECONDS = 10  # Per YouTube API or thumbnail download request
+IMAGE_GENERATION_TIMEOUT_SECONDS = 180  # Per image backend call
 
 # Image directory structure constants
 IMAGE_ROOT_DIR = "images"  # Root directory for all images
-REFERENCE_IMAGES_DIR = (
-    f"{IMAGE_ROOT_DIR}/reference_images"  # For scraped/reference thumbnails
+SESSION_WORKSPACES_DIR = f"{IMAGE_ROOT_DIR}/sessions"  # One workspace per session
+
+# Subdirectories of each session workspace
+REFERENCE_IMAGES_SUBDIR = "reference_images"  # For scraped/reference thumbnails
+THUMBNAIL_ASSETS_SUBDIR = "assets"  # For user-uploaded assets
+GENERATED_THUMBNAILS_SUBDIR = "generated"  # For generated thumbnails
+GENERATED_RENDERS_SUBDIR = (
+    f"{GENERATED_THUMBNAILS_SUBDIR}/renders"  # One file per render
 )
-THUMBNAIL_ASSETS_DIR = f"{IMAGE_ROOT_DIR}/assets"  # For user-uploaded assets
-GENERATED_THUMBNAILS_DIR = f"{IMAGE_ROOT_DIR}/generated"  # For generated thumbnails
+
+# SQLite catalog of every image the agents write, queried instead of scanning directories
+IMAGE_CATALOG_PATH = f"{IMAGE_ROOT_DIR}/catalog.sqlite3"
+
+# Workspaces untouched for this long are removed by the stale workspace sweep
+SESSION_WORKSPACE_TTL_SECONDS = 24 * 60 * 60
+
+# Artifacts reference the render file on disk instead of holding a copy of the
+# image. Off by default: the ADK web UI only shows inline image artifacts, and
+# artifact services such as GCS need inline data. Only enable it with an
+# artifact service and UI that accept file references.
+IMAGE_ARTIFACTS_BY_REFERENCE = False
+
+# Session state blob store constants
+STATE_BLOB_DIR = "state_blobs"  # Content-addressed text kept out of session state
+STATE_BLOB_MIN_BYTES = 1024  # Smaller values stay inline in session state
+# Blobs no checkpoint or style index entry refers to are deleted once they have
+# not been stored for this long; sessions idle longer lost their workspace too
+STATE_BLOB_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Run checkpoint constants (see shared_lib/checkpoints.py)
+CHECKPOINT_DIR = "checkpoints"  # One checkpoint per channel, kept across runs
+CHECKPOINT_SCRAPE_TTL_SECONDS = 24 * 60 * 60  # Rescrape for new videos after this
+
+# Style guide refresh constants (see shared_lib/style_guides.py)
+STYLE_GUIDE_DELTA_MAX_NEW_FRACTION = (
+    0.5  # More new thumbnails than this rewrite the guide
+)
+STYLE_GUIDE_VERSIONS_KEPT = 30  # Versions of each channel's style guide kept on disk
+
+# Local image statistics constants (see shared_lib/image_features.py)
+IMAGE_FEATURE_SIZE = (64, 36)  # Thumbnails are measured at this size
+PALETTE_COLORS = 5  # Dominant colors measured per thumbnail
+PALETTE_MERGE_DISTANCE = 0.12  # Colors closer than this (0-1) count as the same
+STYLE_STATS_TOLERANCE = 0.1  # Slack around a channel's brightness/contrast/saturation
+COLOR_HISTOGRAM_BINS = 4  # Bins per RGB channel in color histograms
+LAYOUT_GRID = (8, 4)  # Columns and rows of the light/dark layout map
+STYLE_TEXT_DIMS = 256  # Hashed word buckets describing a style guide
+
+# Style index constants (see shared_lib/style_index.py)
+STYLE_INDEX_PATH = "style_index.npz"  # Vectors and style guides of analyzed channels
+STYLE_INDEX_IMAGE_WEIGHT = 0.6  # Share of thumbnail looks (vs. wording) in similarity
+STYLE_INDEX_REUSE_SIMILARITY = 0.9  # Similar enough to stand in for a new analysis
+STYLE_INDEX_EXACT_MAX = 10_000  # Larger indexes use approximate (LSH) search
+STYLE_INDEX_LSH_TABLES = 8  # Independent hash tables per vector block
+STYLE_INDEX_LSH_BITS = 12  # Hyperplanes (signature bits) per table
+STYLE_INDEX_LSH_MAX_RADIUS = 2  # Most signature bits a candidate may differ in
+
+# Generated thumbnail scoring constants (see shared_lib/style_score.py)
+STYLE_SCORE_WEIGHTS = {"palette": 0.3, "histogram": 0.25, "layout": 0.25, "phash": 0.2}
+STYLE_SCORE_REJECT_RATIO = 0.8  # Reject below this share of the references' own score
+PHASH_SAMPLE_SIZE = 32  # Grayscale size perceptual hashes are computed from
+THUMBNAIL_MAX_CANDIDATES = 4  # Most drafts rendered at once for one prompt
+
+# Model context cache constants
+CONTEXT_CACHE_MIN_TOKENS = 1024  # Shorter instructions are not worth caching
+CONTEXT_CACHE_TTL_SECONDS = 60 * 60  # Lifetime of a cached style context
+CONTEXT_CACHE_RETRY_SECONDS = 5 * 60  # Wait before retrying a failed cache creation
+
+# Generation cache constants
+GENERATION_CACHE_DIR = f"{IMAGE_ROOT_DIR}/cache"  # Content-addressed generated images
+GENERATION_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Evict oldest entries above 512 MB
+
+# YouTube delivery constants
+YOUTUBE_THUMBNAIL_SIZE = (1280, 720)  # 16:9 size YouTube recommends for uploads
+YOUTUBE_THUMBNAIL_MAX_BYTES = 2 * 1024 * 1024  # YouTube's 2 MB upload limit
+THUMBNAIL_PREVIEW_SIZE = (320, 180)  # Small preview shown as the chat artifact
+THUMBNAIL_PREVIEW_MAX_BYTES = 64 * 1024  # Byte budget of that preview
+POSTPROCESS_WORKERS = 2  # Processes used for CPU-bound resizing and encoding
+
+# Background image generation job constants
+IMAGE_JOB_WORKERS = 2  # Generations running at the same time
+IMAGE_JOB_MAX_PENDING = 16  # Queued + running jobs before new submissions are rejected
+IMAGE_JOBS_PER_MINUTE = 5  # Match the images-per-minute limit of our OpenAI tier
+
+# Batch pipeline constants
+BATCH_CONCURRENCY = 2  # Jobs run at the same time by the batch runner
+BATCH_OUTPUT_DIR = "batch_output"  # Deliverables, progress file and results manifest
+BATCH_PIPELINE_QUEUE_SIZE = 2  # Scraped thumbnails waiting for analysis, per job
+BATCH_PROMPT_CHUNK_SIZE = 10  # Videos per batched prompt generator call
@@ -1,12 +1,25 @@
 """
 Shared library for YouTube thumbnail generator agent.
+
+Exports are imported on first access, so using one helper module (e.g. the
+image catalog) doesn't import ADK and the rest of the library.
 """
 
-from .callbacks import before_model_callback
-from .image_utils import delete_image, list_images
+import importlib
+
+_EXPORTS = {
+    "before_model_callback": ".callbacks",
+    "list_images": ".image_utils",
+    "delete_image": ".image_utils",
+    "chain_callbacks": ".metrics",
+    "instrument_agent_tree": ".metrics",
+    "write_metrics": ".metrics",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    "before_model_callback",
-    "list_images",
-    "delete_image",
-]
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
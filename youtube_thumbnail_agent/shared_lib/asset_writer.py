@@ -0,0 +1,100 @@
+"""
+Background writer for user-uploaded assets.
+
+Asset files are written on a single worker thread so large uploads never block
+a model request. Readers of a session's assets call
+wait_for_pending_asset_writes(session_id) first to see every file queued for
+that session.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from .catalog import record_image
+from .file_io import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+# Queued or running writes by path, with the session each belongs to
+_pending: Dict[str, Tuple[str, Future]] = {}
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset-writer")
+    return _executor
+
+
+def _write_asset(data: bytes, path: str, session_id: str, sha256: str) -> None:
+    try:
+        write_bytes_atomic(data, path)
+        record_image(path, "asset", session_id, data=data, sha256=sha256)
+    except Exception as e:
+        logger.error("Error saving asset %s: %s", path, e)
+        raise
+    finally:
+        with _lock:
+            _pending.pop(path, None)
+
+
+def submit_asset_write(data: bytes, path: str, session_id: str, sha256: str) -> Future:
+    """
+    Queue an asset file to be written atomically on the writer thread.
+
+    Once written, the file is added to the image catalog.
+
+    Writing the same path again while a write is pending reuses that write.
+
+    Args:
+        data: File contents
+        path: Destination path
+        session_id: The session the asset belongs to
+        sha256: Hex digest of data
+
+    Returns:
+        Future: Completes once the file is in place
+    """
+    with _lock:
+        if path in _pending:
+            return _pending[path][1]
+        # The worker removes the entry under the same lock, so it can't
+        # finish before the entry is added
+        future = _get_executor().submit(_write_asset, data, path, session_id, sha256)
+        _pending[path] = (session_id, future)
+        return future
+
+
+def is_asset_write_pending(path: str) -> bool:
+    """Return True if a write to path is queued or in progress."""
+    with _lock:
+        return path in _pending
+
+
+def wait_for_pending_asset_writes(
+    session_id: Optional[str] = None, timeout: Optional[float] = None
+) -> List[str]:
+    """
+    Block until a session's queued asset writes have finished.
+
+    Args:
+        session_id: Only wait for this session's writes; None waits for all
+        timeout: Maximum seconds to wait, or None to wait indefinitely
+
+    Returns:
+        List[str]: Paths whose writes were still pending when the timeout expired
+    """
+    with _lock:
+        pending = {
+            path: future
+            for path, (owner, future) in _pending.items()
+            if session_id is None or owner == session_id
+        }
+    if not pending:
+        return []
+    wait(pending.values(), timeout=timeout)
+    return [path for path, future in pending.items() if not future.done()]
@@ -0,0 +1,274 @@
+"""
+Content-addressed store for large text values kept out of session state.
+
+Analyses, the style guide and the generated prompt grow with the channel
+being cloned. Storing them in session state makes a persistent session service
+re-serialize every one of them on each state delta. Instead, values above
+STATE_BLOB_MIN_BYTES are written once to a file named after their SHA-256
+digest, and state keeps a short handle such as "blob:sha256:<digest>".
+Handles are resolved back to text only where the text is actually needed:
+in the instructions sent to the model and in code that reads the value.
+
+submit_blob_write returns the handle at once and writes the blob on a single
+background thread, for callers on the event loop. Until the write lands, the
+text is kept in memory and handles to it resolve from there.
+
+Blobs are deleted by cleanup_unreferenced_blobs once nothing durable refers to
+them and they have not been stored again for STATE_BLOB_TTL_SECONDS (see
+checkpoints.cleanup_state_blobs for what counts as a reference).
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Set
+
+from ..constants import STATE_BLOB_DIR, STATE_BLOB_MIN_BYTES, STATE_BLOB_TTL_SECONDS
+from .file_io import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+BLOB_HANDLE_PREFIX = "blob:sha256:"
+
+_HANDLE_PATTERN = re.compile(r"blob:sha256:([0-9a-f]{64})")
+
+# Blobs are written one at a time, off the event loop
+_writer: Optional[ThreadPoolExecutor] = None
+# Text of submitted blobs not written yet, by digest
+_pending: Dict[str, str] = {}
+_pending_lock = threading.Lock()
+
+
+def _blob_path(digest: str) -> str:
+    return os.path.join(STATE_BLOB_DIR, digest[:2], digest)
+
+
+def is_blob_handle(value: Any) -> bool:
+    """Whether a value is a handle returned by put_blob."""
+    return isinstance(value, str) and _HANDLE_PATTERN.fullmatch(value) is not None
+
+
+def blob_handle(text: str, min_bytes: int = STATE_BLOB_MIN_BYTES) -> str:
+    """
+    Compute the value put_blob would return, without storing anything.
+
+    Use it to compare a value with a stored handle on read paths.
+
+    Args:
+        text: The value
+        min_bytes: Values smaller than this, in UTF-8 bytes, are returned as is
+
+    Returns:
+        str: The value's blob handle, or the text itself if it is small
+    """
+    if not isinstance(text, str) or is_blob_handle(text):
+        return text
+    data = text.encode("utf-8")
+    if len(data) < min_bytes:
+        return text
+    return f"{BLOB_HANDLE_PREFIX}{hashlib.sha256(data).hexdigest()}"
+
+
+def put_blob(text: str, min_bytes: int = STATE_BLOB_MIN_BYTES) -> str:
+    """
+    Store a text value out of line if it is large enough to be worth it.
+
+    Identical values map to the same file, so storing one again is free.
+
+    Args:
+        text: The value to store
+        min_bytes: Values smaller than this, in UTF-8 bytes, are returned as is
+
+    Returns:
+        str: A blob handle, or the text itself if it is small
+    """
+    handle = blob_handle(text, min_bytes)
+    if handle is text:
+        return text
+
+    path = _blob_path(handle[len(BLOB_HANDLE_PREFIX) :])
+    try:
+        # Storing a value again keeps its blob from being cleaned up
+        os.utime(path)
+    except FileNotFoundError:
+        write_bytes_atomic(text.encode("utf-8"), path)
+    return handle
+
+
+def _write_pending_blob(digest: str) -> None:
+    with _pending_lock:
+        text = _pending[digest]
+    try:
+        put_blob(text)
+    except OSError as e:
+        # The text stays in memory, so its handle still resolves in this process
+        logger.error("Could not write blob %s: %s", digest, e)
+        return
+    with _pending_lock:
+        _pending.pop(digest, None)
+
+
+def submit_blob_write(text: str, min_bytes: int = STATE_BLOB_MIN_BYTES) -> str:
+    """
+    Like put_blob, but write the blob on the background writer thread.
+
+    The handle can be resolved right away: until the blob is written, its
+    text is read from memory.
+
+    Args:
+        text: The value to store
+        min_bytes: Values smaller than this, in UTF-8 bytes, are returned as is
+
+    Returns:
+        str: A blob handle, or the text itself if it is small
+    """
+    global _writer
+    handle = blob_handle(text, min_bytes)
+    if handle is text:
+        return text
+    digest = handle[len(BLOB_HANDLE_PREFIX) :]
+    with _pending_lock:
+        if digest not in _pending:
+            _pending[digest] = text
+            if _writer is None:
+                _writer = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="blob-writer"
+                )
+            _writer.submit(_write_pending_blob, digest)
+    return handle
+
+
+@functools.lru_cache(maxsize=256)
+def _read_blob_file(digest: str) -> str:
+    # Blobs never change once written, so reads can be cached by digest
+    with open(_blob_path(digest), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def _read_blob(digest: str) -> str:
+    with _pending_lock:
+        text = _pending.get(digest)
+    return text if text is not None else _read_blob_file(digest)
+
+
+def get_blob(handle: str) -> str:
+    """
+    Read the text behind a blob handle.
+
+    Args:
+        handle: A handle returned by put_blob
+
+    Returns:
+        str: The stored text
+
+    Raises:
+        ValueError: If handle is not a blob handle
+        FileNotFoundError: If the blob is missing from the store
+    """
+    if not is_blob_handle(handle):
+        raise ValueError(f"Not a blob handle: {handle!r}")
+    return _read_blob(handle[len(BLOB_HANDLE_PREFIX) :])
+
+
+def resolve_blobs(value: Any) -> Any:
+    """
+    Replace blob handles with their text, inside dicts and lists as well.
+
+    Args:
+        value: A state value that may be or contain blob handles
+
+    Returns:
+        The value with every handle resolved
+    """
+    if is_blob_handle(value):
+        return get_blob(value)
+    if isinstance(value, dict):
+        return {key: resolve_blobs(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_blobs(item) for item in value]
+    return value
+
+
+def resolve_blob_handles_in_text(text: str) -> str:
+    """
+    Replace every blob handle that appears in a piece of text with its content.
+
+    Used on rendered instructions, where ADK has already substituted the
+    state values (and so the handles) into the template. Handles whose blob is
+    missing are left in place.
+
+    Args:
+        text: Text that may contain blob handles
+
+    Returns:
+        str: The text with handles resolved
+    """
+
+    def replace(match: re.Match) -> str:
+        try:
+            return _read_blob(match.group(1))
+        except FileNotFoundError:
+            logger.warning("Blob %s is missing from the store", match.group(0))
+            return match.group(0)
+
+    return _HANDLE_PATTERN.sub(replace, text)
+
+
+def blob_digests(text: str) -> Set[str]:
+    """
+    Find the digests of every blob handle that appears in a piece of text.
+
+    Args:
+        text: Text that may contain blob handles (e.g. a JSON document)
+
+    Returns:
+        Set[str]: The SHA-256 digests the handles point to
+    """
+    return set(_HANDLE_PATTERN.findall(text))
+
+
+def cleanup_unreferenced_blobs(
+    referenced: Iterable[str], max_age_seconds: float = STATE_BLOB_TTL_SECONDS
+) -> int:
+    """
+    Delete blobs that are not referenced and have not been stored lately.
+
+    Live sessions hold handles only in memory, so a blob is kept for
+    max_age_seconds after it was last stored even when nothing else refers
+    to it.
+
+    Args:
+        referenced: Digests of the blobs to keep
+        max_age_seconds: Age after which an unreferenced blob is deleted
+
+    Returns:
+        int: Number of blobs deleted
+    """
+    if not os.path.isdir(STATE_BLOB_DIR):
+        return 0
+
+    referenced = set(referenced)
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for prefix in os.listdir(STATE_BLOB_DIR):
+        directory = os.path.join(STATE_BLOB_DIR, prefix)
+        if not os.path.isdir(directory):
+            continue
+        for digest in os.listdir(directory):
+            if digest in referenced or not re.fullmatch(r"[0-9a-f]{64}", digest):
+                continue
+            path = os.path.join(directory, digest)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    if removed:
+        logger.info("Deleted %d unreferenced state blob(s)", removed)
+    return removed
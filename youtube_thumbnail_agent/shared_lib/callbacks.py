@@ -1,30 +1,17 @@
-import base64
+import hashlib
+import logging
 import os
-from typing import Dict, Optional
+import time
+from typing import Callable, Dict, Optional
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmRequest, LlmResponse
 
-from ..constants import IMAGE_ROOT_DIR, THUMBNAIL_ASSETS_DIR
+from .asset_writer import is_asset_write_pending, submit_asset_write
+from .blob_store import resolve_blob_handles_in_text, submit_blob_write
+from .workspace import get_workspace
 
-
-def ensure_thumbnail_assets_directory_exists():
-    """
-    Ensure that the assets directory exists, creating it if necessary.
-
-    Returns:
-        str: Path to the assets directory
-    """
-    # Create the root images directory first
-    os.makedirs(IMAGE_ROOT_DIR, exist_ok=True)
-
-    # Create assets directory
-    assets_dir = THUMBNAIL_ASSETS_DIR
-    if not os.path.exists(assets_dir):
-        os.makedirs(assets_dir)
-        print(f"Created assets directory at {assets_dir}")
-
-    return assets_dir
+logger = logging.getLogger(__name__)
 
 
 def before_model_callback(
@@ -32,8 +19,13 @@ def before_model_callback(
 ) -> Optional[LlmResponse]:
     """
     Callback that executes before the model is called.
-    Detects and saves inline images from user messages to assets folder
-    for use by the generate_image_agent.
+    Detects and saves inline images from user messages to the session's
+    assets folder for use by the generate_image_agent.
+
+    Each image is identified by a hash of its contents, so images that were
+    already stored are skipped on repeat model turns. New images are written
+    on a background thread, and their metadata is recorded in
+    state["user_assets"], keyed by hash.
 
     Args:
         callback_context: The callback context
@@ -42,28 +34,17 @@ def before_model_callback(
     Returns:
         Optional[LlmResponse]: None to allow normal processing
     """
-    agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    print(f"[Image Callback] Processing for agent: {agent_name} (Inv: {invocation_id})")
-
-    # Ensure assets directory exists
-    assets_dir = ensure_thumbnail_assets_directory_exists()
-
     # Get the last user message parts
     last_user_message_parts = []
     if llm_request.contents and llm_request.contents[-1].role == "user":
         if llm_request.contents[-1].parts:
             last_user_message_parts = llm_request.contents[-1].parts
 
-    print(f"[Image Callback] User message parts count: {len(last_user_message_parts)}")
-
-    # Process any image parts we found
-    image_count = 0
+    user_assets: Optional[Dict[str, Dict]] = None
+    workspace = assets_dir = None
+    new_assets = []
 
     for part in last_user_message_parts:
-        # Debug info
-        print(f"[Image Callback] Examining part type: {type(part)}")
-
         # Make sure it's an image with mime type and data
         if not hasattr(part, "inline_data") or not part.inline_data:
             continue
@@ -76,31 +57,105 @@ def before_model_callback(
         if not image_data:
             continue
 
-        # We have an image to save
-        image_count += 1
-        print(f"[Image Callback] Found image #{image_count}")
+        if user_assets is None:
+            user_assets = dict(callback_context.state.get("user_assets", {}))
+            # Resolve this session's assets directory
+            workspace = get_workspace(callback_context)
+            assets_dir = workspace.assets
+
+        # Skip images that are already stored or queued for writing
+        digest = hashlib.sha256(image_data).hexdigest()
+        known = user_assets.get(digest)
+        if known and (
+            os.path.exists(known["path"]) or is_asset_write_pending(known["path"])
+        ):
+            continue
 
         # Get the file extension from mime type
         extension = mime_type.split("/")[-1]
         if extension == "jpeg":
             extension = "jpg"
 
-        # Generate simple sequential filename
-        image_name = f"user_asset_{image_count}.{extension}"
+        # Name the file after its contents so the same image maps to one file
+        image_name = f"user_asset_{digest[:12]}.{extension}"
         image_path = os.path.join(assets_dir, image_name)
+        if not os.path.exists(image_path):
+            submit_asset_write(image_data, image_path, workspace.session_id, digest)
+
+        user_assets[digest] = {
+            "filename": image_name,
+            "path": image_path,
+            "mime_type": mime_type,
+            "size_bytes": len(image_data),
+            "ingested_at": time.time(),
+        }
+        new_assets.append(image_name)
+
+    if new_assets:
+        callback_context.state["user_assets"] = user_assets
+        logger.info(
+            "Queued %d new asset(s) for %s: %s",
+            len(new_assets),
+            callback_context.agent_name,
+            ", ".join(new_assets),
+        )
 
-        # Save the image
-        try:
-            print(f"[Image Callback] Saving image to: {image_path}")
-            with open(image_path, "wb") as f:
-                f.write(image_data)
-            print(f"[Image Callback] Saved image: {image_name}")
-        except Exception as e:
-            print(f"[Image Callback] Error saving image: {str(e)}")
+    # Continue with normal execution
+    return None
 
-    # Log the total number of images processed
-    if image_count > 0:
-        print(f"[Image Callback] Saved {image_count} images to {assets_dir}")
 
-    # Continue with normal execution
+def resolve_state_blobs_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Callback that executes before the model is called.
+    Replaces the blob handles that instruction templates pulled in from state
+    with the text they refer to, so the model sees the full values while
+    session state only holds the handles.
+
+    Args:
+        callback_context: The callback context
+        llm_request: The LLM request
+
+    Returns:
+        Optional[LlmResponse]: None to allow normal processing
+    """
+    instruction = llm_request.config.system_instruction
+    if isinstance(instruction, str):
+        llm_request.config.system_instruction = resolve_blob_handles_in_text(
+            instruction
+        )
     return None
+
+
+def save_output_to_blob_store(state_key: str) -> Callable:
+    """
+    Build an after-model callback that saves the agent's final reply to state.
+
+    This replaces an agent's output_key for replies that can be large: the
+    reply goes to the blob store and only its handle is written to
+    state[state_key]. Replies below the blob size threshold are stored inline.
+    The callback runs on the event loop, so the blob is written on the blob
+    store's background writer; the handle resolves before the write lands.
+
+    Args:
+        state_key: The state key to save the reply under
+
+    Returns:
+        Callable: The after-model callback
+    """
+
+    def after_model_callback(
+        callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        content = llm_response.content
+        if llm_response.partial or not content or not content.parts:
+            return None
+        if any(part.function_call for part in content.parts):
+            return None
+
+        text = "".join(part.text or "" for part in content.parts)
+        callback_context.state[state_key] = submit_blob_write(text)
+        return None
+
+    return after_model_callback
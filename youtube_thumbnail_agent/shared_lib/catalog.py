@@ -0,0 +1,267 @@
+"""
+SQLite catalog of the images written by the agents.
+
+Each row records an image's path, session, role, content hash, dimensions and
+size. Writers update the catalog as they create files, so listing and asset
+selection are indexed queries instead of directory scans.
+
+Roles used by the agents:
+- "reference": thumbnails scraped from a channel
+- "asset": images uploaded by the user
+- "render": one generated render
+- "thumbnail": the session's current thumbnail
+- "export": delivery-ready exports and their previews
+"""
+
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from ..constants import IMAGE_CATALOG_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    sha256 TEXT,
+    width INTEGER,
+    height INTEGER,
+    size_bytes INTEGER,
+    mime_type TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_by_session_role
+    ON images (session_id, role, created_at);
+CREATE INDEX IF NOT EXISTS images_by_hash ON images (sha256);
+"""
+
+_COLUMNS = (
+    "path",
+    "session_id",
+    "role",
+    "filename",
+    "sha256",
+    "width",
+    "height",
+    "size_bytes",
+    "mime_type",
+    "created_at",
+)
+
+_ORDERINGS = {
+    "newest": "created_at DESC, path",
+    "oldest": "created_at ASC, path",
+    "filename": "filename ASC, path",
+}
+
+_MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    """Return this thread's connection to the catalog, opening it on first use."""
+    connection = getattr(_local, "connection", None)
+    if connection is None:
+        os.makedirs(os.path.dirname(IMAGE_CATALOG_PATH) or ".", exist_ok=True)
+        connection = sqlite3.connect(IMAGE_CATALOG_PATH, timeout=30)
+        connection.row_factory = sqlite3.Row
+        # WAL lets readers keep going while a writer commits
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        _local.connection = connection
+    return connection
+
+
+def _normalize_path(path: str) -> str:
+    return os.path.normpath(path)
+
+
+def record_image(
+    path: str,
+    role: str,
+    session_id: str,
+    data: Optional[bytes] = None,
+    sha256: Optional[str] = None,
+) -> Dict:
+    """
+    Add or update the catalog entry for an image file.
+
+    Only the image header is decoded to read its dimensions.
+
+    Args:
+        path: Path of the image file
+        role: What the image is used for (see the module docstring)
+        session_id: The session the image belongs to
+        data: The file contents, if already in memory, to avoid re-reading it
+        sha256: The contents' hex digest, if already known
+
+    Returns:
+        Dict: The catalog entry
+    """
+    if data is None and sha256 is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+    elif sha256 is None:
+        sha256 = hashlib.sha256(data).hexdigest()
+
+    width = height = mime_type = None
+    try:
+        with Image.open(io.BytesIO(data) if data is not None else path) as image:
+            width, height = image.size
+            mime_type = _MIME_TYPES.get(image.format)
+    except OSError:
+        pass
+
+    entry = {
+        "path": _normalize_path(path),
+        "session_id": session_id,
+        "role": role,
+        "filename": os.path.basename(path),
+        "sha256": sha256,
+        "width": width,
+        "height": height,
+        "size_bytes": len(data) if data is not None else os.path.getsize(path),
+        "mime_type": mime_type,
+        "created_at": time.time(),
+    }
+    connection = _connection()
+    with connection:
+        connection.execute(
+            f"INSERT OR REPLACE INTO images ({', '.join(_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+            [entry[column] for column in _COLUMNS],
+        )
+    return entry
+
+
+def remove_image(path: str) -> bool:
+    """
+    Remove the catalog entry for an image file.
+
+    Args:
+        path: Path of the image file
+
+    Returns:
+        bool: True if an entry was removed
+    """
+    connection = _connection()
+    with connection:
+        cursor = connection.execute(
+            "DELETE FROM images WHERE path = ?", (_normalize_path(path),)
+        )
+    return cursor.rowcount > 0
+
+
+def remove_images_under(directory: str) -> int:
+    """
+    Remove the catalog entries for every image inside a directory.
+
+    Args:
+        directory: The directory, e.g. a session workspace being deleted
+
+    Returns:
+        int: Number of entries removed
+    """
+    prefix = _normalize_path(directory) + os.sep
+    connection = _connection()
+    with connection:
+        cursor = connection.execute(
+            "DELETE FROM images WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+        )
+    return cursor.rowcount
+
+
+def _where(
+    session_id: Optional[str],
+    role: Optional[str],
+    sha256: Optional[str],
+    width: Optional[int],
+    height: Optional[int],
+    filename: Optional[str] = None,
+):
+    filters = {
+        "session_id": session_id,
+        "role": role,
+        "sha256": sha256,
+        "width": width,
+        "height": height,
+        "filename": filename,
+    }
+    clauses = [f"{column} = ?" for column, value in filters.items() if value]
+    values = [value for value in filters.values() if value]
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", values
+
+
+def query_images(
+    session_id: Optional[str] = None,
+    role: Optional[str] = None,
+    sha256: Optional[str] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    filename: Optional[str] = None,
+    order: str = "newest",
+    limit: Optional[int] = 50,
+    offset: int = 0,
+) -> List[Dict]:
+    """
+    Query catalog entries, filtered and paginated.
+
+    Args:
+        session_id: Only images from this session
+        role: Only images with this role
+        sha256: Only images with this content hash
+        width: Only images this many pixels wide
+        height: Only images this many pixels high
+        filename: Only images with this file name
+        order: "newest", "oldest" or "filename"
+        limit: Maximum number of entries to return, or None for all
+        offset: Number of matching entries to skip
+
+    Returns:
+        List[Dict]: Matching catalog entries
+    """
+    if order not in _ORDERINGS:
+        raise ValueError(f"Unknown order '{order}'. Use one of {list(_ORDERINGS)}.")
+    where, values = _where(session_id, role, sha256, width, height, filename)
+    rows = _connection().execute(
+        f"SELECT * FROM images{where} ORDER BY {_ORDERINGS[order]} LIMIT ? OFFSET ?",
+        values + [limit if limit is not None else -1, offset],
+    )
+    return [dict(row) for row in rows]
+
+
+def count_images(
+    session_id: Optional[str] = None,
+    role: Optional[str] = None,
+    sha256: Optional[str] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    filename: Optional[str] = None,
+) -> int:
+    """
+    Count catalog entries matching the same filters as query_images.
+
+    Returns:
+        int: Number of matching entries
+    """
+    where, values = _where(session_id, role, sha256, width, height, filename)
+    row = _connection().execute(f"SELECT COUNT(*) FROM images{where}", values)
+    return row.fetchone()[0]
@@ -0,0 +1,477 @@
+"""
+Durable checkpoints of a channel's scrape, analyses, style guide and prompts.
+
+A run that dies part way (during the fourth of five analyses, or while the
+style guide is being written) would otherwise start over from scraping. Each
+completed step is written to CHECKPOINT_DIR/<channel>/checkpoint.json as soon
+as it finishes, and the next run for the same channel picks up from there:
+
+- scrape: the scraped thumbnails, linked into the checkpoint directory and
+  listed in order; reused for CHECKPOINT_SCRAPE_TTL_SECONDS, after which the
+  channel is scraped again to pick up new videos
+- analyses: keyed by the SHA-256 of the thumbnail image, so an analysis is
+  reused for the same image even after a fresh scrape renumbers the files
+- style guides: every version written for the channel (see style_guides.py)
+- prompts: keyed by the request they were written for (title, summary and
+  assets) and reused with the same style guide. Only batch runs set
+  state["prompt_request"] to identify a request; an interactive chat has no
+  structured request, so its prompts are neither checkpointed nor restored
+
+A channel is keyed by its channel ID once the scraper has resolved its handle
+(see record_channel_alias), so "@handle" and "UC..." share one checkpoint,
+style guide history and style index entry.
+
+Large values are kept as blob handles, which stay valid because the blob
+store is on disk as well. Checkpoint writes also start, at most once per
+_BLOB_SWEEP_INTERVAL_SECONDS, a background cleanup of the blobs that no
+checkpoint or style index entry refers to. Checkpoints are best effort: a
+failed write is logged and the run carries on.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from ..constants import (
+    CHECKPOINT_DIR,
+    CHECKPOINT_SCRAPE_TTL_SECONDS,
+    STATE_BLOB_TTL_SECONDS,
+)
+from .blob_store import blob_digests, blob_handle, cleanup_unreferenced_blobs, put_blob
+from .catalog import record_image
+from .file_io import link_atomic, write_bytes_atomic
+from .generation_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Serializes read-modify-write updates of checkpoint files in this process
+_lock = threading.Lock()
+
+# Channel ID by lowercased handle, cached from CHECKPOINT_DIR/channel_aliases.json
+_aliases: Dict[str, str] = {}
+_aliases_mtime: Optional[float] = None
+_aliases_lock = threading.Lock()
+
+# How often the unreferenced blob cleanup runs at most
+_BLOB_SWEEP_INTERVAL_SECONDS = 60 * 60
+_last_blob_sweep = 0.0
+_blob_sweep_lock = threading.Lock()
+
+
+def _aliases_path() -> str:
+    return os.path.join(CHECKPOINT_DIR, "channel_aliases.json")
+
+
+def _load_aliases() -> Dict[str, str]:
+    global _aliases, _aliases_mtime
+    try:
+        mtime = os.path.getmtime(_aliases_path())
+    except OSError:
+        mtime = None
+    with _aliases_lock:
+        if mtime != _aliases_mtime:
+            try:
+                with open(_aliases_path(), encoding="utf-8") as f:
+                    _aliases = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                if mtime is not None:
+                    logger.warning("Ignoring unreadable channel aliases: %s", e)
+                _aliases = {}
+            _aliases_mtime = mtime
+        return _aliases
+
+
+def channel_aliases() -> Dict[str, str]:
+    """
+    Get the channel IDs that handles resolve to.
+
+    Returns:
+        Dict[str, str]: Channel ID by lowercased handle; a new dict replaces
+            it whenever the aliases change, so treat it as read-only
+    """
+    return _load_aliases()
+
+
+def record_channel_alias(handle: str, channel_id: str) -> None:
+    """
+    Remember the channel ID a handle resolves to, so both get the same key.
+
+    A checkpoint kept under the handle so far is moved to the channel ID.
+
+    Args:
+        handle: Channel handle, starting with "@"
+        channel_id: The channel ID the handle resolved to
+    """
+    handle = handle.strip().lower()
+    aliases = _load_aliases()
+    if not handle.startswith("@") or aliases.get(handle) == channel_id:
+        return
+    try:
+        with _lock:
+            old_dir = None if handle in aliases else _channel_dir(handle)
+            write_bytes_atomic(
+                json.dumps({**aliases, handle: channel_id}, indent=2).encode("utf-8"),
+                _aliases_path(),
+            )
+            new_dir = _channel_dir(channel_id)
+            if old_dir and os.path.isdir(old_dir) and not os.path.exists(new_dir):
+                os.replace(old_dir, new_dir)
+    except OSError as e:
+        logger.warning("Could not record the channel ID of %s: %s", handle, e)
+
+
+def channel_key(channel: str) -> str:
+    """
+    Normalize a channel ID or handle into a key safe to use as a file name.
+
+    Handles that record_channel_alias has seen resolve to their channel ID.
+
+    Args:
+        channel: Channel ID or handle
+
+    Returns:
+        str: The key
+    """
+    key = channel.strip()
+    if key.startswith("@"):
+        # Handles are case-insensitive; channel IDs are not
+        key = key.lower()
+        key = _load_aliases().get(key, key)
+    return re.sub(r"[^A-Za-z0-9@_-]", "_", key)
+
+
+def _channel_dir(channel: str) -> str:
+    return os.path.join(CHECKPOINT_DIR, channel_key(channel))
+
+
+def _checkpoint_path(channel: str) -> str:
+    return os.path.join(_channel_dir(channel), "checkpoint.json")
+
+
+def _thumbnail_path(channel: str, digest: str) -> str:
+    return os.path.join(_channel_dir(channel), "thumbnails", f"{digest}.jpg")
+
+
+def checkpointed_thumbnail(channel: str, digest: str) -> Optional[str]:
+    """
+    Find the copy of a thumbnail kept with a channel's scrape checkpoint.
+
+    Args:
+        channel: Channel ID or handle
+        digest: SHA-256 of the thumbnail image
+
+    Returns:
+        Optional[str]: Path of the copy, or None if there is none
+    """
+    path = _thumbnail_path(channel, digest)
+    return path if os.path.exists(path) else None
+
+
+def load_checkpoint(channel: str) -> Dict:
+    """
+    Read a channel's checkpoint.
+
+    Args:
+        channel: Channel ID or handle
+
+    Returns:
+        Dict: The checkpoint, or an empty dict if there is none
+    """
+    try:
+        with open(_checkpoint_path(channel), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("Ignoring unreadable checkpoint for %s: %s", channel, e)
+        return {}
+
+
+def update_checkpoint(channel: str, update: Callable[[Dict], None]) -> None:
+    """
+    Apply an update to a channel's checkpoint and write it back atomically.
+
+    Args:
+        channel: Channel ID or handle
+        update: Function that modifies the checkpoint dict in place
+    """
+    try:
+        with _lock:
+            checkpoint = load_checkpoint(channel)
+            checkpoint["channel"] = channel
+            update(checkpoint)
+            checkpoint["updated_at"] = time.time()
+            write_bytes_atomic(
+                json.dumps(checkpoint, indent=2).encode("utf-8"),
+                _checkpoint_path(channel),
+            )
+    except OSError as e:
+        logger.warning("Could not write the checkpoint for %s: %s", channel, e)
+    _maybe_sweep_state_blobs()
+
+
+def cleanup_state_blobs(max_age_seconds: float = STATE_BLOB_TTL_SECONDS) -> int:
+    """
+    Delete state blobs that no checkpoint or style index entry refers to.
+
+    Args:
+        max_age_seconds: Age after which an unreferenced blob is deleted
+
+    Returns:
+        int: Number of blobs deleted
+    """
+    # Imported here: the style index imports this module, and NumPy with it
+    from .style_index import load_style_index
+
+    referenced = set()
+    for root, _, files in os.walk(CHECKPOINT_DIR):
+        if "checkpoint.json" in files:
+            try:
+                with open(os.path.join(root, "checkpoint.json"), encoding="utf-8") as f:
+                    referenced |= blob_digests(f.read())
+            except OSError as e:
+                # Without all references, deleting anything could break a checkpoint
+                logger.warning("Skipping blob cleanup, unreadable checkpoint: %s", e)
+                return 0
+    referenced |= blob_digests(json.dumps(load_style_index().entries))
+    return cleanup_unreferenced_blobs(referenced, max_age_seconds)
+
+
+def _maybe_sweep_state_blobs() -> None:
+    global _last_blob_sweep
+    with _blob_sweep_lock:
+        now = time.time()
+        if now - _last_blob_sweep < _BLOB_SWEEP_INTERVAL_SECONDS:
+            return
+        _last_blob_sweep = now
+    # Checkpoints are written from agent callbacks; keep the scan off their thread
+    threading.Thread(
+        target=cleanup_state_blobs, name="state-blob-cleanup", daemon=True
+    ).start()
+
+
+def checkpoint_scrape(channel: str, thumbnail_paths: List[str]) -> None:
+    """
+    Record a completed scrape, keeping a copy of each thumbnail.
+
+    Args:
+        channel: Channel ID or handle
+        thumbnail_paths: Paths of the scraped thumbnails, in order
+    """
+    try:
+        thumbnails = {}
+        for path in thumbnail_paths:
+            digest = hash_file(path)
+            link_atomic(path, _thumbnail_path(channel, digest))
+            thumbnails[os.path.basename(path)] = digest
+    except OSError as e:
+        logger.warning("Could not checkpoint the scrape of %s: %s", channel, e)
+        return
+
+    def update(checkpoint: Dict) -> None:
+        checkpoint["scrape"] = {"thumbnails": thumbnails, "completed_at": time.time()}
+
+    update_checkpoint(channel, update)
+
+
+def is_scrape_fresh(
+    channel: str, max_age_seconds: float = CHECKPOINT_SCRAPE_TTL_SECONDS
+) -> bool:
+    """
+    Whether a channel has a checkpointed scrape recent enough to restore.
+
+    Args:
+        channel: Channel ID or handle
+        max_age_seconds: Oldest scrape that counts as fresh
+
+    Returns:
+        bool: True if the last completed scrape is at most max_age_seconds old
+    """
+    scrape = load_checkpoint(channel).get("scrape")
+    return bool(scrape) and time.time() - scrape["completed_at"] <= max_age_seconds
+
+
+def restore_scrape(
+    channel: str,
+    ref_dir: str,
+    session_id: Optional[str] = None,
+    max_age_seconds: Optional[float] = CHECKPOINT_SCRAPE_TTL_SECONDS,
+) -> Optional[List[str]]:
+    """
+    Put a channel's checkpointed thumbnails in a reference images directory.
+
+    Args:
+        channel: Channel ID or handle
+        ref_dir: Directory to link the thumbnails into
+        session_id: Session to record the thumbnails under in the catalog
+        max_age_seconds: Oldest scrape to restore; None for any age
+
+    Returns:
+        Optional[List[str]]: The thumbnail filenames, in order, or None if
+            there is no recent enough complete scrape to restore
+    """
+    scrape = load_checkpoint(channel).get("scrape")
+    if not scrape or (
+        max_age_seconds is not None
+        and time.time() - scrape["completed_at"] > max_age_seconds
+    ):
+        return None
+
+    thumbnails = scrape["thumbnails"]
+    try:
+        for filename, digest in thumbnails.items():
+            path = os.path.join(ref_dir, filename)
+            link_atomic(_thumbnail_path(channel, digest), path)
+            if session_id:
+                record_image(path, "reference", session_id)
+    except OSError as e:
+        logger.warning("Could not restore the scrape of %s: %s", channel, e)
+        return None
+    logger.info("Restored %d thumbnails of %s", len(thumbnails), channel)
+    return list(thumbnails)
+
+
+def checkpoint_analysis(channel: str, image_path: str, analysis: str) -> None:
+    """
+    Record the analysis of one thumbnail.
+
+    Args:
+        channel: Channel ID or handle
+        image_path: Path of the analyzed thumbnail
+        analysis: The analysis text, or its blob handle
+    """
+    try:
+        digest = hash_file(image_path)
+    except OSError as e:
+        logger.warning("Could not checkpoint the analysis of %s: %s", image_path, e)
+        return
+
+    def update(checkpoint: Dict) -> None:
+        checkpoint.setdefault("analyses", {})[digest] = put_blob(analysis)
+
+    update_checkpoint(channel, update)
+
+
+def restore_analyses(
+    channel: str, ref_dir: str, filenames: List[str]
+) -> Dict[str, str]:
+    """
+    Look up the checkpointed analyses of a set of thumbnails.
+
+    Args:
+        channel: Channel ID or handle
+        ref_dir: Directory holding the thumbnails
+        filenames: Thumbnail filenames
+
+    Returns:
+        Dict[str, str]: Analysis (or blob handle) by filename, "" for
+            thumbnails that have not been analyzed yet
+    """
+    checkpointed = load_checkpoint(channel).get("analyses", {})
+    analyses = {}
+    for filename in filenames:
+        try:
+            digest = hash_file(os.path.join(ref_dir, filename))
+        except OSError:
+            digest = None
+        analyses[filename] = checkpointed.get(digest, "")
+    return analyses
+
+
+def prompt_request_key(title: str, summary: str, asset_paths: List[str]) -> str:
+    """
+    Identify a prompt request by its title, summary and asset images.
+
+    Args:
+        title: Video title
+        summary: Video summary
+        asset_paths: Paths of the attached asset images
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    material = [title, summary, [hash_file(path) for path in asset_paths]]
+    return hashlib.sha256(json.dumps(material).encode("utf-8")).hexdigest()
+
+
+def checkpoint_prompt(
+    channel: str, request_key: str, prompt: str, style_guide: str
+) -> None:
+    """
+    Record the prompt written for a request.
+
+    Args:
+        channel: Channel ID or handle
+        request_key: Key from prompt_request_key
+        prompt: The prompt, or its blob handle
+        style_guide: The style guide (or blob handle) the prompt follows
+    """
+
+    def update(checkpoint: Dict) -> None:
+        checkpoint.setdefault("prompts", {})[request_key] = {
+            "value": put_blob(prompt),
+            "style_guide": put_blob(style_guide),
+            "saved_at": time.time(),
+        }
+
+    update_checkpoint(channel, update)
+
+
+def restore_prompt(channel: str, request_key: str, style_guide: str) -> Optional[str]:
+    """
+    Find the checkpointed prompt for a request and style guide.
+
+    Args:
+        channel: Channel ID or handle
+        request_key: Key from prompt_request_key
+        style_guide: The current style guide, or its blob handle
+
+    Returns:
+        Optional[str]: The prompt (or its blob handle), or None
+    """
+    saved = load_checkpoint(channel).get("prompts", {}).get(request_key)
+    if saved and saved["style_guide"] == blob_handle(style_guide):
+        return saved["value"]
+    return None
+
+
+def _skip(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def restore_prompt_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """
+    Callback that executes before the prompt generator runs.
+    When state["prompt_request"] identifies the request (batch runs set it),
+    skips the agent if a prompt for that request and the current style guide
+    was checkpointed, and restores it to state instead.
+
+    Args:
+        callback_context: The callback context
+
+    Returns:
+        Optional[types.Content]: A note about the restored prompt to skip
+            the agent, or None to run it
+    """
+    state = callback_context.state
+    channel = state.get("channel")
+    request_key = state.get("prompt_request")
+    if not channel or not request_key or not state.get("style_guide"):
+        return None
+    prompt = restore_prompt(channel, request_key, state["style_guide"])
+    if prompt is None:
+        return None
+
+    state["prompt"] = prompt
+    logger.info("Restored the checkpointed prompt for %s", request_key[:12])
+    return _skip("Restored the prompt from the last run's checkpoint.")
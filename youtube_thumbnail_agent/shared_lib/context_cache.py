@@ -0,0 +1,305 @@
+"""
+Provider-side context caching for long, reused agent instructions.
+
+The prompt generator's system instruction is mostly the channel's style guide
+and thumbnail analyses, and it is the same for every title generated against
+that style. On Gemini, the instruction and the agent's tool declarations are
+uploaded once as a cached content entry, and later requests reference the
+entry instead of sending the whole prefix again.
+
+Entries are keyed by the model, the instruction text and the tools, so a new
+style guide (or any other change to the instruction) gets a new entry, and the
+entry it replaces is deleted once no session uses it. Entries are created and
+deleted on a background thread; requests made before an entry is ready are
+sent uncached, with the same stable prefix, so the provider's implicit cache
+can still match them.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.google_llm import Gemini
+
+from ..constants import (
+    CONTEXT_CACHE_MIN_TOKENS,
+    CONTEXT_CACHE_RETRY_SECONDS,
+    CONTEXT_CACHE_TTL_SECONDS,
+)
+from .metrics import estimate_tokens
+from .workspace import get_session_id
+
+logger = logging.getLogger(__name__)
+
+# Stop using an entry this long before it expires, so requests never race expiry
+_EXPIRY_MARGIN_SECONDS = 60
+
+_executor: Optional[ThreadPoolExecutor] = None
+_client = None
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "creates": 0, "failures": 0, "deletes": 0}
+
+
+class _CacheEntry:
+    """A cached content entry, or one that is being created."""
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.expires_at = 0.0
+        self.retry_at = 0.0
+        self.pending = True
+        self.sessions: Set[str] = set()
+        # What the entry holds, to rebuild requests sent to another model
+        self.fields: Dict = {}
+
+
+_entries: Dict[str, _CacheEntry] = {}
+# The entry each session's agents last used, keyed by "<session>/<agent>"
+_current: Dict[str, str] = {}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="context-cache"
+        )
+    return _executor
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        from google.genai import Client
+
+        _client = Client()
+    return _client
+
+
+def _is_gemini(model: Optional[str]) -> bool:
+    return bool(model) and any(
+        re.fullmatch(pattern, model) for pattern in Gemini.supported_models()
+    )
+
+
+def _cache_key(llm_request: LlmRequest) -> str:
+    config = llm_request.config
+    material = {
+        "model": llm_request.model,
+        "system_instruction": config.system_instruction,
+        "tools": [tool.model_dump(exclude_none=True) for tool in config.tools or []],
+        "tool_config": (
+            config.tool_config.model_dump(exclude_none=True)
+            if config.tool_config
+            else None
+        ),
+    }
+    encoded = json.dumps(material, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _create_entry(key: str, agent_name: str, model: str, **cached_fields) -> None:
+    from google.genai import types
+
+    entry = _entries[key]
+    try:
+        cached = _get_client().caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                display_name=f"{agent_name}-{key[:12]}",
+                ttl=f"{CONTEXT_CACHE_TTL_SECONDS}s",
+                **cached_fields,
+            ),
+        )
+    except Exception as e:
+        logger.warning("Could not create a context cache for %s: %s", agent_name, e)
+        with _lock:
+            entry.pending = False
+            entry.retry_at = time.monotonic() + CONTEXT_CACHE_RETRY_SECONDS
+            _stats["failures"] += 1
+        return
+
+    with _lock:
+        entry.name = cached.name
+        entry.expires_at = time.monotonic() + CONTEXT_CACHE_TTL_SECONDS
+        entry.pending = False
+        _stats["creates"] += 1
+        release = not entry.sessions
+    logger.info("Created context cache %s for %s", cached.name, agent_name)
+    if release:
+        # Every session moved on while the entry was being created
+        _release_entry(key)
+
+
+def _delete_entry(name: str) -> None:
+    try:
+        _get_client().caches.delete(name=name)
+    except Exception as e:
+        logger.warning("Could not delete context cache %s: %s", name, e)
+        return
+    with _lock:
+        _stats["deletes"] += 1
+    logger.info("Deleted context cache %s", name)
+
+
+def _release_entry(key: str) -> None:
+    """Forget an entry no session uses any more and delete it at the provider."""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry.sessions or entry.pending:
+            return
+        del _entries[key]
+    if entry.name and entry.expires_at > time.monotonic():
+        _get_executor().submit(_delete_entry, entry.name)
+
+
+def _track_session(session_key: str, key: str) -> Optional[str]:
+    """Point a session's agent at an entry; return the key it left, if any."""
+    previous = _current.get(session_key)
+    _current[session_key] = key
+    _entries[key].sessions.add(session_key)
+    if previous is None or previous == key or previous not in _entries:
+        return None
+    _entries[previous].sessions.discard(session_key)
+    return previous
+
+
+def _prune_expired(now: float) -> None:
+    """Drop expired entries and the sessions that pointed at them. Hold _lock."""
+    for key in [
+        key
+        for key, entry in _entries.items()
+        if not entry.pending and entry.name and entry.expires_at <= now
+    ]:
+        del _entries[key]
+    for session_key in [
+        session_key for session_key, key in _current.items() if key not in _entries
+    ]:
+        del _current[session_key]
+
+
+def context_cache_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    Callback that executes before the model is called.
+    Sends the system instruction and tools as a cached content reference when
+    a cache entry for them is ready, and starts creating one when there is
+    none. Only Gemini models with instructions of at least
+    CONTEXT_CACHE_MIN_TOKENS estimated tokens are cached.
+
+    Run it after any callback that rewrites the system instruction.
+
+    Args:
+        callback_context: The callback context
+        llm_request: The LLM request
+
+    Returns:
+        Optional[LlmResponse]: None to allow normal processing
+    """
+    config = llm_request.config
+    instruction = config.system_instruction
+    if (
+        not _is_gemini(llm_request.model)
+        or not isinstance(instruction, str)
+        or estimate_tokens(instruction) < CONTEXT_CACHE_MIN_TOKENS
+        or config.cached_content
+    ):
+        return None
+
+    key = _cache_key(llm_request)
+    session_key = f"{get_session_id(callback_context)}/{callback_context.agent_name}"
+    now = time.monotonic()
+    create = False
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and not entry.pending:
+            if entry.name and entry.expires_at - _EXPIRY_MARGIN_SECONDS <= now:
+                # Expired at the provider; start over with a new entry
+                del _entries[key]
+                entry = None
+            elif not entry.name and entry.retry_at <= now:
+                entry.pending = create = True
+        if entry is None:
+            _prune_expired(now)
+            entry = _entries[key] = _CacheEntry()
+            create = True
+        replaced = _track_session(session_key, key)
+
+        name = entry.name if not entry.pending else None
+        _stats["hits" if name else "misses"] += 1
+
+    if create:
+        entry.fields = {
+            "system_instruction": instruction,
+            "tools": list(config.tools or []) or None,
+            "tool_config": config.tool_config,
+        }
+        _get_executor().submit(
+            _create_entry,
+            key,
+            callback_context.agent_name,
+            llm_request.model,
+            **entry.fields,
+        )
+    if replaced:
+        _release_entry(replaced)
+
+    if name:
+        # The cached entry already holds these; the API rejects them alongside it
+        config.cached_content = name
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+    return None
+
+
+def restore_cached_context(llm_request: LlmRequest) -> None:
+    """
+    Put the cached instruction and tools back into a request that references a cache.
+
+    Cached contents belong to the model they were created for, so a request
+    retried on another model has to carry its context inline again.
+
+    Args:
+        llm_request: The request to rewrite in place
+    """
+    config = llm_request.config
+    name = config.cached_content if config else None
+    if not name:
+        return
+    with _lock:
+        fields = next(
+            (entry.fields for entry in _entries.values() if entry.name == name), None
+        )
+    if fields is None:
+        raise LookupError(f"Context cache {name} is no longer known")
+
+    config.cached_content = None
+    config.system_instruction = fields["system_instruction"]
+    config.tools = fields["tools"]
+    config.tool_config = fields["tool_config"]
+
+
+def get_context_cache_stats() -> Dict:
+    """
+    Report how often requests were served from a context cache in this process.
+
+    Returns:
+        dict: Hit/miss counters, hit rate, entries created, failed and
+            deleted, and the number of live entries
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = sum(1 for entry in _entries.values() if entry.name)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
@@ -0,0 +1,44 @@
+"""
+Deferred loading of the .env file.
+
+The ADK CLI loads the agent's .env before importing it. Code that reads API
+keys outside the CLI calls get_env(), which loads .env once on first use
+instead of at import time.
+"""
+
+import os
+import threading
+from typing import Optional
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_environment() -> None:
+    """Load variables from the nearest .env file, once per process."""
+    global _loaded
+    with _lock:
+        if _loaded:
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _loaded = True
+
+
+def get_env(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Read an environment variable, loading .env first if it isn't set.
+
+    Args:
+        name: The variable name
+        default: Value to return if the variable isn't set anywhere
+
+    Returns:
+        Optional[str]: The variable's value, or default
+    """
+    value = os.environ.get(name)
+    if value is None and not _loaded:
+        load_environment()
+        value = os.environ.get(name)
+    return value if value is not None else default
@@ -0,0 +1,115 @@
+"""
+Atomic, single-write file helpers for generated images.
+"""
+
+import base64
+import os
+import shutil
+import threading
+
+# Base64 characters decoded per write; a multiple of 4 so chunks decode cleanly
+_BASE64_CHUNK_CHARS = 4 * 64 * 1024
+
+
+def _temp_path(path: str) -> str:
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def write_base64_atomic(image_base64: str, path: str) -> int:
+    """
+    Decode a base64 payload straight into a file and atomically move it into place.
+
+    The payload is decoded chunk by chunk, so the full decoded image is never
+    held in memory alongside the base64 string.
+
+    Args:
+        image_base64: Base64-encoded file contents
+        path: Destination path
+
+    Returns:
+        int: Number of bytes written
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = _temp_path(path)
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for start in range(0, len(image_base64), _BASE64_CHUNK_CHARS):
+                chunk = base64.b64decode(
+                    image_base64[start : start + _BASE64_CHUNK_CHARS]
+                )
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+
+def write_bytes_atomic(data: bytes, path: str) -> None:
+    """
+    Write bytes to a temporary file and atomically move it into place.
+
+    Args:
+        data: File contents
+        path: Destination path
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def link_atomic(source_path: str, path: str) -> None:
+    """
+    Make path refer to the same file as source_path without rewriting its data.
+
+    A hard link is used when possible; otherwise (e.g. across filesystems) the
+    file is copied. Either way the destination is replaced atomically.
+
+    Args:
+        source_path: Existing file
+        path: Destination path
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = _temp_path(path)
+    try:
+        os.link(source_path, tmp_path)
+    except OSError:
+        shutil.copyfile(source_path, tmp_path)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def copy_atomic(source_path: str, path: str) -> None:
+    """
+    Copy a file and atomically move the copy into place.
+
+    Unlike link_atomic, the destination is a separate file, so changing one
+    never changes the other.
+
+    Args:
+        source_path: Existing file
+        path: Destination path
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = _temp_path(path)
+    try:
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,231 @@
+"""
+Content-addressed cache for generated thumbnail images.
+
+Entries are keyed by the normalized prompt, the hashes of every input image,
+the image model and the requested size, so identical generation requests can
+be served from disk instead of calling the paid image API again.
+
+Entries are copied in and out of the cache rather than linked, so a render
+changed after it was stored never changes the cached image, or the reverse.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ..constants import GENERATION_CACHE_DIR, GENERATION_CACHE_MAX_BYTES
+from .file_io import copy_atomic
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+# Entries and bytes on disk: counted on first use, then kept as running totals
+_disk: Optional[Dict[str, int]] = None
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt for cache keying by collapsing whitespace.
+
+    Case is preserved because it changes the text rendered in the thumbnail.
+    """
+    return " ".join(prompt.split())
+
+
+def hash_file(path: str) -> str:
+    """
+    Compute the SHA-256 hex digest of a file without loading it all at once.
+
+    Args:
+        path: Path to the file to hash
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(
+    prompt: str,
+    input_paths: List[str],
+    model: str,
+    size: str,
+    **params,
+) -> str:
+    """
+    Build the cache key for a generation request.
+
+    Args:
+        prompt: The prompt sent to the image API
+        input_paths: Input images in the order they are sent to the API
+        model: The image model name
+        size: The requested image size
+        **params: Any other request parameters that change the output
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    key_material = {
+        "prompt": normalize_prompt(prompt),
+        "inputs": [hash_file(path) for path in input_paths],
+        "model": model,
+        "size": size,
+        "params": params,
+    }
+    encoded = json.dumps(key_material, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(GENERATION_CACHE_DIR, key[:2], f"{key}.png")
+
+
+def get_cached_image(key: str, output_path: str) -> bool:
+    """
+    Place a copy of a cached image at output_path and mark it as recently used.
+
+    The entry is copied file to file, so no image data is held in memory.
+
+    Args:
+        key: Cache key from make_cache_key
+        output_path: Where the cached image should appear
+
+    Returns:
+        bool: True on a hit, False on a miss
+    """
+    path = _entry_path(key)
+    try:
+        copy_atomic(path, output_path)
+    except FileNotFoundError:
+        with _stats_lock:
+            _stats["misses"] += 1
+        return False
+
+    # Bump the modification time so eviction treats the entry as recently used
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    with _stats_lock:
+        _stats["hits"] += 1
+    return True
+
+
+def store_cached_image(key: str, image_path: str) -> str:
+    """
+    Store a generated image in the cache and evict old entries if needed.
+
+    Args:
+        key: Cache key from make_cache_key
+        image_path: Path of the generated image
+
+    Returns:
+        str: Path of the cache entry
+    """
+    path = _entry_path(key)
+    with _stats_lock:
+        # Count what is on disk before this entry is added to it
+        _disk_usage()
+    try:
+        replaced_bytes = os.path.getsize(path)
+    except FileNotFoundError:
+        replaced_bytes = None
+    copy_atomic(image_path, path)
+    stored_bytes = os.path.getsize(path)
+
+    with _stats_lock:
+        _stats["stores"] += 1
+        disk = _disk_usage()
+        if replaced_bytes is None:
+            disk["entries"] += 1
+        disk["bytes"] += stored_bytes - (replaced_bytes or 0)
+        over_budget = disk["bytes"] > GENERATION_CACHE_MAX_BYTES
+
+    if over_budget:
+        evict_cache_entries()
+    return path
+
+
+def _scan_entries() -> List[Tuple[float, int, str]]:
+    """Modification time, size and path of every cache entry on disk."""
+    entries = []
+    for root, _, files in os.walk(GENERATION_CACHE_DIR):
+        for name in files:
+            if not name.endswith(".png"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _disk_usage() -> Dict[str, int]:
+    """The running disk totals, counted on first use; hold _stats_lock."""
+    global _disk
+    if _disk is None:
+        entries = _scan_entries()
+        _disk = {"entries": len(entries), "bytes": sum(e[1] for e in entries)}
+    return _disk
+
+
+def evict_cache_entries(max_bytes: int = GENERATION_CACHE_MAX_BYTES) -> int:
+    """
+    Remove least recently used entries until the cache fits within max_bytes.
+
+    Walks the cache directory, so store_cached_image only calls it once the
+    running total is over budget. The totals are recounted from the walk.
+
+    Args:
+        max_bytes: Maximum total size of the cache in bytes
+
+    Returns:
+        int: Number of entries removed
+    """
+    global _disk
+    entries = _scan_entries()
+    total_bytes = sum(size for _, size, _ in entries)
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+        removed += 1
+
+    with _stats_lock:
+        _stats["evictions"] += removed
+        _disk = {"entries": len(entries) - removed, "bytes": total_bytes}
+    return removed
+
+
+def get_cache_stats() -> Dict:
+    """
+    Report cache hit rates for this process along with the on-disk size.
+
+    The size is a running total kept by this process; the cache directory is
+    only walked the first time, and after an eviction.
+
+    Returns:
+        dict: Hit/miss counters, hit rate, entry count and total bytes
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+        disk = dict(_disk_usage())
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["entries"] = disk["entries"]
+    stats["bytes"] = disk["bytes"]
+    return stats
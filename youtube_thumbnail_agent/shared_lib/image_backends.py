@@ -0,0 +1,367 @@
+"""
+Image generation backends used by the thumbnail generation tools.
+
+The OpenAI backend calls the real image API. The local backend renders
+deterministic procedural images with configurable latency and failure
+injection, so the generation path can be load-tested and benchmarked offline.
+
+The backend is chosen with the IMAGE_BACKEND environment variable
+("openai" by default, or "local").
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from ..constants import LOCAL_IMAGE_MODEL, OPENAI_IMAGE_MODEL
+from .env import get_env
+
+
+class ImageBackend(ABC):
+    """Interface for image generation backends."""
+
+    model: str = ""
+
+    @abstractmethod
+    def generate(
+        self,
+        prompt: str,
+        *,
+        size: str,
+        quality: str,
+        images: Optional[List[str]] = None,
+        mask: Optional[bytes] = None,
+        n: int = 1,
+    ) -> List[str]:
+        """
+        Generate images.
+
+        Args:
+            prompt: The prompt to generate an image from
+            size: Output size as "WIDTHxHEIGHT"
+            quality: Render quality ("low", "medium" or "high")
+            images: Reference images to edit from, in order. The first one is the
+                base image when a mask is given.
+            mask: PNG mask whose transparent pixels mark the area to edit
+            n: Number of images to generate
+
+        Returns:
+            List[str]: Base64-encoded PNG data, one entry per image
+
+        Raises:
+            RuntimeError: If the backend cannot produce an image
+        """
+
+    async def agenerate(
+        self,
+        prompt: str,
+        *,
+        size: str,
+        quality: str,
+        images: Optional[List[str]] = None,
+        mask: Optional[bytes] = None,
+        n: int = 1,
+    ) -> List[str]:
+        """
+        Async variant of generate. Takes the same arguments and returns the same result.
+
+        Backends without a native async client run generate on a worker thread so
+        the event loop is never blocked.
+        """
+        return await asyncio.to_thread(
+            self.generate,
+            prompt,
+            size=size,
+            quality=quality,
+            images=images,
+            mask=mask,
+            n=n,
+        )
+
+
+class OpenAIImageBackend(ImageBackend):
+    """Backend that calls OpenAI's image generation and edit endpoints."""
+
+    model = OPENAI_IMAGE_MODEL
+
+    def generate(
+        self,
+        prompt: str,
+        *,
+        size: str,
+        quality: str,
+        images: Optional[List[str]] = None,
+        mask: Optional[bytes] = None,
+        n: int = 1,
+    ) -> List[str]:
+        # Imported on first use; the openai package is slow to import
+        from openai import OpenAI
+
+        client = OpenAI(api_key=_openai_api_key())
+        if not images:
+            # No reference images - use the generate endpoint
+            response = client.images.generate(
+                model=self.model, prompt=prompt, n=n, size=size, quality=quality
+            )
+        else:
+            # OpenAI images.edit requires at least one image
+            image_files = [open(path, "rb") for path in images]
+            try:
+                response = client.images.edit(
+                    model=self.model,
+                    image=image_files if len(image_files) > 1 else image_files[0],
+                    prompt=prompt,
+                    n=n,
+                    size=size,
+                    quality=quality,
+                    **_mask_args(mask),
+                )
+            finally:
+                # Ensure all file handles are closed properly
+                for file in image_files:
+                    file.close()
+        return _payloads_from(response)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        *,
+        size: str,
+        quality: str,
+        images: Optional[List[str]] = None,
+        mask: Optional[bytes] = None,
+        n: int = 1,
+    ) -> List[str]:
+        from openai import AsyncOpenAI
+
+        async with AsyncOpenAI(api_key=_openai_api_key()) as client:
+            if not images:
+                response = await client.images.generate(
+                    model=self.model, prompt=prompt, n=n, size=size, quality=quality
+                )
+            else:
+                # Read the reference images off the event loop
+                image_files = await asyncio.to_thread(_read_image_files, images)
+                response = await client.images.edit(
+                    model=self.model,
+                    image=image_files if len(image_files) > 1 else image_files[0],
+                    prompt=prompt,
+                    n=n,
+                    size=size,
+                    quality=quality,
+                    **_mask_args(mask),
+                )
+        return _payloads_from(response)
+
+
+def _openai_api_key() -> str:
+    # Get API key from environment
+    api_key = get_env("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY not found in environment variables")
+    return api_key
+
+
+def _mask_args(mask: Optional[bytes]) -> dict:
+    return {"mask": ("mask.png", mask, "image/png")} if mask is not None else {}
+
+
+def _read_image_files(paths: List[str]) -> List[Tuple[str, bytes]]:
+    files = []
+    for path in paths:
+        with open(path, "rb") as f:
+            files.append((os.path.basename(path), f.read()))
+    return files
+
+
+def _payloads_from(response) -> List[str]:
+    if not (response and response.data):
+        raise RuntimeError("No data returned from the API")
+    payloads = [item.b64_json for item in response.data if item.b64_json]
+    if not payloads:
+        raise RuntimeError("No image data returned from the API")
+    return payloads
+
+
+class LocalImageBackend(ImageBackend):
+    """
+    Deterministic offline backend that renders procedural images.
+
+    The same request always produces the same image. Latency and failures are
+    simulated, with failures drawn from a seeded generator so a run is
+    reproducible end to end.
+    """
+
+    model = LOCAL_IMAGE_MODEL
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LocalImageBackend":
+        """Build a backend configured from LOCAL_IMAGE_BACKEND_* environment variables."""
+        return cls(
+            latency_seconds=float(get_env("LOCAL_IMAGE_BACKEND_LATENCY", "0")),
+            latency_jitter_seconds=float(
+                get_env("LOCAL_IMAGE_BACKEND_LATENCY_JITTER", "0")
+            ),
+            failure_rate=float(get_env("LOCAL_IMAGE_BACKEND_FAILURE_RATE", "0")),
+            seed=int(get_env("LOCAL_IMAGE_BACKEND_SEED", "0")),
+        )
+
+    def generate(
+        self,
+        prompt: str,
+        *,
+        size: str,
+        quality: str,
+        images: Optional[List[str]] = None,
+        mask: Optional[bytes] = None,
+        n: int = 1,
+    ) -> List[str]:
+        delay, should_fail = self._sample_outcome()
+        if delay > 0:
+            time.sleep(delay)
+        if should_fail:
+            raise RuntimeError("Injected failure from the local image backend")
+        return self._render(prompt, size, quality, images, mask, n)
+
+    async def agenerate(
+        self,
+        prompt: str,
+        *,
+        size: str,
+        quality: str,
+        images: Optional[List[str]] = None,
+        mask: Optional[bytes] = None,
+        n: int = 1,
+    ) -> List[str]:
+        delay, should_fail = self._sample_outcome()
+        if delay > 0:
+            # Simulated latency doesn't occupy a thread, like a real network call
+            await asyncio.sleep(delay)
+        if should_fail:
+            raise RuntimeError("Injected failure from the local image backend")
+        return await asyncio.to_thread(
+            self._render, prompt, size, quality, images, mask, n
+        )
+
+    def _sample_outcome(self) -> Tuple[float, bool]:
+        """Draw this request's simulated latency and whether it fails."""
+        with self.lock:
+            delay = self.latency_seconds + self.random.uniform(
+                0, self.latency_jitter_seconds
+            )
+            should_fail = self.random.random() < self.failure_rate
+        return delay, should_fail
+
+    def _render(
+        self,
+        prompt: str,
+        size: str,
+        quality: str,
+        images: Optional[List[str]],
+        mask: Optional[bytes],
+        n: int,
+    ) -> List[str]:
+        digest = hashlib.sha256()
+        for part in (prompt, size, quality):
+            digest.update(part.encode("utf-8"))
+        for path in images or []:
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        if mask is not None:
+            digest.update(mask)
+        seed = int.from_bytes(digest.digest()[:8], "big")
+
+        width, height = (int(value) for value in size.split("x"))
+        return [
+            _render_procedural_image(seed + index, width, height, images)
+            for index in range(n)
+        ]
+
+
+def _render_procedural_image(
+    seed: int, width: int, height: int, images: Optional[List[str]]
+) -> str:
+    """Render a seeded gradient with shapes, blended over the first reference image."""
+    rng = random.Random(seed)
+    top = tuple(rng.randrange(256) for _ in range(3))
+    bottom = tuple(rng.randrange(256) for _ in range(3))
+
+    gradient = Image.linear_gradient("L").resize((width, height))
+    image = Image.composite(
+        Image.new("RGB", (width, height), bottom),
+        Image.new("RGB", (width, height), top),
+        gradient,
+    )
+
+    if images:
+        try:
+            with Image.open(images[0]) as reference:
+                base = reference.convert("RGB").resize((width, height))
+            image = Image.blend(base, image, 0.35)
+        except OSError:
+            pass
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(3, 7)):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1 = min(width, x0 + rng.randint(width // 10, width // 3))
+        y1 = min(height, y0 + rng.randint(height // 10, height // 3))
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.rectangle((x0, y0, x1, y1), fill=fill)
+        else:
+            draw.ellipse((x0, y0, x1, y1), fill=fill)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+_backend: Optional[ImageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_image_backend() -> ImageBackend:
+    """Return the configured image backend, creating it on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = get_env("IMAGE_BACKEND", "openai").lower()
+            if name == "local":
+                _backend = LocalImageBackend.from_env()
+            elif name == "openai":
+                _backend = OpenAIImageBackend()
+            else:
+                raise ValueError(
+                    f"Unknown IMAGE_BACKEND '{name}'. Use 'openai' or 'local'."
+                )
+        return _backend
+
+
+def set_image_backend(backend: Optional[ImageBackend]) -> None:
+    """Replace the image backend, or reset it to the configured default with None."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,265 @@
+"""
+Local image statistics of thumbnails, computed without a model call.
+
+The pixel primitives here (color bins and histograms, dominant colors, tone
+and the light/dark layout) are shared by the style guide statistics, the style
+index vectors (image_vectors.py) and the style scores (style_score.py).
+
+Importing this module imports NumPy; import it inside the functions that need
+it so the agent tree starts without it.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ..constants import (
+    COLOR_HISTOGRAM_BINS,
+    IMAGE_FEATURE_SIZE,
+    LAYOUT_GRID,
+    PALETTE_COLORS,
+    PALETTE_MERGE_DISTANCE,
+    STYLE_STATS_TOLERANCE,
+)
+
+# Largest distance between two RGB colors
+_MAX_RGB_DISTANCE = (3 * 255**2) ** 0.5
+
+
+def image_pixels(image: Image.Image) -> np.ndarray:
+    """
+    Resize an RGB image to IMAGE_FEATURE_SIZE as an array of floats from 0 to 1.
+
+    Args:
+        image: The image, in RGB mode
+
+    Returns:
+        np.ndarray: Array of shape (height, width, 3)
+    """
+    return np.asarray(image.resize(IMAGE_FEATURE_SIZE), dtype=np.float32) / 255
+
+
+def load_pixels(path: str) -> np.ndarray:
+    """
+    Load an image at IMAGE_FEATURE_SIZE as an RGB array of floats from 0 to 1.
+
+    Args:
+        path: Path to the image
+
+    Returns:
+        np.ndarray: Array of shape (height, width, 3)
+    """
+    with Image.open(path) as image:
+        # JPEG thumbnails can be decoded at a fraction of their size
+        image.draft("RGB", IMAGE_FEATURE_SIZE)
+        return image_pixels(image.convert("RGB"))
+
+
+def color_bins(pixels: np.ndarray) -> np.ndarray:
+    """Index of each pixel's bin among COLOR_HISTOGRAM_BINS**3 RGB bins."""
+    bins = np.minimum(
+        (pixels * COLOR_HISTOGRAM_BINS).astype(np.int64), COLOR_HISTOGRAM_BINS - 1
+    )
+    return (bins[..., 0] * COLOR_HISTOGRAM_BINS + bins[..., 1]) * (
+        COLOR_HISTOGRAM_BINS
+    ) + bins[..., 2]
+
+
+def color_histogram(pixels: np.ndarray) -> np.ndarray:
+    """Share of pixels in each of COLOR_HISTOGRAM_BINS**3 RGB bins."""
+    codes = color_bins(pixels)
+    counts = np.bincount(codes.ravel(), minlength=COLOR_HISTOGRAM_BINS**3)
+    return counts / codes.size
+
+
+def palette(pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the dominant colors of an image.
+
+    Args:
+        pixels: Result of load_pixels
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The mean color (0 to 1) and share of
+            pixels of the PALETTE_COLORS most common color bins, most common
+            first; fewer if fewer bins are used
+    """
+    codes = color_bins(pixels).ravel()
+    flat = pixels.reshape(-1, 3)
+    counts = np.bincount(codes)
+    top = np.argsort(-counts, kind="stable")[:PALETTE_COLORS]
+    top = top[counts[top] > 0]
+    sums = np.stack(
+        [np.bincount(codes, weights=flat[:, channel]) for channel in range(3)], 1
+    )
+    return sums[top] / counts[top, None], counts[top] / codes.size
+
+
+def luminance(pixels: np.ndarray) -> np.ndarray:
+    """Per-pixel luminance from 0 to 1."""
+    return pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def layout_map(pixels: np.ndarray) -> np.ndarray:
+    """Mean luminance over a LAYOUT_GRID (columns, rows) grid, row by row."""
+    columns, rows = LAYOUT_GRID
+    lum = luminance(pixels)
+    height, width = lum.shape
+    cropped = lum[: height - height % rows, : width - width % columns]
+    return cropped.reshape(rows, height // rows, columns, width // columns).mean(
+        axis=(1, 3)
+    )
+
+
+def tone(pixels: np.ndarray) -> np.ndarray:
+    """Brightness, contrast and saturation from 0 to 1."""
+    lum = luminance(pixels)
+    high, low = pixels.max(axis=-1), pixels.min(axis=-1)
+    saturation = np.where(high > 0, (high - low) / np.maximum(high, 1e-6), 0.0)
+    return np.array([lum.mean(), lum.std() * 2, saturation.mean()])
+
+
+def _color_distance(a: List[float], b: List[float]) -> float:
+    """Distance between two RGB colors, from 0 (same) to 1 (black vs white)."""
+    return sum((x - y) ** 2 for x, y in zip(a[:3], b[:3])) ** 0.5 / _MAX_RGB_DISTANCE
+
+
+def _hex(color: List[float]) -> str:
+    return "#" + "".join(f"{round(channel):02x}" for channel in color[:3])
+
+
+def thumbnail_stats(path: str) -> Dict:
+    """
+    Measure a thumbnail's dominant colors, brightness, contrast and saturation.
+
+    Args:
+        path: Path to the image
+
+    Returns:
+        Dict: "palette" as [r, g, b, share] rows, most common first, and
+            "brightness", "contrast" and "saturation" from 0 to 1
+    """
+    pixels = load_pixels(path)
+    colors, shares = palette(pixels)
+    brightness, contrast, saturation = tone(pixels).tolist()
+    return {
+        "palette": [
+            [*(color * 255).tolist(), float(share)]
+            for color, share in zip(colors, shares)
+        ],
+        "brightness": brightness,
+        "contrast": contrast,
+        "saturation": saturation,
+    }
+
+
+def aggregate_stats(stats: List[Dict]) -> Dict:
+    """
+    Combine the statistics of a set of thumbnails.
+
+    Palette colors closer than PALETTE_MERGE_DISTANCE are merged, weighted by
+    their share.
+
+    Args:
+        stats: Results of thumbnail_stats
+
+    Returns:
+        Dict: The merged "palette", most common first, the mean, min and
+            max of "brightness", "contrast" and "saturation", and "count"
+    """
+    merged: List[List[float]] = []
+    for color in sorted(
+        (color for item in stats for color in item["palette"]),
+        key=lambda color: color[3],
+        reverse=True,
+    ):
+        near = next(
+            (
+                group
+                for group in merged
+                if _color_distance(group, color) <= PALETTE_MERGE_DISTANCE
+            ),
+            None,
+        )
+        if near is None:
+            merged.append(list(color))
+            continue
+        total = near[3] + color[3]
+        near[:3] = [
+            (a * near[3] + b * color[3]) / total for a, b in zip(near[:3], color[:3])
+        ]
+        near[3] = total
+
+    aggregate = {
+        "count": len(stats),
+        "palette": [
+            [*color[:3], color[3] / len(stats)]
+            for color in sorted(merged, key=lambda color: color[3], reverse=True)
+        ],
+    }
+    for key in ("brightness", "contrast", "saturation"):
+        values = [item[key] for item in stats]
+        aggregate[key] = {
+            "mean": sum(values) / len(values),
+            "min": min(values),
+            "max": max(values),
+        }
+    return aggregate
+
+
+def fits_stats(stats: Dict, aggregate: Dict) -> bool:
+    """
+    Whether a thumbnail's statistics fall within those of a set of thumbnails.
+
+    Brightness, contrast and saturation must be within STYLE_STATS_TOLERANCE
+    of the set's range, and each of the thumbnail's main colors (a share of
+    at least one in PALETTE_COLORS) close to one of the set's palette colors.
+
+    Args:
+        stats: Result of thumbnail_stats
+        aggregate: Result of aggregate_stats
+
+    Returns:
+        bool: True if the thumbnail matches the set
+    """
+    for key in ("brightness", "contrast", "saturation"):
+        value, bounds = stats[key], aggregate[key]
+        if not (
+            bounds["min"] - STYLE_STATS_TOLERANCE
+            <= value
+            <= bounds["max"] + STYLE_STATS_TOLERANCE
+        ):
+            return False
+    return all(
+        any(
+            _color_distance(color, known) <= PALETTE_MERGE_DISTANCE
+            for known in aggregate["palette"]
+        )
+        for color in stats["palette"]
+        if color[3] >= 1 / PALETTE_COLORS
+    )
+
+
+def format_stats(aggregate: Dict) -> str:
+    """
+    Describe aggregated statistics as a markdown list.
+
+    Args:
+        aggregate: Result of aggregate_stats
+
+    Returns:
+        str: One line per measurement
+    """
+    colors = ", ".join(
+        f"{_hex(color)} ({color[3]:.0%})"
+        for color in aggregate["palette"][:PALETTE_COLORS]
+    )
+    lines = [f"- Dominant colors: {colors}"]
+    for key in ("brightness", "contrast", "saturation"):
+        values = aggregate[key]
+        lines.append(
+            f"- {key.capitalize()}: {values['mean']:.2f} "
+            f"(range {values['min']:.2f}-{values['max']:.2f})"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+"""
+Local image processing helpers for thumbnails (masks, region diffs, compositing).
+"""
+
+import io
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageFilter
+
+Box = Tuple[int, int, int, int]
+
+
+def clamp_box(box: List[int], image_size: Tuple[int, int], padding: int = 0) -> Box:
+    """
+    Normalize a (left, top, right, bottom) box, pad it and clamp it to the image.
+
+    Args:
+        box: Region as [left, top, right, bottom] in pixels
+        image_size: (width, height) of the image
+        padding: Pixels to grow the box by on every side
+
+    Returns:
+        Box: The clamped box
+    """
+    width, height = image_size
+    left, top, right, bottom = (int(v) for v in box)
+    left, right = sorted((left, right))
+    top, bottom = sorted((top, bottom))
+    return (
+        max(0, left - padding),
+        max(0, top - padding),
+        min(width, right + padding),
+        min(height, bottom + padding),
+    )
+
+
+def build_region_mask(image_size: Tuple[int, int], box: Box) -> bytes:
+    """
+    Build an edit mask PNG for the image API.
+
+    Fully transparent pixels mark the area to edit; everything else stays opaque
+    so the API preserves it.
+
+    Args:
+        image_size: (width, height) of the base image
+        box: Region to edit
+
+    Returns:
+        bytes: RGBA PNG data of the mask
+    """
+    mask = Image.new("RGBA", image_size, (0, 0, 0, 255))
+    ImageDraw.Draw(mask).rectangle(box, fill=(0, 0, 0, 0))
+    buffer = io.BytesIO()
+    mask.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def find_changed_region(
+    base_path: str,
+    marked_path: str,
+    threshold: int = 40,
+    padding: int = 24,
+) -> Optional[Box]:
+    """
+    Locate the region where a marked-up copy differs from the base image.
+
+    Users often annotate a copy of the thumbnail (circling or scribbling over the
+    part they want changed). The bounding box of the pixels that differ by more
+    than the threshold is taken as the region to edit.
+
+    Args:
+        base_path: Path to the base image
+        marked_path: Path to the marked-up copy
+        threshold: Minimum per-pixel difference (0-255) that counts as a change
+        padding: Pixels to grow the detected box by on every side
+
+    Returns:
+        Optional[Box]: The changed region, or None if the images do not differ
+    """
+    with Image.open(base_path) as base, Image.open(marked_path) as marked:
+        base_gray = base.convert("L")
+        marked_gray = marked.convert("L")
+        if marked_gray.size != base_gray.size:
+            marked_gray = marked_gray.resize(base_gray.size)
+
+    diff = ImageChops.difference(base_gray, marked_gray)
+    changed = diff.point(lambda value: 255 if value > threshold else 0)
+    box = changed.getbbox()
+    if box is None:
+        return None
+    return clamp_box(list(box), base_gray.size, padding)
+
+
+def composite_region(
+    base_path: str,
+    edited_bytes: bytes,
+    box: Box,
+    feather: int = 8,
+) -> bytes:
+    """
+    Paste the edited region back onto the base image with a feathered edge.
+
+    Only pixels inside the box are taken from the edited render, so anything the
+    API changed outside the region is discarded.
+
+    Args:
+        base_path: Path to the base image
+        edited_bytes: Image data returned by the edit
+        box: Region that was edited
+        feather: Blur radius for blending the region edge
+
+    Returns:
+        bytes: PNG data of the composited image
+    """
+    with Image.open(base_path) as base_image:
+        base = base_image.convert("RGBA")
+    with Image.open(io.BytesIO(edited_bytes)) as edited_image:
+        edited = edited_image.convert("RGBA")
+    if edited.size != base.size:
+        edited = edited.resize(base.size, Image.LANCZOS)
+
+    blend_mask = Image.new("L", base.size, 0)
+    ImageDraw.Draw(blend_mask).rectangle(box, fill=255)
+    if feather > 0:
+        blend_mask = blend_mask.filter(ImageFilter.GaussianBlur(feather))
+
+    composited = Image.composite(edited, base, blend_mask)
+    buffer = io.BytesIO()
+    composited.convert("RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
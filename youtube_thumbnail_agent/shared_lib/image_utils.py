@@ -7,87 +7,90 @@ from typing import Dict
 
 from google.adk.tools.tool_context import ToolContext
 
+from .catalog import count_images, query_images, remove_image
+from .workspace import get_session_id, get_workspace
 
-def ensure_image_directory_exists():
+
+def ensure_image_directory_exists(tool_context: ToolContext) -> str:
     """
-    Ensure that the images directory exists, creating it if necessary.
+    Ensure that the session's generated images directory exists.
+
+    Args:
+        tool_context (ToolContext): The tool context
 
     Returns:
         str: Path to the images directory
     """
-    # Get the absolute path to the repository root
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    repo_root = os.path.abspath(os.path.join(current_dir, "../.."))
-
-    # Create the images directory path
-    images_dir = os.path.join(repo_root, "images")
-
-    # Create the directory if it doesn't exist
-    if not os.path.exists(images_dir):
-        os.makedirs(images_dir)
-        print(f"Created images directory at {images_dir}")
-
-    return images_dir
+    return get_workspace(tool_context).generated
 
 
-def list_images(tool_context: ToolContext) -> Dict:
+def list_images(
+    tool_context: ToolContext,
+    role: str = "",
+    page: int = 1,
+    page_size: int = 50,
+) -> Dict:
     """
-    List all images saved in the local images directory.
+    List the images saved for this session, newest first, from the image catalog.
 
     Args:
         tool_context (ToolContext): The tool context
+        role (str): Only list images with this role ("reference", "asset",
+            "render", "thumbnail" or "export"). Lists all images if empty.
+        page (int): Page of results to return, starting at 1
+        page_size (int): Number of images per page
 
     Returns:
         dict: Status and list of image filenames
     """
     try:
-        # Ensure images directory exists
-        images_dir = ensure_image_directory_exists()
-
-        print(f"[Image Utils] Images directory: {images_dir}")
-
-        # Get a list of all image files in the directory
-        image_files = []
-        if os.path.exists(images_dir):
-            # Get all files in the directory
-            all_files = os.listdir(images_dir)
-
-            # Filter for image files only
-            image_files = [
-                file
-                for file in all_files
-                if any(
-                    file.lower().endswith(ext)
-                    for ext in [".png", ".jpg", ".jpeg", ".gif", ".webp"]
-                )
-            ]
+        session_id = get_session_id(tool_context)
+        page = max(1, page)
+        page_size = max(1, page_size)
+
+        total = count_images(session_id=session_id, role=role or None)
+        entries = query_images(
+            session_id=session_id,
+            role=role or None,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+        )
+        image_files = [entry["filename"] for entry in entries]
 
         if not image_files:
             return {
                 "status": "success",
-                "message": "No images found in the directory.",
+                "message": "No images found.",
                 "images": [],
                 "count": 0,
+                "total": total,
+                "page": page,
             }
 
-        # Sort the image files alphabetically
-        image_files.sort()
-
         # Format the filenames list
         formatted_filenames = []
-        for i, filename in enumerate(image_files, 1):
-            formatted_filenames.append(f"{i}. {filename}")
-
-        # Update current images in state if needed
-        if not tool_context.state.get("current_image_filenames") and image_files:
-            tool_context.state["current_image_filenames"] = [image_files[0]]
+        for i, entry in enumerate(entries, (page - 1) * page_size + 1):
+            formatted_filenames.append(f"{i}. {entry['filename']} ({entry['role']})")
+
+        # Default the current image to the newest generated one listed
+        generated = [
+            entry["filename"]
+            for entry in entries
+            if entry["role"] in ("thumbnail", "render")
+        ]
+        if not tool_context.state.get("current_image_filenames") and generated:
+            tool_context.state["current_image_filenames"] = [generated[0]]
 
         return {
             "status": "success",
-            "message": f"Found {len(image_files)} image(s):",
+            "message": f"Showing {len(image_files)} of {total} image(s):",
             "images": image_files,
+            "entries": entries,
             "filenames": "\n".join(formatted_filenames),
             "count": len(image_files),
+            "total": total,
+            "page": page,
+            "has_more": page * page_size < total,
         }
     except Exception as e:
         return {
@@ -100,7 +103,7 @@ def list_images(tool_context: ToolContext) -> Dict:
 
 def delete_image(filename: str, tool_context: ToolContext) -> Dict:
     """
-    Delete an image from the local images directory.
+    Delete an image of this session, as listed by list_images.
 
     Args:
         filename (str): The name of the image file to delete
@@ -110,19 +113,27 @@ def delete_image(filename: str, tool_context: ToolContext) -> Dict:
         dict: Status and result message
     """
     try:
-        # Ensure images directory exists
-        images_dir = ensure_image_directory_exists()
-
-        # Full path to the image
-        image_path = os.path.join(images_dir, filename)
+        # Find the file through the catalog, whichever directory it is in
+        entries = query_images(
+            session_id=get_session_id(tool_context), filename=filename, limit=None
+        )
+        image_paths = [entry["path"] for entry in entries]
+        if not image_paths and os.path.basename(filename) == filename:
+            # Files in the generated images directory from before the catalog
+            image_paths = [
+                os.path.join(ensure_image_directory_exists(tool_context), filename)
+            ]
 
-        # Check if the file exists
-        if not os.path.exists(image_path):
+        # Delete the files and their catalog entries
+        deleted = 0
+        for image_path in image_paths:
+            if os.path.exists(image_path):
+                os.remove(image_path)
+                deleted += 1
+            remove_image(image_path)
+        if not deleted:
             return {"status": "error", "message": f"Image '{filename}' not found."}
 
-        # Delete the file
-        os.remove(image_path)
-
         # Update current_image_filenames in state if needed
         current_images = tool_context.state.get("current_image_filenames", [])
         if filename in current_images:
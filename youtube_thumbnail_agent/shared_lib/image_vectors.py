@@ -0,0 +1,103 @@
+"""
+NumPy feature vectors of thumbnails and style guide text.
+
+Importing this module imports NumPy; import it inside the functions that need
+it so the agent tree starts without it.
+"""
+
+import hashlib
+import re
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from ..constants import COLOR_HISTOGRAM_BINS, LAYOUT_GRID, STYLE_TEXT_DIMS
+from .image_features import color_histogram, layout_map, load_pixels, tone
+
+# Length of the vectors returned by image_vector
+IMAGE_VECTOR_DIMS = COLOR_HISTOGRAM_BINS**3 + LAYOUT_GRID[0] * LAYOUT_GRID[1] + 3
+
+# Share of each image feature in an image vector's cosine similarity
+_IMAGE_FEATURE_WEIGHTS = {"colors": 0.6, "layout": 0.3, "tone": 0.1}
+
+_TOKEN_PATTERN = re.compile(r"#[0-9a-f]{6}\b|[a-z][a-z-]{2,}")
+_STOP_WORDS = frozenset(
+    "the and for with are that this from into their them they its has have "
+    "use uses used each all any can more most less very often".split()
+)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def image_vector(paths: Iterable[str]) -> Optional[np.ndarray]:
+    """
+    Describe the look of a set of thumbnails as one unit vector.
+
+    Combines the mean color histogram, the mean layout of light and dark
+    areas, and the mean tone, weighted so that cosine similarity is mostly
+    about colors.
+
+    Args:
+        paths: Paths to the thumbnails
+
+    Returns:
+        Optional[np.ndarray]: The vector, or None if there are no thumbnails
+    """
+    pixels = [load_pixels(path) for path in paths]
+    if not pixels:
+        return None
+    colors = np.mean([color_histogram(item) for item in pixels], axis=0)
+    layout = np.mean([layout_map(item).ravel() for item in pixels], axis=0)
+    parts = {
+        "colors": _unit(colors),
+        "layout": _unit(layout - layout.mean()),
+        "tone": _unit(np.mean([tone(item) for item in pixels], axis=0)),
+    }
+    return _unit(
+        np.concatenate(
+            [
+                np.sqrt(_IMAGE_FEATURE_WEIGHTS[name]) * part
+                for name, part in parts.items()
+            ]
+        )
+    ).astype(np.float32)
+
+
+def _tokens(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token.startswith("#"):
+            # Nearby colors share a token: hex codes rarely repeat exactly
+            rgb = [
+                int(token[i : i + 2], 16) * COLOR_HISTOGRAM_BINS // 256
+                for i in (1, 3, 5)
+            ]
+            tokens.append("color:" + "".join(map(str, rgb)))
+        elif token not in _STOP_WORDS:
+            tokens.append(token)
+    return tokens
+
+
+def text_vector(text: str) -> Optional[np.ndarray]:
+    """
+    Describe a style guide (or a free-text style description) as a unit vector.
+
+    Words and hex colors are hashed into STYLE_TEXT_DIMS buckets with
+    log-scaled counts, so no vocabulary has to be stored.
+
+    Args:
+        text: The text to describe
+
+    Returns:
+        Optional[np.ndarray]: The vector, or None if the text has no words
+    """
+    vector = np.zeros(STYLE_TEXT_DIMS, dtype=np.float32)
+    for token in _tokens(text):
+        digest = int.from_bytes(hashlib.sha1(token.encode()).digest()[:8], "little")
+        vector[digest % STYLE_TEXT_DIMS] += 1.0 if digest >> 63 else -1.0
+    if not vector.any():
+        return None
+    return _unit(np.sign(vector) * np.log1p(np.abs(vector))).astype(np.float32)
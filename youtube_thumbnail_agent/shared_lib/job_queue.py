@@ -0,0 +1,157 @@
+"""
+Local job queue for running image generations in the background.
+
+Jobs run on a bounded pool of worker threads behind a rate limiter, so slow
+generations never hold up an agent turn and bursts of submissions are
+smoothed to the provider's rate limit. When too many jobs are pending,
+submissions are rejected so callers get backpressure instead of an
+ever-growing queue.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from ..constants import IMAGE_JOB_MAX_PENDING, IMAGE_JOB_WORKERS, IMAGE_JOBS_PER_MINUTE
+
+# Finished jobs are forgotten after this many seconds
+_JOB_RETENTION_SECONDS = 60 * 60
+
+
+class RateLimiter:
+    """Token bucket that allows `rate_per_minute` acquisitions per minute."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = max(1.0, float(rate_per_minute))
+        self.refill_per_second = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated_at) * self.refill_per_second,
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.refill_per_second
+            time.sleep(delay)
+            waited += delay
+
+
+class JobQueue:
+    """Bounded, rate-limited background job runner with status polling."""
+
+    def __init__(
+        self,
+        max_workers: int = IMAGE_JOB_WORKERS,
+        max_pending: int = IMAGE_JOB_MAX_PENDING,
+        rate_per_minute: float = IMAGE_JOBS_PER_MINUTE,
+    ):
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-job"
+        )
+        self.rate_limiter = RateLimiter(rate_per_minute)
+        self.jobs: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Optional[str]:
+        """
+        Queue fn(*args, **kwargs) to run in the background.
+
+        Returns:
+            Optional[str]: The job ID, or None if the queue is full
+        """
+        with self.lock:
+            self._prune_finished()
+            pending = sum(
+                1
+                for job in self.jobs.values()
+                if job["status"] in ("queued", "running")
+            )
+            if pending >= self.max_pending:
+                return None
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+
+        self.executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job's record, or None if it is unknown."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self) -> Dict:
+        """Count jobs by status."""
+        with self.lock:
+            counts: Dict[str, int] = {}
+            for job in self.jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args, kwargs) -> None:
+        waited = self.rate_limiter.acquire()
+        self._update(
+            job_id, status="running", started_at=time.time(), rate_limited_for=waited
+        )
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        else:
+            self._update(
+                job_id, status="succeeded", result=result, finished_at=time.time()
+            )
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _prune_finished(self) -> None:
+        cutoff = time.time() - _JOB_RETENTION_SECONDS
+        for job_id in [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]:
+            del self.jobs[job_id]
+
+
+_image_job_queue: Optional[JobQueue] = None
+_image_job_queue_lock = threading.Lock()
+
+
+def get_image_job_queue() -> JobQueue:
+    """Return the process-wide image generation queue, creating it on first use."""
+    global _image_job_queue
+    with _image_job_queue_lock:
+        if _image_job_queue is None:
+            _image_job_queue = JobQueue()
+        return _image_job_queue
@@ -0,0 +1,726 @@
+"""
+Per-agent metrics and trace spans, collected through agent callbacks.
+
+instrument_agent_tree() attaches callbacks to every agent in a tree, chained
+with any callbacks the agents already have. They record, per agent and per
+session:
+- model calls, prompt and response tokens, and model latency
+- tool calls, tool errors, and tool durations
+
+Metrics can be exported as Prometheus text or JSON. Each agent run, model call
+and tool call is also recorded as an OpenTelemetry-style span, written as one
+JSON object per line to the file named by the AGENT_TRACE_FILE environment
+variable (or set_trace_file()), if any.
+
+The model APIs used here don't report token usage through ADK, so tokens are
+estimated at four characters per token (and a flat count per inline image),
+unless the response's custom_metadata carries "tokens_in" and "tokens_out".
+
+A span is normally closed by its "after" callback, which ADK skips when the call
+raises. Such spans are closed as errors instead: when their agent's span ends,
+when the same call is started again, or once they have been open for
+OPEN_SPAN_TTL_SECONDS. An abandoned model call is counted as a failed call.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from ..constants import OPEN_SPAN_TTL_SECONDS
+from .workspace import get_session_id
+
+logger = logging.getLogger(__name__)
+
+# Tokens a model bills for one inline image
+_IMAGE_TOKENS = 258
+
+# Every instrumented callback is marked so instrumenting twice is a no-op
+_INSTRUMENTED = "_metrics_instrumented"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text at four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def _content_tokens(contents) -> int:
+    tokens = 0
+    for content in contents or []:
+        for part in content.parts or []:
+            if part.text:
+                tokens += estimate_tokens(part.text)
+            elif part.inline_data:
+                tokens += _IMAGE_TOKENS
+            elif part.function_call:
+                tokens += estimate_tokens(str(part.function_call.args or ""))
+            elif part.function_response:
+                tokens += estimate_tokens(str(part.function_response.response or ""))
+    return tokens
+
+
+def _request_tokens(llm_request: LlmRequest) -> int:
+    tokens = _content_tokens(llm_request.contents)
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(instruction, str):
+        tokens += estimate_tokens(instruction)
+    elif instruction is not None:
+        tokens += _content_tokens([instruction])
+    return tokens
+
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+def _trace_id(invocation_id: str) -> str:
+    # One trace per invocation (one user turn)
+    return hashlib.sha256(invocation_id.encode()).hexdigest()[:32]
+
+
+class _Stat:
+    """Count, error count and duration total and maximum of one kind of call."""
+
+    __slots__ = ("count", "errors", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, seconds: float, error: bool = False) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 4),
+            "max_seconds": round(self.max_seconds, 4),
+        }
+
+
+class AgentMetrics:
+    """Metrics of one agent in one session."""
+
+    def __init__(self):
+        self.model = _Stat()
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.tools: Dict[str, _Stat] = {}
+
+    def to_dict(self) -> Dict:
+        return {
+            "model_calls": self.model.to_dict(),
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "tools": {name: stat.to_dict() for name, stat in self.tools.items()},
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of agent metrics and open spans.
+
+    Agent metrics are keyed by (agent name, session ID), and model tier
+    metrics by (tier, model).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.agents: Dict[Tuple[str, str], AgentMetrics] = {}
+        self.tiers: Dict[Tuple[str, str], _Stat] = {}
+        self.fallbacks: Dict[Tuple[str, str], int] = {}
+        # Calls in flight, keyed by (invocation ID, agent name) for agent runs
+        # and model calls, and by function call ID for tool calls
+        self.open_spans: Dict[Tuple[str, ...], Dict] = {}
+        self.trace_file: Optional[str] = os.environ.get("AGENT_TRACE_FILE") or None
+        self.trace_lock = threading.Lock()
+
+    def _agent(self, agent_name: str, session_id: str) -> AgentMetrics:
+        key = (agent_name, session_id)
+        if key not in self.agents:
+            self.agents[key] = AgentMetrics()
+        return self.agents[key]
+
+    def reset(self) -> None:
+        """Forget every metric and open span."""
+        with self.lock:
+            self.agents.clear()
+            self.tiers.clear()
+            self.fallbacks.clear()
+            self.open_spans.clear()
+
+    # Spans
+
+    def start_span(
+        self,
+        key: Tuple[str, ...],
+        name: str,
+        invocation_id: str,
+        parent_key: Optional[Tuple[str, ...]] = None,
+        **attributes,
+    ) -> None:
+        now = time.time_ns()
+        with self.lock:
+            abandoned = self._pop_expired_spans(now)
+            if key in self.open_spans:
+                # The earlier call under this key raised before it was closed
+                abandoned.append((key, self.open_spans.pop(key)))
+            parent = self.open_spans.get(parent_key) if parent_key else None
+            self.open_spans[key] = {
+                "name": name,
+                "trace_id": _trace_id(invocation_id),
+                "span_id": _new_span_id(),
+                "parent_span_id": parent["span_id"] if parent else None,
+                "start_time_unix_nano": now,
+                "attributes": attributes,
+            }
+        self._close_abandoned(abandoned)
+
+    def end_span(
+        self, key: Tuple[str, ...], error: Optional[str] = None, **attributes
+    ) -> Optional[float]:
+        """
+        Close a span and write it to the trace file.
+
+        Returns:
+            Optional[float]: The span's duration in seconds, or None if it
+            wasn't open
+        """
+        with self.lock:
+            span = self.open_spans.pop(key, None)
+            abandoned = self._pop_child_spans(span) if span is not None else []
+        if span is None:
+            return None
+
+        self._close_abandoned(abandoned)
+        return self._finish_span(span, error, **attributes)
+
+    def _finish_span(
+        self, span: Dict, error: Optional[str] = None, **attributes
+    ) -> float:
+        span["end_time_unix_nano"] = time.time_ns()
+        span["attributes"].update(attributes)
+        span["status"] = (
+            {"code": "ERROR", "message": error} if error else {"code": "OK"}
+        )
+        if self.trace_file:
+            self._write_span(span)
+        return (span["end_time_unix_nano"] - span["start_time_unix_nano"]) / 1e9
+
+    def _pop_expired_spans(self, now: int) -> List[Tuple[Tuple[str, ...], Dict]]:
+        """Remove spans open longer than OPEN_SPAN_TTL_SECONDS. Hold the lock."""
+        cutoff = now - OPEN_SPAN_TTL_SECONDS * 1_000_000_000
+        expired = [
+            key
+            for key, span in self.open_spans.items()
+            if span["start_time_unix_nano"] < cutoff
+        ]
+        return [(key, self.open_spans.pop(key)) for key in expired]
+
+    def _pop_child_spans(self, span: Dict) -> List[Tuple[Tuple[str, ...], Dict]]:
+        """Remove the spans still open under an ended span. Hold the lock."""
+        popped = []
+        parents = {span["span_id"]}
+        while parents:
+            children = [
+                (key, child)
+                for key, child in self.open_spans.items()
+                if child["parent_span_id"] in parents
+            ]
+            for key, _ in children:
+                del self.open_spans[key]
+            popped.extend(children)
+            parents = {child["span_id"] for _, child in children}
+        return popped
+
+    def _close_abandoned(self, spans: List[Tuple[Tuple[str, ...], Dict]]) -> None:
+        """Close spans whose "after" callback never ran as errors."""
+        for key, span in spans:
+            seconds = self._finish_span(span, error="Call ended without completing")
+            attributes = span["attributes"]
+            logger.debug("Closed abandoned span %s after %.3fs", span["name"], seconds)
+            if key[0] == "model":
+                self.record_model_call(
+                    attributes["agent"],
+                    attributes["session_id"],
+                    seconds,
+                    attributes["prompt_tokens"],
+                    0,
+                    error=True,
+                )
+
+    def _write_span(self, span: Dict) -> None:
+        line = json.dumps(span, default=str) + "\n"
+        try:
+            with self.trace_lock:
+                with open(self.trace_file, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            logger.warning("Could not write trace span to %s: %s", self.trace_file, e)
+
+    # Recording
+
+    def record_model_call(
+        self,
+        agent_name: str,
+        session_id: str,
+        seconds: float,
+        prompt_tokens: int,
+        response_tokens: int,
+        error: bool = False,
+    ) -> None:
+        with self.lock:
+            metrics = self._agent(agent_name, session_id)
+            metrics.model.add(seconds, error)
+            metrics.prompt_tokens += prompt_tokens
+            metrics.response_tokens += response_tokens
+
+    def record_tool_call(
+        self,
+        agent_name: str,
+        session_id: str,
+        tool_name: str,
+        seconds: float,
+        error: bool = False,
+    ) -> None:
+        with self.lock:
+            tools = self._agent(agent_name, session_id).tools
+            if tool_name not in tools:
+                tools[tool_name] = _Stat()
+            tools[tool_name].add(seconds, error)
+
+    def record_tier_call(
+        self, tier: str, model: str, seconds: float, error: bool = False
+    ) -> None:
+        with self.lock:
+            key = (tier, model)
+            if key not in self.tiers:
+                self.tiers[key] = _Stat()
+            self.tiers[key].add(seconds, error)
+
+    def record_model_fallback(self, tier: str, model: str) -> None:
+        """Count a call retried on `model` after an earlier model of the tier failed."""
+        with self.lock:
+            key = (tier, model)
+            self.fallbacks[key] = self.fallbacks.get(key, 0) + 1
+
+    # Export
+
+    def to_json(self, by_session: bool = True) -> Dict:
+        """
+        Export metrics as a JSON-serializable dict.
+
+        Args:
+            by_session: Break each agent's metrics down by session
+
+        Returns:
+            Dict: {"agents": {agent: totals}, "model_tiers": {tier: {model:
+            calls}}} plus, with by_session, {"sessions": {session: {agent:
+            metrics}}}
+        """
+        with self.lock:
+            totals: Dict[str, AgentMetrics] = {}
+            sessions: Dict[str, Dict[str, Dict]] = {}
+            for (agent_name, session_id), metrics in self.agents.items():
+                total = totals.setdefault(agent_name, AgentMetrics())
+                _merge(total, metrics)
+                if by_session:
+                    sessions.setdefault(session_id, {})[agent_name] = metrics.to_dict()
+
+            tiers: Dict[str, Dict[str, Dict]] = {}
+            for (tier, model), stat in self.tiers.items():
+                tiers.setdefault(tier, {})[model] = {
+                    **stat.to_dict(),
+                    "fallbacks": self.fallbacks.get((tier, model), 0),
+                }
+
+        result = {
+            "agents": {name: metrics.to_dict() for name, metrics in totals.items()},
+            "model_tiers": tiers,
+        }
+        if by_session:
+            result["sessions"] = sessions
+        return result
+
+    def to_prometheus(self, by_session: bool = False) -> str:
+        """
+        Export metrics in the Prometheus text exposition format.
+
+        Args:
+            by_session: Add a session label to every sample. Session IDs are
+                unbounded, so only use this for short-lived processes.
+
+        Returns:
+            str: The metrics text
+        """
+        with self.lock:
+            rows = []
+            for (agent_name, session_id), metrics in self.agents.items():
+                labels = {"agent": agent_name}
+                if by_session:
+                    labels["session"] = session_id
+                rows.append((labels, metrics))
+
+            samples: Dict[str, Dict[str, float]] = {}
+
+            def add(name: str, labels: Dict[str, str], value: float) -> None:
+                label_text = ",".join(
+                    f'{key}="{_escape(value)}"' for key, value in labels.items()
+                )
+                series = samples.setdefault(name, {})
+                series[label_text] = series.get(label_text, 0) + value
+
+            for labels, metrics in rows:
+                add("agent_model_calls_total", labels, metrics.model.count)
+                add("agent_model_errors_total", labels, metrics.model.errors)
+                add("agent_model_latency_seconds_sum", labels, metrics.model.seconds)
+                add("agent_prompt_tokens_total", labels, metrics.prompt_tokens)
+                add("agent_response_tokens_total", labels, metrics.response_tokens)
+                for tool_name, stat in metrics.tools.items():
+                    tool_labels = {**labels, "tool": tool_name}
+                    add("agent_tool_calls_total", tool_labels, stat.count)
+                    add("agent_tool_errors_total", tool_labels, stat.errors)
+                    add("agent_tool_duration_seconds_sum", tool_labels, stat.seconds)
+
+            for (tier, model), stat in self.tiers.items():
+                labels = {"tier": tier, "model": model}
+                add("model_tier_calls_total", labels, stat.count)
+                add("model_tier_errors_total", labels, stat.errors)
+                add("model_tier_latency_seconds_sum", labels, stat.seconds)
+                add("model_tier_latency_seconds_max", labels, stat.max_seconds)
+                add(
+                    "model_tier_fallbacks_total",
+                    labels,
+                    self.fallbacks.get((tier, model), 0),
+                )
+
+        lines = []
+        for name, series in samples.items():
+            kind = "counter" if name.endswith("_total") else "untyped"
+            lines.append(f"# TYPE {name} {kind}")
+            for label_text, value in series.items():
+                lines.append(f"{name}{{{label_text}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(total: AgentMetrics, metrics: AgentMetrics) -> None:
+    _merge_stat(total.model, metrics.model)
+    total.prompt_tokens += metrics.prompt_tokens
+    total.response_tokens += metrics.response_tokens
+    for name, stat in metrics.tools.items():
+        _merge_stat(total.tools.setdefault(name, _Stat()), stat)
+
+
+def _merge_stat(total: _Stat, stat: _Stat) -> None:
+    total.count += stat.count
+    total.errors += stat.errors
+    total.seconds += stat.seconds
+    total.max_seconds = max(total.max_seconds, stat.max_seconds)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# The process-wide registry the callbacks record into
+metrics = MetricsRegistry()
+
+
+def set_trace_file(path: Optional[str]) -> None:
+    """Write trace spans to this JSONL file from now on, or stop with None."""
+    metrics.trace_file = path
+
+
+def write_metrics(path: str, by_session: bool = True) -> None:
+    """
+    Write the current metrics to a file, as Prometheus text for .prom and .txt
+    paths and as JSON otherwise.
+
+    Args:
+        path: Where to write the metrics
+        by_session: Include per-session metrics
+    """
+    if path.endswith((".prom", ".txt")):
+        text = metrics.to_prometheus(by_session=by_session)
+    else:
+        text = json.dumps(metrics.to_json(by_session=by_session), indent=2) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+# Callbacks
+
+
+def _agent_key(context: CallbackContext, agent_name: Optional[str] = None):
+    return ("agent", context.invocation_id, agent_name or context.agent_name)
+
+
+def _model_key(context: CallbackContext):
+    return ("model", context.invocation_id, context.agent_name)
+
+
+def _tool_key(tool_context: ToolContext, tool: BaseTool):
+    return ("tool", tool_context.function_call_id or tool.name)
+
+
+def _parent_key(context: CallbackContext):
+    agent = context._invocation_context.agent
+    parent = getattr(agent, "parent_agent", None)
+    return _agent_key(context, parent.name) if parent else None
+
+
+def metrics_before_agent_callback(callback_context: CallbackContext) -> None:
+    metrics.start_span(
+        _agent_key(callback_context),
+        f"agent {callback_context.agent_name}",
+        callback_context.invocation_id,
+        parent_key=_parent_key(callback_context),
+        agent=callback_context.agent_name,
+        session_id=get_session_id(callback_context),
+    )
+    return None
+
+
+def metrics_after_agent_callback(callback_context: CallbackContext) -> None:
+    metrics.end_span(_agent_key(callback_context))
+    return None
+
+
+def metrics_before_model_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    metrics.start_span(
+        _model_key(callback_context),
+        f"llm {callback_context.agent_name}",
+        callback_context.invocation_id,
+        parent_key=_agent_key(callback_context),
+        agent=callback_context.agent_name,
+        session_id=get_session_id(callback_context),
+        model=llm_request.model,
+        prompt_tokens=_request_tokens(llm_request),
+    )
+    return None
+
+
+def _metrics_count_prompt_callback(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    # Runs after the agent's own before-model callbacks, which may rewrite the
+    # request (e.g. resolve state blobs into the instruction)
+    with metrics.lock:
+        span = metrics.open_spans.get(_model_key(callback_context))
+        if span is not None:
+            span["attributes"]["prompt_tokens"] = _request_tokens(llm_request)
+    return None
+
+
+def metrics_after_model_callback(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    key = _model_key(callback_context)
+    with metrics.lock:
+        span = metrics.open_spans.get(key)
+    if span is None:
+        return None
+
+    custom = llm_response.custom_metadata or {}
+    prompt_tokens = custom.get("tokens_in", span["attributes"]["prompt_tokens"])
+    response_tokens = custom.get(
+        "tokens_out",
+        _content_tokens([llm_response.content] if llm_response.content else []),
+    )
+    error = llm_response.error_message or llm_response.error_code
+    seconds = metrics.end_span(
+        key,
+        error=str(error) if error else None,
+        prompt_tokens=prompt_tokens,
+        response_tokens=response_tokens,
+    )
+
+    agent_name = callback_context.agent_name
+    session_id = get_session_id(callback_context)
+    metrics.record_model_call(
+        agent_name, session_id, seconds, prompt_tokens, response_tokens, bool(error)
+    )
+    logger.debug(
+        "Model call by %s took %.3fs (%d prompt, %d response tokens)",
+        agent_name,
+        seconds,
+        prompt_tokens,
+        response_tokens,
+    )
+    return None
+
+
+def metrics_before_tool_callback(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
+) -> Optional[Dict]:
+    metrics.start_span(
+        _tool_key(tool_context, tool),
+        f"tool {tool.name}",
+        tool_context.invocation_id,
+        parent_key=_agent_key(tool_context),
+        agent=tool_context.agent_name,
+        tool=tool.name,
+    )
+    return None
+
+
+def metrics_after_tool_callback(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response
+) -> Optional[Dict]:
+    # Tools report failures as {"status": "error", "message": ...}
+    error = None
+    if isinstance(tool_response, dict) and tool_response.get("status") == "error":
+        error = str(tool_response.get("message") or "error")
+
+    seconds = metrics.end_span(_tool_key(tool_context, tool), error=error)
+    if seconds is None:
+        return None
+
+    metrics.record_tool_call(
+        tool_context.agent_name,
+        get_session_id(tool_context),
+        tool.name,
+        seconds,
+        error is not None,
+    )
+    logger.debug("Tool %s took %.3fs", tool.name, seconds)
+    return None
+
+
+def chain_callbacks(*callbacks: Optional[Callable]) -> Optional[Callable]:
+    """
+    Combine callbacks into one that runs each in order.
+
+    The first callback to return something other than None short-circuits
+    the rest, matching how ADK treats a single callback's return value. ADK
+    calls agent and model callbacks synchronously, so the callbacks must be
+    plain functions.
+
+    Args:
+        callbacks: Callbacks taking the same keyword arguments; None entries
+            are skipped
+
+    Returns:
+        Optional[Callable]: The combined callback, or None if there are none
+    """
+    callbacks = [callback for callback in callbacks if callback is not None]
+    if len(callbacks) <= 1:
+        return callbacks[0] if callbacks else None
+
+    def chained(**kwargs):
+        for callback in callbacks:
+            result = callback(**kwargs)
+            if result is not None:
+                return result
+        return None
+
+    return chained
+
+
+def _mark(callback: Callable) -> Callable:
+    setattr(callback, _INSTRUMENTED, True)
+    return callback
+
+
+def _wrap(first: Callable, existing: Optional[Callable], last: Callable) -> Callable:
+    """Chain `existing` between two metrics callbacks, unless already done."""
+    if existing is not None and getattr(existing, _INSTRUMENTED, False):
+        return existing
+    return _mark(chain_callbacks(first, existing, last))
+
+
+def _noop(**kwargs) -> None:
+    return None
+
+
+def _ending_span_on_skip(callback: Optional[Callable]) -> Optional[Callable]:
+    """Close the agent span when a before-agent callback skips the agent's run."""
+    if callback is None or getattr(callback, _INSTRUMENTED, False):
+        return callback
+
+    def before_agent_callback(callback_context: CallbackContext):
+        content = callback(callback_context=callback_context)
+        if content is not None:
+            # ADK doesn't run the after-agent callbacks of a skipped agent
+            metrics_after_agent_callback(callback_context)
+        return content
+
+    return before_agent_callback
+
+
+def _ending_model_span_on_skip(callback: Optional[Callable]) -> Optional[Callable]:
+    """Close the model span when a before-model callback answers for the model."""
+    if callback is None or getattr(callback, _INSTRUMENTED, False):
+        return callback
+
+    def before_model_callback(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        response = callback(callback_context=callback_context, llm_request=llm_request)
+        if response is not None:
+            # ADK doesn't run the after-model callbacks for this response
+            metrics_after_model_callback(callback_context, response)
+        return response
+
+    return before_model_callback
+
+
+def instrument_agent_tree(agent: BaseAgent) -> int:
+    """
+    Attach the metrics callbacks to an agent and all of its sub-agents.
+
+    Existing callbacks keep running: "before" metrics callbacks run ahead of
+    them so their time is measured, and "after" metrics callbacks run after
+    them. Instrumenting an agent twice has no further effect.
+
+    Args:
+        agent: Root of the agent tree
+
+    Returns:
+        int: Number of agents instrumented
+    """
+    agent.before_agent_callback = _wrap(
+        metrics_before_agent_callback,
+        _ending_span_on_skip(agent.before_agent_callback),
+        _noop,
+    )
+    agent.after_agent_callback = _wrap(
+        _noop, agent.after_agent_callback, metrics_after_agent_callback
+    )
+    if isinstance(agent, LlmAgent):
+        agent.before_model_callback = _wrap(
+            metrics_before_model_callback,
+            _ending_model_span_on_skip(agent.before_model_callback),
+            _metrics_count_prompt_callback,
+        )
+        agent.after_model_callback = _wrap(
+            _noop, agent.after_model_callback, metrics_after_model_callback
+        )
+        agent.before_tool_callback = _wrap(
+            metrics_before_tool_callback, agent.before_tool_callback, _noop
+        )
+        agent.after_tool_callback = _wrap(
+            _noop, agent.after_tool_callback, metrics_after_tool_callback
+        )
+
+    count = 1
+    for sub_agent in agent.sub_agents:
+        count += instrument_agent_tree(sub_agent)
+    return count
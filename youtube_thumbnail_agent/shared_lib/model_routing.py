@@ -0,0 +1,215 @@
+"""
+Model tiers per agent, with fallback between the models of a tier.
+
+Each agent is assigned a tier in AGENT_MODEL_TIERS (bookkeeping turns such as
+selection, save confirmations and delegation go to "fast"; visual analysis and
+writing go to "deep"), and each tier lists its models in order of preference.
+A call that errors, or that has no response within the tier's timeout, is
+retried on the tier's next model. A model that fails
+MODEL_FAILURES_BEFORE_COOLDOWN times in a row is tried last for
+MODEL_COOLDOWN_SECONDS. Every call's latency is recorded per tier and model in
+the metrics registry, for tuning the mapping.
+
+The mapping can be overridden without code changes by pointing
+MODEL_ROUTING_FILE at a JSON file with any of the keys "tiers", "agents",
+"timeout_seconds" and "default_tier".
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import threading
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+
+from ..constants import (
+    AGENT_MODEL_TIERS,
+    DEFAULT_MODEL_TIER,
+    MODEL_COOLDOWN_SECONDS,
+    MODEL_FAILURES_BEFORE_COOLDOWN,
+    MODEL_TIER_TIMEOUT_SECONDS,
+    MODEL_TIERS,
+)
+from .context_cache import restore_cached_context
+from .env import get_env
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_llms: Dict[str, BaseLlm] = {}
+# Consecutive failures and cooldown end of each model, shared by all tiers
+_failures: Dict[str, int] = {}
+_cooldown_until: Dict[str, float] = {}
+
+
+@functools.lru_cache(maxsize=1)
+def routing_config() -> Dict:
+    """
+    The tier of each agent, the models of each tier and the tier timeouts.
+
+    Returns:
+        Dict: {"tiers", "agents", "timeout_seconds", "default_tier"}
+    """
+    config = {
+        "tiers": dict(MODEL_TIERS),
+        "agents": dict(AGENT_MODEL_TIERS),
+        "timeout_seconds": dict(MODEL_TIER_TIMEOUT_SECONDS),
+        "default_tier": DEFAULT_MODEL_TIER,
+    }
+    path = get_env("MODEL_ROUTING_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            overrides = json.load(f)
+        for key in ("tiers", "agents", "timeout_seconds"):
+            config[key].update(overrides.get(key, {}))
+        config["default_tier"] = overrides.get("default_tier", config["default_tier"])
+        logger.info("Loaded model routing overrides from %s", path)
+    return config
+
+
+def _llm(model: str) -> BaseLlm:
+    # One client per model, instead of one per request
+    with _lock:
+        if model not in _llms:
+            _llms[model] = LLMRegistry.new_llm(model)
+        return _llms[model]
+
+
+def _record_outcome(model: str, failed: bool) -> None:
+    with _lock:
+        if not failed:
+            _failures[model] = 0
+            return
+        _failures[model] = _failures.get(model, 0) + 1
+        if _failures[model] >= MODEL_FAILURES_BEFORE_COOLDOWN:
+            _cooldown_until[model] = time.monotonic() + MODEL_COOLDOWN_SECONDS
+            _failures[model] = 0
+            logger.warning(
+                "Model %s failed %d times in a row; trying it last for %ds",
+                model,
+                MODEL_FAILURES_BEFORE_COOLDOWN,
+                MODEL_COOLDOWN_SECONDS,
+            )
+
+
+def _in_order(models: List[str]) -> List[str]:
+    """The models of a tier, with those cooling down moved to the end."""
+    now = time.monotonic()
+    with _lock:
+        cooling = {model for model in models if _cooldown_until.get(model, 0) > now}
+    return [model for model in models if model not in cooling] + [
+        model for model in models if model in cooling
+    ]
+
+
+def _request_for(llm_request: LlmRequest, model: str) -> LlmRequest:
+    """A copy of the request addressed to another model of the tier."""
+    request = llm_request.model_copy()
+    request.model = model
+    request.config = llm_request.config.model_copy()
+    # Cached contexts belong to the model they were created for
+    restore_cached_context(request)
+    return request
+
+
+class RoutedLlm(BaseLlm):
+    """
+    Model of one tier that falls back to the tier's next model on failure.
+
+    The model field is the tier's first model, so request preprocessing sees
+    a real model name.
+    """
+
+    tier: str
+    models: List[str]
+    timeout_seconds: Optional[float] = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        last_error: Optional[BaseException] = None
+        for attempt, model in enumerate(_in_order(self.models)):
+            request = (
+                llm_request
+                if model == llm_request.model
+                else _request_for(llm_request, model)
+            )
+            if attempt:
+                metrics.record_model_fallback(self.tier, model)
+                logger.warning(
+                    "Falling back to %s for the %s tier: %s",
+                    model,
+                    self.tier,
+                    last_error,
+                )
+
+            started_at = time.monotonic()
+            responses = _llm(model).generate_content_async(request, stream=stream)
+            try:
+                # Fall back only before anything has been passed on
+                first = await asyncio.wait_for(
+                    responses.__anext__(), self.timeout_seconds
+                )
+            except StopAsyncIteration:
+                metrics.record_tier_call(
+                    self.tier, model, time.monotonic() - started_at
+                )
+                _record_outcome(model, failed=False)
+                return
+            except Exception as e:
+                await responses.aclose()
+                metrics.record_tier_call(
+                    self.tier, model, time.monotonic() - started_at, error=True
+                )
+                _record_outcome(model, failed=True)
+                last_error = (
+                    TimeoutError(f"No response from {model} in {self.timeout_seconds}s")
+                    if isinstance(e, asyncio.TimeoutError)
+                    else e
+                )
+                continue
+
+            error = True
+            try:
+                yield first
+                async for response in responses:
+                    yield response
+                error = False
+            except GeneratorExit:
+                # The caller stopped reading; not a model failure
+                error = False
+                raise
+            finally:
+                metrics.record_tier_call(
+                    self.tier, model, time.monotonic() - started_at, error=error
+                )
+                _record_outcome(model, failed=error)
+            return
+
+        raise last_error
+
+
+def model_for(agent_name: str) -> RoutedLlm:
+    """
+    Build the model an agent should use, from its configured tier.
+
+    Args:
+        agent_name: The agent's name, as listed in AGENT_MODEL_TIERS
+
+    Returns:
+        RoutedLlm: The tier's model with fallback
+    """
+    config = routing_config()
+    tier = config["agents"].get(agent_name, config["default_tier"])
+    models = config["tiers"][tier]
+    return RoutedLlm(
+        model=models[0],
+        tier=tier,
+        models=models,
+        timeout_seconds=config["timeout_seconds"].get(tier),
+    )
@@ -0,0 +1,265 @@
+"""
+Post-processing of generated thumbnails to YouTube delivery specs.
+
+Resizing and encoding are CPU-bound, so they run in a process pool and are
+awaited from the agent's event loop instead of blocking it.
+
+The workers are spawned rather than forked: the agent process already runs
+threads (the asset writer, the image job queue, context cache creation), and
+a forked copy of it can inherit a lock one of them held.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from ..constants import (
+    POSTPROCESS_WORKERS,
+    THUMBNAIL_PREVIEW_MAX_BYTES,
+    THUMBNAIL_PREVIEW_SIZE,
+    YOUTUBE_THUMBNAIL_MAX_BYTES,
+    YOUTUBE_THUMBNAIL_SIZE,
+)
+from .file_io import write_bytes_atomic
+
+logger = logging.getLogger(__name__)
+
+_FORMATS = {
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "webp": ("WEBP", "webp", "image/webp"),
+}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+# Job that starts the first worker, from warm_process_pool
+_warm_up: Optional[Future] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared post-processing pool, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=POSTPROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def _discard_broken_pool(error: BaseException) -> None:
+    """Drop a pool whose workers died, so the next job starts a new one."""
+    global _process_pool
+    if isinstance(error, BrokenProcessPool) and _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _worker_ready() -> None:
+    """No-op job that makes the pool start a worker."""
+
+
+def warm_process_pool() -> None:
+    """
+    Start a post-processing worker in the background, once per process.
+
+    A spawned worker imports the main module before it takes its first job,
+    which takes seconds for the agent CLI. Starting one while a thumbnail is
+    still rendering keeps that off the export; more start as jobs need them.
+    A warm-up that failed is retried on the next call.
+    """
+    global _warm_up
+    if _warm_up is not None and not (_warm_up.done() and _warm_up.exception()):
+        return
+    try:
+        _warm_up = get_process_pool().submit(_worker_ready)
+    except BrokenProcessPool as e:
+        _discard_broken_pool(e)
+        _warm_up = get_process_pool().submit(_worker_ready)
+
+
+def crop_to_aspect(image: Image.Image, target_size: Tuple[int, int]) -> Image.Image:
+    """
+    Center-crop an image to the aspect ratio of target_size, then resize to it.
+
+    Args:
+        image: Source image
+        target_size: (width, height) to produce
+
+    Returns:
+        Image.Image: The cropped and resized image
+    """
+    target_width, target_height = target_size
+    width, height = image.size
+    target_ratio = target_width / target_height
+
+    if width / height > target_ratio:
+        # Too wide - trim the sides
+        new_width = round(height * target_ratio)
+        left = (width - new_width) // 2
+        image = image.crop((left, 0, left + new_width, height))
+    else:
+        # Too tall - trim the top and bottom
+        new_height = round(width / target_ratio)
+        top = (height - new_height) // 2
+        image = image.crop((0, top, width, top + new_height))
+
+    return image.resize(target_size, Image.LANCZOS)
+
+
+def encode_to_budget(
+    image: Image.Image,
+    image_format: str,
+    max_bytes: int,
+    min_quality: int = 40,
+    max_quality: int = 95,
+) -> Tuple[bytes, int]:
+    """
+    Encode an image at the highest quality that fits within max_bytes.
+
+    Quality is found with a binary search, so at most a handful of encodes run.
+
+    Args:
+        image: Image to encode
+        image_format: Pillow format name ("JPEG" or "WEBP")
+        max_bytes: Byte budget for the encoded image
+        min_quality: Lowest quality to try
+        max_quality: Highest quality to try
+
+    Returns:
+        Tuple[bytes, int]: Encoded data and the quality used. If even the lowest
+        quality exceeds the budget, the lowest-quality encoding is returned.
+    """
+
+    def encode(quality: int) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+        return buffer.getvalue()
+
+    best = None
+    low, high = min_quality, max_quality
+    while low <= high:
+        quality = (low + high) // 2
+        data = encode(quality)
+        if len(data) <= max_bytes:
+            best = (data, quality)
+            low = quality + 1
+        else:
+            high = quality - 1
+
+    if best is None:
+        return encode(min_quality), min_quality
+    return best
+
+
+def prepare_youtube_delivery(
+    source_path: str,
+    output_dir: str,
+    image_format: str = "jpeg",
+    max_bytes: int = YOUTUBE_THUMBNAIL_MAX_BYTES,
+) -> Dict:
+    """
+    Produce the YouTube upload file and a small chat preview for a thumbnail.
+
+    Runs in a worker process, so it only takes and returns plain data.
+
+    Args:
+        source_path: Path to the generated thumbnail
+        output_dir: Directory to write the outputs to
+        image_format: "jpeg" or "webp"
+        max_bytes: Byte budget for the upload file
+
+    Returns:
+        dict: Paths, sizes and encode quality of the outputs
+    """
+    pil_format, extension, _ = _FORMATS[image_format]
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+
+    with Image.open(source_path) as source:
+        image = source.convert("RGB")
+
+    delivery = crop_to_aspect(image, YOUTUBE_THUMBNAIL_SIZE)
+    delivery_bytes, quality = encode_to_budget(delivery, pil_format, max_bytes)
+
+    preview = delivery.resize(THUMBNAIL_PREVIEW_SIZE, Image.LANCZOS)
+    preview_bytes, _ = encode_to_budget(
+        preview, pil_format, THUMBNAIL_PREVIEW_MAX_BYTES
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    width, height = YOUTUBE_THUMBNAIL_SIZE
+    delivery_path = os.path.join(
+        output_dir, f"{base_name}_{width}x{height}.{extension}"
+    )
+    preview_path = os.path.join(output_dir, f"{base_name}_preview.{extension}")
+    for path, data in ((delivery_path, delivery_bytes), (preview_path, preview_bytes)):
+        write_bytes_atomic(data, path)
+
+    return {
+        "delivery_path": delivery_path,
+        "delivery_bytes": len(delivery_bytes),
+        "delivery_quality": quality,
+        "within_budget": len(delivery_bytes) <= max_bytes,
+        "preview_path": preview_path,
+        "preview_bytes": len(preview_bytes),
+    }
+
+
+async def postprocess_for_youtube(
+    source_path: str,
+    output_dir: str,
+    image_format: str = "jpeg",
+    max_bytes: int = YOUTUBE_THUMBNAIL_MAX_BYTES,
+) -> Dict:
+    """
+    Run prepare_youtube_delivery in the process pool without blocking the loop.
+
+    Args:
+        source_path: Path to the generated thumbnail
+        output_dir: Directory to write the outputs to
+        image_format: "jpeg" or "webp"
+        max_bytes: Byte budget for the upload file
+
+    Returns:
+        dict: Paths, sizes and encode quality of the outputs
+    """
+    if image_format not in _FORMATS:
+        raise ValueError(
+            f"Unsupported format '{image_format}'. Use one of: {', '.join(_FORMATS)}"
+        )
+    global _warm_up
+    warm_up = _warm_up
+    if warm_up is not None:
+        # Use the worker that is starting instead of starting another one
+        try:
+            await asyncio.wrap_future(warm_up)
+        except Exception as e:
+            # The job below gets a fresh worker instead
+            logger.warning("Post-processing worker failed to start: %s", e)
+            if _warm_up is warm_up:
+                _warm_up = None
+                _discard_broken_pool(e)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            get_process_pool(),
+            prepare_youtube_delivery,
+            source_path,
+            output_dir,
+            image_format,
+            max_bytes,
+        )
+    except BrokenProcessPool as e:
+        # Let later exports start over with a new pool
+        _discard_broken_pool(e)
+        raise
+
+
+def mime_type_for(image_format: str) -> str:
+    """Return the MIME type for a supported delivery format."""
+    return _FORMATS[image_format][2]
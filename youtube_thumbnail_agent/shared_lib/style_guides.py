@@ -0,0 +1,325 @@
+"""
+Versioned per-channel style guides, refreshed incrementally.
+
+Every style guide written for a channel is kept in the channel's checkpoint as
+a new version, together with the thumbnails (by image hash) it covers and how
+it was produced. When the channel is analyzed again, the StyleGuideGenerator
+only does as much work as the new thumbnails require:
+
+- no new thumbnails: the latest version is reused
+- a few new thumbnails (at most STYLE_GUIDE_DELTA_MAX_NEW_FRACTION of them)
+  whose colors, brightness, contrast and saturation fall within those of the
+  covered thumbnails: the latest version's measured statistics are updated
+  locally, without a model call ("stats")
+- a few new thumbnails that don't: the model updates the latest version from
+  the new analyses alone, with a short update instruction ("delta")
+- otherwise, or for a new channel: a full pass over every analysis ("full")
+
+Every version ends with a "Measured statistics" section computed from the
+thumbnail images themselves. The callbacks below run on the event loop, so the
+scraper measures each thumbnail ahead of time (measure_thumbnail_stats, on a
+worker thread) and the callbacks only aggregate the checkpointed statistics.
+That worker is also where image_features, and with it NumPy, is first imported.
+Each new version is added to the style index on a background thread.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from ..constants import STYLE_GUIDE_DELTA_MAX_NEW_FRACTION, STYLE_GUIDE_VERSIONS_KEPT
+from .blob_store import put_blob, resolve_blobs
+from .checkpoints import checkpointed_thumbnail, load_checkpoint, update_checkpoint
+from .generation_cache import hash_file
+from .workspace import get_workspace
+
+logger = logging.getLogger(__name__)
+
+STATS_HEADING = "## Measured statistics"
+
+# Style index updates run one at a time, off the event loop
+_index_executor: Optional[ThreadPoolExecutor] = None
+
+
+def style_guide_versions(channel: str) -> List[Dict]:
+    """
+    List the kept versions of a channel's style guide, oldest first.
+
+    Args:
+        channel: Channel ID or handle
+
+    Returns:
+        List[Dict]: Versions with "version", "value" (text or blob handle),
+            "thumbnails" (image hashes covered), "mode" and "created_at"
+    """
+    return load_checkpoint(channel).get("style_guides", [])
+
+
+def latest_style_guide(channel: str) -> Optional[Dict]:
+    """
+    Get the latest version of a channel's style guide.
+
+    Args:
+        channel: Channel ID or handle
+
+    Returns:
+        Optional[Dict]: The latest version, or None if there is none
+    """
+    versions = style_guide_versions(channel)
+    return versions[-1] if versions else None
+
+
+def _image_stats(channel: str, paths: Dict[str, str]) -> Dict[str, Dict]:
+    """Statistics of thumbnails by image hash, measuring only unknown ones."""
+    from .image_features import thumbnail_stats
+
+    known = load_checkpoint(channel).get("image_stats", {})
+    measured = {
+        digest: thumbnail_stats(path)
+        for digest, path in paths.items()
+        if digest not in known
+    }
+    if measured:
+
+        def update(checkpoint: Dict) -> None:
+            checkpoint.setdefault("image_stats", {}).update(measured)
+
+        update_checkpoint(channel, update)
+    return {**known, **measured}
+
+
+def measure_thumbnail_stats(channel: str, thumbnail_paths: List[str]) -> None:
+    """
+    Measure and checkpoint the statistics of a channel's thumbnails.
+
+    Call it from a worker thread once the thumbnails are scraped, so the style
+    guide callbacks find every thumbnail already measured.
+
+    Args:
+        channel: Channel ID or handle
+        thumbnail_paths: Paths of the thumbnails
+    """
+    try:
+        _image_stats(channel, {hash_file(path): path for path in thumbnail_paths})
+    except (OSError, ValueError) as e:
+        logger.warning("Could not measure the thumbnails of %s: %s", channel, e)
+
+
+def _with_stats(text: str, aggregate: Dict) -> str:
+    """Replace a style guide's measured statistics section."""
+    from .image_features import format_stats
+
+    guide = text.split(STATS_HEADING)[0].rstrip()
+    return (
+        f"{guide}\n\n{STATS_HEADING}\n"
+        f"Measured from {aggregate['count']} thumbnail images.\n"
+        f"{format_stats(aggregate)}\n"
+    )
+
+
+def save_style_guide_version(
+    channel: str, style_guide: str, paths: Dict[str, str], mode: str
+) -> Dict:
+    """
+    Add a version of a channel's style guide, with fresh measured statistics.
+
+    Args:
+        channel: Channel ID or handle
+        style_guide: The style guide text, or its blob handle
+        paths: Thumbnail paths by image hash, for the thumbnails it covers
+        mode: How it was produced: "full", "delta" or "stats"
+
+    Returns:
+        Dict: The new version
+    """
+    from .image_features import aggregate_stats
+
+    stats = _image_stats(channel, paths)
+    text = _with_stats(
+        resolve_blobs(style_guide),
+        aggregate_stats([stats[digest] for digest in paths]),
+    )
+    latest = latest_style_guide(channel)
+    version: Dict = {
+        "version": latest["version"] + 1 if latest else 1,
+        "value": put_blob(text),
+        "thumbnails": sorted(paths),
+        "mode": mode,
+        "created_at": time.time(),
+    }
+
+    def update(checkpoint: Dict) -> None:
+        versions = checkpoint.setdefault("style_guides", [])
+        version["version"] = versions[-1]["version"] + 1 if versions else 1
+        versions.append(version)
+        del versions[:-STYLE_GUIDE_VERSIONS_KEPT]
+
+    update_checkpoint(channel, update)
+    logger.info(
+        "Saved %s style guide version %d for %s", mode, version["version"], channel
+    )
+
+    # The session's workspace may be gone by the time the index is updated
+    index_paths = [
+        checkpointed_thumbnail(channel, digest) or path
+        for digest, path in paths.items()
+    ]
+    submit_style_indexing(channel, index_paths, text, version["version"])
+    return version
+
+
+def _index_style(
+    channel: str, thumbnail_paths: List[str], style_guide: str, version: int
+) -> None:
+    # Imported here: the style index needs NumPy
+    from .style_index import index_channel_style
+
+    try:
+        index_channel_style(channel, thumbnail_paths, style_guide, version)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not index the style of %s: %s", channel, e)
+
+
+def submit_style_indexing(
+    channel: str, thumbnail_paths: List[str], style_guide: str, version: int
+) -> Future:
+    """
+    Queue a style guide version to be added to the style index.
+
+    Args:
+        channel: Channel ID or handle
+        thumbnail_paths: Paths of the thumbnails the style guide covers
+        style_guide: The style guide text
+        version: The style guide's version number
+
+    Returns:
+        Future: Completes once the index is updated
+    """
+    global _index_executor
+    if _index_executor is None:
+        _index_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="style-index"
+        )
+    return _index_executor.submit(
+        _index_style, channel, thumbnail_paths, style_guide, version
+    )
+
+
+def _thumbnail_paths(
+    callback_context: CallbackContext, analyses: Dict[str, str]
+) -> Dict[str, str]:
+    """Paths of the session's analyzed thumbnails, by image hash."""
+    ref_dir = get_workspace(callback_context).reference_images
+    paths = {}
+    for filename in analyses:
+        path = os.path.join(ref_dir, filename)
+        if os.path.exists(path):
+            paths[hash_file(path)] = path
+    return paths
+
+
+def _skip(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def refresh_style_guide_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """
+    Callback that executes before the style guide agent runs.
+    Decides how much of the channel's latest style guide can be kept (see
+    the module docstring). Reuses or updates it without running the agent
+    when possible; otherwise sets state["new_thumbnail_analysis"] to the
+    analyses the agent should merge into it, or empties it for a full pass.
+
+    Args:
+        callback_context: The callback context
+
+    Returns:
+        Optional[types.Content]: A note about the kept style guide to skip
+            the agent, or None to run it
+    """
+    state = callback_context.state
+    channel = state.get("channel")
+    analyses = state.get("thumbnail_analysis") or {}
+    latest = latest_style_guide(channel) if channel else None
+    if state.get("new_thumbnail_analysis"):
+        state["new_thumbnail_analysis"] = {}
+    if latest is None or not analyses or not all(analyses.values()):
+        return None
+
+    paths = _thumbnail_paths(callback_context, analyses)
+    new = {
+        digest: path
+        for digest, path in paths.items()
+        if digest not in latest["thumbnails"]
+    }
+    if not new:
+        state["style_guide"] = latest["value"]
+        return _skip(
+            f"Reused version {latest['version']} of the style guide; "
+            "there are no new thumbnails."
+        )
+    if len(new) > STYLE_GUIDE_DELTA_MAX_NEW_FRACTION * len(paths):
+        return None
+
+    from .image_features import aggregate_stats, fits_stats
+
+    stats = _image_stats(channel, paths)
+    covered = [stats[digest] for digest in latest["thumbnails"] if digest in stats]
+    aggregate = aggregate_stats(covered) if covered else None
+    if aggregate and all(fits_stats(stats[digest], aggregate) for digest in new):
+        version = save_style_guide_version(channel, latest["value"], paths, "stats")
+        state["style_guide"] = version["value"]
+        return _skip(
+            f"Updated the style guide to version {version['version']} from "
+            f"measured statistics; the {len(new)} new thumbnail(s) match the "
+            "existing style."
+        )
+
+    # The agent merges only the new analyses into the latest version
+    new_files = {os.path.basename(path) for path in new.values()}
+    state["style_guide"] = latest["value"]
+    state["new_thumbnail_analysis"] = {
+        filename: analysis
+        for filename, analysis in analyses.items()
+        if filename in new_files
+    }
+    return None
+
+
+def save_style_guide_version_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """
+    Callback that executes after the style guide agent runs.
+    Saves the style guide it wrote as a new version for the channel, with
+    measured statistics appended, and puts that version in state.
+
+    Args:
+        callback_context: The callback context
+
+    Returns:
+        Optional[types.Content]: None to keep the agent's output
+    """
+    state = callback_context.state
+    channel = state.get("channel")
+    analyses = state.get("thumbnail_analysis") or {}
+    if not channel or not state.get("style_guide") or not analyses:
+        return None
+
+    mode = "delta" if state.get("new_thumbnail_analysis") else "full"
+    version = save_style_guide_version(
+        channel,
+        state["style_guide"],
+        _thumbnail_paths(callback_context, analyses),
+        mode,
+    )
+    state["style_guide"] = version["value"]
+    state["new_thumbnail_analysis"] = {}
+    return None
@@ -0,0 +1,367 @@
+"""
+On-disk vector index of analyzed channel styles.
+
+Every channel with a style guide has one entry: a vector describing the look
+of its thumbnails (see image_vectors.image_vector) and the wording of its
+latest style guide (image_vectors.text_vector), along with that style guide.
+A lookup by channel, or by a description such as "like MrBeast but darker",
+returns the stored style guides of the nearest channels, so a known or
+near-identical style can be reused without scraping and analyzing again.
+
+Search is exact cosine similarity over every entry with NumPy. Indexes with
+more than STYLE_INDEX_EXACT_MAX entries use approximate search instead:
+random-hyperplane (LSH) signatures pick the entries that differ from the
+query in at most a few signature bits in any of STYLE_INDEX_LSH_TABLES
+tables, and only those are scored exactly.
+
+Importing this module imports NumPy; import it inside the functions that need
+it so the agent tree starts without it.
+"""
+
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..constants import (
+    STYLE_INDEX_EXACT_MAX,
+    STYLE_INDEX_IMAGE_WEIGHT,
+    STYLE_INDEX_LSH_BITS,
+    STYLE_INDEX_LSH_MAX_RADIUS,
+    STYLE_INDEX_LSH_TABLES,
+    STYLE_INDEX_PATH,
+    STYLE_TEXT_DIMS,
+)
+from .blob_store import put_blob
+from .checkpoints import channel_aliases, channel_key
+from .file_io import write_bytes_atomic
+from .image_vectors import IMAGE_VECTOR_DIMS, image_vector, text_vector
+
+logger = logging.getLogger(__name__)
+
+# Vector blocks: thumbnail looks, then style guide wording
+_BLOCKS = {
+    "image": slice(0, IMAGE_VECTOR_DIMS),
+    "text": slice(IMAGE_VECTOR_DIMS, IMAGE_VECTOR_DIMS + STYLE_TEXT_DIMS),
+}
+_WEIGHTS = {"image": STYLE_INDEX_IMAGE_WEIGHT, "text": 1 - STYLE_INDEX_IMAGE_WEIGHT}
+VECTOR_DIMS = IMAGE_VECTOR_DIMS + STYLE_TEXT_DIMS
+
+# Fixed hyperplanes, so signatures are the same in every process
+_rng = np.random.default_rng(20240611)
+_HYPERPLANES = {
+    block: _rng.standard_normal(
+        (STYLE_INDEX_LSH_TABLES, STYLE_INDEX_LSH_BITS, part.stop - part.start)
+    ).astype(np.float32)
+    for block, part in _BLOCKS.items()
+}
+_BIT_VALUES = 1 << np.arange(STYLE_INDEX_LSH_BITS)
+# Bits to flip in a signature to probe the buckets at each Hamming distance
+_FLIPS = [
+    [
+        sum(1 << bit for bit in bits)
+        for bits in combinations(range(STYLE_INDEX_LSH_BITS), radius)
+    ]
+    for radius in range(STYLE_INDEX_LSH_MAX_RADIUS + 1)
+]
+
+# Serializes read-modify-write updates of the index file in this process
+_lock = threading.Lock()
+_cached: Optional["StyleIndex"] = None
+_cached_mtime: Optional[float] = None
+
+
+def style_vector(
+    thumbnail_paths: Optional[List[str]] = None, text: Optional[str] = None
+) -> Optional[np.ndarray]:
+    """
+    Build an index vector from thumbnails, text, or both.
+
+    Args:
+        thumbnail_paths: Paths of a channel's thumbnails
+        text: A style guide or a free-text style description
+
+    Returns:
+        Optional[np.ndarray]: The vector, with zeros for the missing part,
+            or None if neither part could be built
+    """
+    parts = {
+        "image": image_vector(thumbnail_paths) if thumbnail_paths else None,
+        "text": text_vector(text) if text else None,
+    }
+    if all(part is None for part in parts.values()):
+        return None
+    vector = np.zeros(VECTOR_DIMS, dtype=np.float32)
+    for block, part in parts.items():
+        if part is not None:
+            vector[_BLOCKS[block]] = part
+    return vector
+
+
+def _signatures(vectors: np.ndarray) -> np.ndarray:
+    """LSH signatures of vectors, shaped (entries, blocks, tables)."""
+    return np.stack(
+        [
+            (np.einsum("tbd,nd->ntb", _HYPERPLANES[block], vectors[:, part]) > 0)
+            @ _BIT_VALUES
+            for block, part in _BLOCKS.items()
+        ],
+        axis=1,
+    )
+
+
+class StyleIndex:
+    """
+    Entries of the style index, with their vectors and LSH signatures.
+
+    Each entry is a dict with "channel", "style_guide" (text or blob handle),
+    "version", "thumbnails" (how many thumbnails it was built from) and
+    "updated_at". Row i of vectors belongs to entry i.
+    """
+
+    def __init__(
+        self,
+        entries: Optional[List[Dict]] = None,
+        vectors: Optional[np.ndarray] = None,
+    ):
+        self.entries = entries or []
+        self.vectors = (
+            vectors
+            if vectors is not None
+            else np.zeros((0, VECTOR_DIMS), dtype=np.float32)
+        )
+        self.signatures = _signatures(self.vectors)
+        self._buckets: Optional[List[List[Dict[int, List[int]]]]] = None
+        self._rows: Dict[str, int] = {}
+        self._rows_aliases: Optional[Dict[str, str]] = None
+        self._index_rows()
+
+    def _index_rows(self) -> Dict[str, int]:
+        """Rows by channel key; built again only when channel aliases change."""
+        aliases = channel_aliases()
+        if aliases is not self._rows_aliases:
+            self._rows = {}
+            for row, entry in enumerate(self.entries):
+                self._rows.setdefault(channel_key(entry["channel"]), row)
+            self._rows_aliases = aliases
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path: str = STYLE_INDEX_PATH) -> "StyleIndex":
+        """
+        Read an index file.
+
+        Args:
+            path: Path of the index file
+
+        Returns:
+            StyleIndex: The index, or an empty one if there is no usable file
+        """
+        try:
+            with np.load(path) as data:
+                entries = json.loads(str(data["entries"]))
+                vectors = data["vectors"]
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable style index %s: %s", path, e)
+            return cls()
+        if vectors.shape != (len(entries), VECTOR_DIMS):
+            logger.warning("Ignoring style index %s built for other vectors", path)
+            return cls()
+        return cls(entries, vectors)
+
+    def save(self, path: str = STYLE_INDEX_PATH) -> None:
+        """
+        Write the index file atomically.
+
+        Args:
+            path: Path of the index file
+        """
+        buffer = io.BytesIO()
+        np.savez(
+            buffer, entries=np.array(json.dumps(self.entries)), vectors=self.vectors
+        )
+        write_bytes_atomic(buffer.getvalue(), path)
+
+    def find(self, channel: str) -> Optional[int]:
+        """
+        Find the row of a channel.
+
+        Args:
+            channel: Channel ID or handle
+
+        Returns:
+            Optional[int]: The row, or None if the channel is not indexed
+        """
+        return self._index_rows().get(channel_key(channel))
+
+    def upsert(self, entry: Dict, vector: np.ndarray) -> None:
+        """
+        Add a channel's entry, or replace it if the channel is indexed.
+
+        Args:
+            entry: The entry, with at least "channel"
+            vector: Its vector, from style_vector
+        """
+        vector = vector.astype(np.float32)
+        row = self.find(entry["channel"])
+        if row is None:
+            self._rows[channel_key(entry["channel"])] = len(self.entries)
+            self.entries.append(entry)
+            self.vectors = np.vstack([self.vectors, vector])
+            self.signatures = np.concatenate(
+                [self.signatures, _signatures(vector[None])]
+            )
+        else:
+            self.entries[row] = entry
+            self.vectors[row] = vector
+            self.signatures[row] = _signatures(vector[None])[0]
+        self._buckets = None
+
+    def _lsh_buckets(self) -> List[List[Dict[int, List[int]]]]:
+        """Rows by signature, for each block and table; built on first use."""
+        if self._buckets is None:
+            self._buckets = [
+                [defaultdict(list) for _ in range(STYLE_INDEX_LSH_TABLES)]
+                for _ in _BLOCKS
+            ]
+            for row, signature in enumerate(self.signatures.tolist()):
+                for block, tables in enumerate(signature):
+                    for table, value in enumerate(tables):
+                        self._buckets[block][table][value].append(row)
+        return self._buckets
+
+    def _candidates(
+        self, query: np.ndarray, blocks: List[int], top_k: int
+    ) -> np.ndarray:
+        """Rows in the query's buckets, probing farther ones until top_k."""
+        signature = _signatures(query[None])[0]
+        buckets = self._lsh_buckets()
+        rows = set()
+        for flips in _FLIPS:
+            for block in blocks:
+                for table, value in enumerate(signature[block].tolist()):
+                    for flip in flips:
+                        rows.update(buckets[block][table].get(value ^ flip, ()))
+            if len(rows) >= top_k:
+                break
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = 3,
+        approximate: Optional[bool] = None,
+        exclude: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Find the entries most similar to a query vector.
+
+        Similarity is the cosine of each block the query has (thumbnail looks
+        and/or wording), weighted by STYLE_INDEX_IMAGE_WEIGHT.
+
+        Args:
+            query: Vector from style_vector
+            top_k: Most entries to return
+            approximate: Use LSH candidates instead of scoring every entry;
+                by default only above STYLE_INDEX_EXACT_MAX entries
+            exclude: Channel to leave out of the results
+
+        Returns:
+            List[Dict]: Matching entries, most similar first, each with a
+                "similarity" from -1 to 1
+        """
+        present = [name for name, part in _BLOCKS.items() if query[part].any()]
+        if not present or not self.entries:
+            return []
+        if approximate is None:
+            approximate = len(self) > STYLE_INDEX_EXACT_MAX
+
+        # One product scores every block the query has, weighted
+        weighted = np.zeros(VECTOR_DIMS, dtype=np.float32)
+        for name in present:
+            weighted[_BLOCKS[name]] = query[_BLOCKS[name]] * _WEIGHTS[name]
+        weighted /= sum(_WEIGHTS[name] for name in present)
+
+        excluded = self.find(exclude) if exclude else None
+        wanted = top_k + (excluded is not None)
+        if approximate:
+            blocks = [list(_BLOCKS).index(name) for name in present]
+            rows = self._candidates(query, blocks, wanted)
+            scores = self.vectors[rows] @ weighted
+        else:
+            rows = np.arange(len(self))
+            scores = self.vectors @ weighted
+        if len(rows) > wanted:
+            best = np.argpartition(-scores, wanted - 1)[:wanted]
+        else:
+            best = np.arange(len(rows))
+
+        results = []
+        for position in best[np.argsort(-scores[best])]:
+            if rows[position] == excluded:
+                continue
+            results.append(
+                {**self.entries[rows[position]], "similarity": float(scores[position])}
+            )
+        return results[:top_k]
+
+
+def load_style_index() -> StyleIndex:
+    """
+    Get the style index, reading the file only when it has changed.
+
+    Returns:
+        StyleIndex: The index; treat it as read-only
+    """
+    global _cached, _cached_mtime
+    try:
+        mtime = os.path.getmtime(STYLE_INDEX_PATH)
+    except OSError:
+        mtime = None
+    with _lock:
+        if _cached is None or mtime != _cached_mtime:
+            _cached, _cached_mtime = StyleIndex.load(), mtime
+        return _cached
+
+
+def index_channel_style(
+    channel: str, thumbnail_paths: List[str], style_guide: str, version: int
+) -> None:
+    """
+    Add or refresh a channel's entry in the style index.
+
+    Args:
+        channel: Channel ID or handle
+        thumbnail_paths: Paths of the thumbnails the style guide covers
+        style_guide: The style guide text
+        version: The style guide's version number
+    """
+    vector = style_vector(thumbnail_paths, style_guide)
+    if vector is None:
+        return
+    entry = {
+        "channel": channel,
+        "style_guide": put_blob(style_guide),
+        "version": version,
+        "thumbnails": len(thumbnail_paths),
+        "updated_at": time.time(),
+    }
+    global _cached, _cached_mtime
+    with _lock:
+        index = StyleIndex.load()
+        index.upsert(entry, vector)
+        index.save()
+        _cached, _cached_mtime = index, os.path.getmtime(STYLE_INDEX_PATH)
+    logger.info("Indexed the style of %s (%d channels)", channel, len(index))
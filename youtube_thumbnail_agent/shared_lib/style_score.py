@@ -0,0 +1,203 @@
+"""
+Local scores of how closely generated thumbnails match a channel's style.
+
+Each image is reduced to four features, and every candidate is compared with
+every reference thumbnail at once:
+
+- palette: its dominant colors, compared by the distance to the nearest
+  dominant color of the other image (both ways, weighted by share)
+- histogram: its color histogram, compared by histogram intersection
+- layout: its map of light and dark areas, compared by correlation
+- phash: a 64-bit perceptual hash (DCT of the grayscale image), compared by
+  Hamming distance
+
+Each comparison is a similarity from 0 to 1, and a candidate's score is their
+weighted mean (STYLE_SCORE_WEIGHTS) over the reference set. References are
+scored against each other the same way, and a candidate that scores less
+than STYLE_SCORE_REJECT_RATIO of that baseline is rejected.
+
+Importing this module imports NumPy; import it inside the functions that need
+it so the agent tree starts without it.
+"""
+
+import functools
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from ..constants import (
+    IMAGE_FEATURE_SIZE,
+    PALETTE_COLORS,
+    PHASH_SAMPLE_SIZE,
+    STYLE_SCORE_REJECT_RATIO,
+    STYLE_SCORE_WEIGHTS,
+)
+from .image_features import color_histogram, image_pixels, layout_map, palette
+
+# Side of the block of low DCT frequencies kept in a perceptual hash
+_PHASH_SIZE = 8
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix, so that dct(x) = matrix @ x."""
+    k, n = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_SAMPLE_SIZE)
+
+
+# Features of one image: "histogram", "colors", "shares", "layout" and "phash"
+ImageFeatures = Dict[str, np.ndarray]
+
+
+def _phash(gray: np.ndarray) -> np.ndarray:
+    """64-bit perceptual hash: low DCT frequencies above their median."""
+    low = (_DCT @ gray @ _DCT.T)[:_PHASH_SIZE, :_PHASH_SIZE].ravel()
+    # The DC term only reflects overall brightness
+    return low > np.median(low[1:])
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_features(path: str, mtime_ns: int, size: int) -> ImageFeatures:
+    with Image.open(path) as image:
+        # JPEG thumbnails can be decoded at a fraction of their size
+        image.draft("RGB", IMAGE_FEATURE_SIZE)
+        rgb = image.convert("RGB")
+    pixels = image_pixels(rgb)
+    gray = np.asarray(
+        rgb.convert("L").resize((PHASH_SAMPLE_SIZE, PHASH_SAMPLE_SIZE)),
+        dtype=np.float32,
+    )
+    layout = layout_map(pixels).ravel()
+    layout = layout - layout.mean()
+    # Every image gets PALETTE_COLORS colors, so the features stack
+    colors, shares = palette(pixels)
+    padding = PALETTE_COLORS - len(shares)
+    colors = np.pad(colors, ((0, padding), (0, 0)), mode="edge")
+    shares = np.pad(shares, (0, padding), mode="edge")
+    return {
+        "histogram": color_histogram(pixels),
+        "colors": colors,
+        "shares": shares,
+        "layout": layout / max(np.linalg.norm(layout), 1e-6),
+        "phash": _phash(gray),
+    }
+
+
+def image_features(path: str) -> ImageFeatures:
+    """
+    Compute the features of an image, reusing them while the file is unchanged.
+
+    Args:
+        path: Path to the image
+
+    Returns:
+        ImageFeatures: The image's features
+    """
+    stat = os.stat(path)
+    return _cached_features(path, stat.st_mtime_ns, stat.st_size)
+
+
+def _stack(features: List[ImageFeatures]) -> Dict[str, np.ndarray]:
+    return {key: np.stack([item[key] for item in features]) for key in features[0]}
+
+
+def similarities(
+    a: List[ImageFeatures], b: List[ImageFeatures]
+) -> Dict[str, np.ndarray]:
+    """
+    Compare every image of one set with every image of another.
+
+    Args:
+        a: Features of the first set
+        b: Features of the second set
+
+    Returns:
+        Dict[str, np.ndarray]: A (len(a), len(b)) matrix of similarities from
+            0 to 1 per feature in STYLE_SCORE_WEIGHTS
+    """
+    a, b = _stack(a), _stack(b)
+
+    # Distance between every pair of palette colors, from 0 to 1
+    distances = np.linalg.norm(
+        a["colors"][:, None, :, None] - b["colors"][None, :, None, :], axis=-1
+    ) / np.sqrt(3)
+    # Share-weighted distance to the other image's nearest dominant color
+    a_to_b = (distances.min(axis=3) * a["shares"][:, None]).sum(-1)
+    a_to_b /= a["shares"].sum(-1)[:, None]
+    b_to_a = (distances.min(axis=2) * b["shares"][None]).sum(-1)
+    b_to_a /= b["shares"].sum(-1)[None]
+
+    return {
+        "palette": 1 - (a_to_b + b_to_a) / 2,
+        "histogram": np.minimum(a["histogram"][:, None], b["histogram"][None]).sum(-1),
+        "layout": (a["layout"] @ b["layout"].T + 1) / 2,
+        "phash": 1 - (a["phash"][:, None] != b["phash"][None]).mean(-1),
+    }
+
+
+def _weighted(matrices: Dict[str, np.ndarray]) -> np.ndarray:
+    total = sum(STYLE_SCORE_WEIGHTS.values())
+    return sum(STYLE_SCORE_WEIGHTS[name] * matrices[name] for name in matrices) / total
+
+
+def reference_baseline(references: List[ImageFeatures]) -> Optional[float]:
+    """
+    Score the reference thumbnails against each other.
+
+    Args:
+        references: Features of the reference thumbnails
+
+    Returns:
+        Optional[float]: Their mean score against the other references, or
+            None with fewer than two references
+    """
+    if len(references) < 2:
+        return None
+    scores = _weighted(similarities(references, references))
+    return float(scores[~np.eye(len(references), dtype=bool)].mean())
+
+
+def score_images(candidate_paths: List[str], reference_paths: List[str]) -> List[Dict]:
+    """
+    Score generated images against a set of reference thumbnails.
+
+    Args:
+        candidate_paths: Paths of the generated images
+        reference_paths: Paths of the reference thumbnails
+
+    Returns:
+        List[Dict]: One result per candidate, in order, with "score" and the
+            mean similarity per feature (0 to 1), "phash_distance" (bits to
+            the nearest reference), the references' "baseline" score and
+            whether the candidate is "rejected"
+    """
+    references = [image_features(path) for path in reference_paths]
+    candidates = [image_features(path) for path in candidate_paths]
+    matrices = similarities(candidates, references)
+    scores = _weighted(matrices).mean(axis=1)
+    baseline = reference_baseline(references)
+    phash_bits = _PHASH_SIZE**2
+    nearest = np.rint((1 - matrices["phash"].max(axis=1)) * phash_bits)
+
+    return [
+        {
+            "score": round(float(scores[row]), 3),
+            **{
+                name: round(float(matrix[row].mean()), 3)
+                for name, matrix in matrices.items()
+            },
+            "phash_distance": int(nearest[row]),
+            "baseline": round(baseline, 3) if baseline is not None else None,
+            "rejected": bool(
+                baseline is not None
+                and scores[row] < STYLE_SCORE_REJECT_RATIO * baseline
+            ),
+        }
+        for row in range(len(candidate_paths))
+    ]
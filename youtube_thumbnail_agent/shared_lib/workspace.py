@@ -0,0 +1,192 @@
+"""
+Per-session image workspaces.
+
+Every session gets its own directory tree under SESSION_WORKSPACES_DIR, so
+fixed filenames like youtube_thumbnail.png or channel_thumbnail_1.jpg never
+collide between users served by the same process.
+
+The batch runner deletes a job's workspace as soon as the job's outputs are
+collected. ADK has no hook for the end of an interactive session, so those
+workspaces are only reclaimed by the stale workspace sweep, once they have
+been unused for SESSION_WORKSPACE_TTL_SECONDS. The sweep runs on a background
+thread, at most every ten minutes, when a workspace is resolved.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+from ..constants import (
+    GENERATED_RENDERS_SUBDIR,
+    GENERATED_THUMBNAILS_SUBDIR,
+    REFERENCE_IMAGES_SUBDIR,
+    SESSION_WORKSPACE_TTL_SECONDS,
+    SESSION_WORKSPACES_DIR,
+    THUMBNAIL_ASSETS_SUBDIR,
+)
+from .catalog import remove_images_under
+
+# Used when no tool or callback context is available (e.g. scripts and tests)
+DEFAULT_SESSION_ID = "default"
+
+# How often the stale workspace sweep runs at most
+_SWEEP_INTERVAL_SECONDS = 10 * 60
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+class SessionWorkspace(NamedTuple):
+    """Directories that make up one session's workspace."""
+
+    session_id: str
+    root: str
+    reference_images: str
+    assets: str
+    generated: str
+    renders: str
+
+
+def get_session_id(context: Optional[Any]) -> str:
+    """
+    Resolve the session ID from a ToolContext or CallbackContext.
+
+    Args:
+        context: The tool or callback context, or None
+
+    Returns:
+        str: The session ID, or DEFAULT_SESSION_ID without a context
+    """
+    if context is None:
+        return DEFAULT_SESSION_ID
+    invocation_context = getattr(context, "_invocation_context", None)
+    session = getattr(invocation_context, "session", None)
+    return getattr(session, "id", None) or DEFAULT_SESSION_ID
+
+
+def _workspace_root(session_id: str) -> str:
+    # Session IDs come from clients, so keep them to safe path characters
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id or DEFAULT_SESSION_ID)
+    if safe_id != session_id or not safe_id.strip("."):
+        # Changed or dot-only IDs ("..", ".") get a hash, so they can neither
+        # point outside the workspaces nor collide with another session's
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:16]
+        safe_id = f"{safe_id.strip('.') or 'session'}-{digest}"
+    return os.path.join(SESSION_WORKSPACES_DIR, safe_id)
+
+
+def _is_workspace_root(path: str) -> bool:
+    """Whether path is a directory directly inside SESSION_WORKSPACES_DIR."""
+    parent = os.path.realpath(SESSION_WORKSPACES_DIR)
+    return os.path.dirname(os.path.realpath(path)) == parent
+
+
+def workspace_for_session(session_id: str) -> SessionWorkspace:
+    """
+    Return the workspace for a session ID, creating its directories if needed.
+
+    Args:
+        session_id: The session ID
+
+    Returns:
+        SessionWorkspace: The session's directories
+    """
+    root = _workspace_root(session_id)
+    workspace = SessionWorkspace(
+        session_id=session_id,
+        root=root,
+        reference_images=os.path.join(root, REFERENCE_IMAGES_SUBDIR),
+        assets=os.path.join(root, THUMBNAIL_ASSETS_SUBDIR),
+        generated=os.path.join(root, GENERATED_THUMBNAILS_SUBDIR),
+        renders=os.path.join(root, GENERATED_RENDERS_SUBDIR),
+    )
+    for directory in workspace[2:]:
+        os.makedirs(directory, exist_ok=True)
+
+    # Mark the workspace as in use for the stale workspace sweep
+    os.utime(root)
+    _maybe_sweep_stale_workspaces()
+    return workspace
+
+
+def get_workspace(context: Optional[Any]) -> SessionWorkspace:
+    """
+    Return the workspace for the session of a tool or callback context.
+
+    Args:
+        context: The tool or callback context, or None
+
+    Returns:
+        SessionWorkspace: The session's directories
+    """
+    return workspace_for_session(get_session_id(context))
+
+
+def cleanup_session_workspace(session_id: str) -> bool:
+    """
+    Delete a session's workspace. Call this when a session ends.
+
+    Args:
+        session_id: The session ID
+
+    Returns:
+        bool: True if a workspace was removed
+    """
+    root = _workspace_root(session_id)
+    if not os.path.isdir(root) or not _is_workspace_root(root):
+        return False
+    shutil.rmtree(root, ignore_errors=True)
+    remove_images_under(root)
+    return True
+
+
+def cleanup_stale_workspaces(
+    max_age_seconds: float = SESSION_WORKSPACE_TTL_SECONDS,
+) -> int:
+    """
+    Delete workspaces that have not been used for max_age_seconds.
+
+    Catches sessions that ended without an explicit cleanup.
+
+    Args:
+        max_age_seconds: Age after which an unused workspace is removed
+
+    Returns:
+        int: Number of workspaces removed
+    """
+    if not os.path.isdir(SESSION_WORKSPACES_DIR):
+        return 0
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for name in os.listdir(SESSION_WORKSPACES_DIR):
+        root = os.path.join(SESSION_WORKSPACES_DIR, name)
+        try:
+            if (
+                os.path.isdir(root)
+                and _is_workspace_root(root)
+                and os.path.getmtime(root) < cutoff
+            ):
+                shutil.rmtree(root, ignore_errors=True)
+                remove_images_under(root)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def _maybe_sweep_stale_workspaces() -> None:
+    global _last_sweep
+    with _sweep_lock:
+        now = time.time()
+        if now - _last_sweep < _SWEEP_INTERVAL_SECONDS:
+            return
+        _last_sweep = now
+    # Workspaces are resolved from tools and callbacks on the event loop; keep
+    # the scan and the deletions off their thread
+    threading.Thread(
+        target=cleanup_stale_workspaces, name="stale-workspace-cleanup", daemon=True
+    ).start()
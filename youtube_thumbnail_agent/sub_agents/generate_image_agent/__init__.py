@@ -2,4 +2,11 @@
 Image generation agent for YouTube thumbnails.
 """
 
-from .agent import generate_image_agent
+import importlib
+
+
+def __getattr__(name):
+    # Build the agent on first access, not when a tool module is imported
+    if name == "generate_image_agent":
+        return importlib.import_module(".agent", __name__).generate_image_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,4 +2,8 @@
 Image generation and editing tools for YouTube thumbnails.
 """
 
-from .create_image import create_image
+from .create_image import create_image, create_image_async
+from .edit_thumbnail_region import edit_thumbnail_region
+from .export_thumbnail import export_thumbnail
+from .image_jobs import check_image_job, submit_image_job
+from .render_final_thumbnail import render_final_thumbnail
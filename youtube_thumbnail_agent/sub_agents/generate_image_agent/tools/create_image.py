@@ -1,294 +1,637 @@
 """
-Tool for creating images using OpenAI's image generation API with asset incorporation.
+Tool for creating images with the configured image backend and asset incorporation.
+
+Each render is decoded once into its own file, and youtube_thumbnail.png and
+cache entries are hard links to it. The artifact still holds an inline copy of
+the image unless IMAGE_ARTIFACTS_BY_REFERENCE is enabled (it is off by
+default), so only then does the image stay out of memory after rendering.
 """
 
-import base64
-import glob
+import asyncio
+import logging
 import os
-from typing import Dict, Optional
+import pathlib
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import google.genai.types as types
 from google.adk.tools.tool_context import ToolContext
-from openai import OpenAI
 
 from ....constants import (
-    GENERATED_THUMBNAILS_DIR,
-    IMAGE_ROOT_DIR,
-    THUMBNAIL_ASSETS_DIR,
+    IMAGE_ARTIFACTS_BY_REFERENCE,
+    IMAGE_GENERATION_TIMEOUT_SECONDS,
+    THUMBNAIL_DRAFT_QUALITY,
+    THUMBNAIL_FINAL_QUALITY,
     THUMBNAIL_IMAGE_SIZE,
+    THUMBNAIL_MAX_CANDIDATES,
+)
+from ....shared_lib.asset_writer import wait_for_pending_asset_writes
+from ....shared_lib.catalog import query_images, record_image
+from ....shared_lib.file_io import link_atomic, write_base64_atomic
+from ....shared_lib.generation_cache import (
+    get_cache_stats,
+    get_cached_image,
+    make_cache_key,
+    store_cached_image,
 )
+from ....shared_lib.image_backends import ImageBackend, get_image_backend
+from ....shared_lib.postprocess import warm_process_pool
+from ....shared_lib.workspace import get_session_id, get_workspace
+
+logger = logging.getLogger(__name__)
 
 
 def create_image(
     prompt: str,
+    draft: bool = False,
+    use_cache: bool = False,
+    candidates: int = 1,
     tool_context: Optional[ToolContext] = None,
 ) -> Dict:
     """
-    Create an image using OpenAI's image generation API with gpt-image-1 model,
-    automatically incorporating any assets from the assets directory.
+    Create an image using the configured image backend (OpenAI's gpt-image-1
+    model by default), automatically incorporating any assets from the session's
+    assets directory.
 
     Behavior:
     - First time: Uses only assets from assets directory (if any)
     - Subsequent edits: Uses both the previously generated thumbnail AND assets
+    - With draft: Renders a fast, low-quality draft for iterating on composition;
+      use render_final_thumbnail to re-run the accepted prompt at full quality
+    - With use_cache: Identical requests (same prompt, input images, model and
+      size) are served from the local generation cache instead of the API
+    - With candidates: Renders several images in one request and keeps the one
+      that best matches the reference thumbnails (never served from the cache)
+
+    Every render is scored against the session's reference thumbnails; the
+    result's "style_score" reports the score and whether it is rejected as
+    too far from the channel's style.
+
+    Args:
+        prompt (str): The prompt to generate an image from
+        draft (bool): Render a low-quality draft instead of a final render
+        use_cache (bool): Reuse a previously generated image for an identical request
+        candidates (int): Number of images to render and rank, up to
+            THUMBNAIL_MAX_CANDIDATES
+        tool_context (ToolContext, optional): The tool context
+
+    Returns:
+        dict: Result containing status and message
+    """
+    render_mode = "draft" if draft else "final"
+    return generate_thumbnail(prompt, render_mode, use_cache, tool_context, candidates)
+
+
+async def create_image_async(
+    prompt: str,
+    draft: bool = False,
+    use_cache: bool = False,
+    candidates: int = 1,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict:
+    """
+    Create an image like create_image, without blocking other sessions.
+
+    Uses the image backend's async client with a timeout, so a slow generation
+    only holds up this session. Behaves exactly like create_image otherwise.
 
     Args:
         prompt (str): The prompt to generate an image from
+        draft (bool): Render a low-quality draft instead of a final render
+        use_cache (bool): Reuse a previously generated image for an identical request
+        candidates (int): Number of images to render and rank, up to
+            THUMBNAIL_MAX_CANDIDATES
         tool_context (ToolContext, optional): The tool context
 
     Returns:
         dict: Result containing status and message
     """
+    render_mode = "draft" if draft else "final"
+    return await generate_thumbnail_async(
+        prompt, render_mode, use_cache, tool_context, candidates
+    )
+
+
+def prepare_prompt(prompt: str) -> str:
+    """Clean up a prompt and make sure it asks for a YouTube thumbnail."""
+    clean_prompt = prompt.strip()
+
+    # Add YouTube thumbnail context if not mentioned
+    if "youtube thumbnail" not in clean_prompt.lower():
+        clean_prompt = f"YouTube thumbnail: {clean_prompt}"
+    return clean_prompt
+
+
+def resolve_input_paths(tool_context: Optional[ToolContext]) -> Tuple[List[str], bool]:
+    """
+    Work out which images to send to the API as references.
+
+    The previously generated thumbnail (if any) comes first, followed by all
+    assets from the session's assets directory.
+
+    Args:
+        tool_context: The tool context
+
+    Returns:
+        Tuple[List[str], bool]: Input image paths and whether this is the first generation
+    """
+    # Uploaded assets are written in the background; make sure they've landed
+    session_id = get_session_id(tool_context)
+    wait_for_pending_asset_writes(session_id)
+
+    # Look up this session's assets in the catalog, sorted so cache keys are stable
+    asset_entries = query_images(
+        session_id=session_id,
+        role="asset",
+        order="filename",
+        limit=None,
+    )
+    asset_files_paths = [
+        entry["path"] for entry in asset_entries if os.path.exists(entry["path"])
+    ]
+
+    # Use the previously generated thumbnail as the main reference if we have one
+    is_first_generation = not (
+        tool_context and tool_context.state.get("thumbnail_generated") is True
+    )
+    input_paths = list(asset_files_paths)
+    if not is_first_generation:
+        previous_thumbnail_path = tool_context.state.get("thumbnail_path")
+        if previous_thumbnail_path and os.path.exists(previous_thumbnail_path):
+            input_paths = [previous_thumbnail_path] + [
+                path for path in asset_files_paths if path != previous_thumbnail_path
+            ]
+    return input_paths, is_first_generation
+
+
+def new_render_path(tool_context: Optional[ToolContext]) -> str:
+    """Return a unique path for a new render in the session's renders directory."""
+    renders_dir = get_workspace(tool_context).renders
+    return os.path.join(renders_dir, f"{uuid.uuid4().hex}.png")
+
+
+def render_image(
+    clean_prompt: str,
+    input_paths: List[str],
+    render_mode: str,
+    use_cache: bool,
+    output_path: str,
+    extra_output_paths: Sequence[str] = (),
+) -> bool:
+    """
+    Render an image to output_path, serving identical requests from the cache when asked to.
+
+    The backend's base64 payload is decoded straight into output_path in a single
+    streamed, atomic write. Does not touch session state, so it is safe to call
+    from worker threads.
+
+    With extra_output_paths, the same request renders one more image per path
+    (those the backend returns are written there), and the cache is not used.
+
+    Args:
+        clean_prompt: Prompt prepared with prepare_prompt
+        input_paths: Reference images, in the order they are sent to the API
+        render_mode: "draft" for a fast low-quality render, "final" for full quality
+        use_cache: Reuse a previously generated image for an identical request
+        output_path: Where to write the rendered PNG
+        extra_output_paths: Where to write additional renders of the same request
+
+    Returns:
+        bool: Whether the image came from the cache
+
+    Raises:
+        RuntimeError: If the image backend cannot produce an image
+    """
+    backend, quality, cache_key = _render_settings(
+        clean_prompt, input_paths, render_mode, use_cache and not extra_output_paths
+    )
+    if cache_key and get_cached_image(cache_key, output_path):
+        return True
+
+    payloads = backend.generate(
+        clean_prompt,
+        size=THUMBNAIL_IMAGE_SIZE,
+        quality=quality,
+        images=input_paths,
+        n=1 + len(extra_output_paths),
+    )
+    for payload, path in zip(payloads, [output_path, *extra_output_paths]):
+        write_base64_atomic(payload, path)
+
+    if cache_key:
+        store_cached_image(cache_key, output_path)
+    return False
+
+
+async def render_image_async(
+    clean_prompt: str,
+    input_paths: List[str],
+    render_mode: str,
+    use_cache: bool,
+    output_path: str,
+    extra_output_paths: Sequence[str] = (),
+    timeout: float = IMAGE_GENERATION_TIMEOUT_SECONDS,
+) -> bool:
+    """
+    Async variant of render_image that never blocks the event loop.
+
+    The backend is called through its async client, and hashing and decoding
+    run on worker threads. If the caller is cancelled, the backend request
+    is cancelled too.
+
+    Args:
+        clean_prompt: Prompt prepared with prepare_prompt
+        input_paths: Reference images, in the order they are sent to the API
+        render_mode: "draft" for a fast low-quality render, "final" for full quality
+        use_cache: Reuse a previously generated image for an identical request
+        output_path: Where to write the rendered PNG
+        extra_output_paths: Where to write additional renders of the same request
+        timeout: Seconds to wait for the image backend before giving up
+
+    Returns:
+        bool: Whether the image came from the cache
+
+    Raises:
+        RuntimeError: If the image backend cannot produce an image in time
+    """
+    backend, quality, cache_key = await asyncio.to_thread(
+        _render_settings,
+        clean_prompt,
+        input_paths,
+        render_mode,
+        use_cache and not extra_output_paths,
+    )
+    if cache_key and await asyncio.to_thread(get_cached_image, cache_key, output_path):
+        return True
+
     try:
-        # Get API key from environment
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
-            return {
-                "status": "error",
-                "message": "OPENAI_API_KEY not found in environment variables",
-            }
+        payloads = await asyncio.wait_for(
+            backend.agenerate(
+                clean_prompt,
+                size=THUMBNAIL_IMAGE_SIZE,
+                quality=quality,
+                images=input_paths,
+                n=1 + len(extra_output_paths),
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        raise RuntimeError(f"Image generation timed out after {timeout:g} seconds")
+    for payload, path in zip(payloads, [output_path, *extra_output_paths]):
+        await asyncio.to_thread(write_base64_atomic, payload, path)
+
+    if cache_key:
+        await asyncio.to_thread(store_cached_image, cache_key, output_path)
+    return False
+
+
+def _render_settings(
+    clean_prompt: str, input_paths: List[str], render_mode: str, use_cache: bool
+) -> Tuple[ImageBackend, str, Optional[str]]:
+    """Pick the backend and quality for a render, and its cache key when caching."""
+    quality = (
+        THUMBNAIL_DRAFT_QUALITY if render_mode == "draft" else THUMBNAIL_FINAL_QUALITY
+    )
+    backend = get_image_backend()
+    cache_key = None
+    if use_cache:
+        cache_key = make_cache_key(
+            clean_prompt,
+            input_paths,
+            backend.model,
+            THUMBNAIL_IMAGE_SIZE,
+            quality=quality,
+        )
+    return backend, quality, cache_key
+
+
+def score_renders(
+    render_paths: List[str], tool_context: Optional[ToolContext]
+) -> Optional[List[Dict]]:
+    """
+    Score renders against the session's reference thumbnails, without a model call.
 
-        client = OpenAI(api_key=api_key)
+    Args:
+        render_paths: Paths of the renders
+        tool_context: The tool context
 
-        # Clean up prompt if needed
-        clean_prompt = prompt.strip()
+    Returns:
+        Optional[List[Dict]]: One score per render (see style_score.score_images),
+            or None if the session has no reference thumbnails
+    """
+    reference_paths = [
+        entry["path"]
+        for entry in query_images(
+            session_id=get_session_id(tool_context),
+            role="reference",
+            order="filename",
+            limit=None,
+        )
+        if os.path.exists(entry["path"])
+    ]
+    if not reference_paths:
+        return None
+
+    # Imported here: scoring needs NumPy
+    from ....shared_lib.style_score import score_images
 
-        # Add YouTube thumbnail context if not mentioned
-        if "youtube thumbnail" not in clean_prompt.lower():
-            clean_prompt = f"YouTube thumbnail: {clean_prompt}"
+    try:
+        return score_images(render_paths, reference_paths)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not score renders against the references: %s", e)
+        return None
 
-        # Initialize response variable
-        response = None
-        asset_paths = []
 
-        # Ensure root images directory exists
-        os.makedirs(IMAGE_ROOT_DIR, exist_ok=True)
+def _candidate_paths(tool_context: Optional[ToolContext], candidates: int) -> List[str]:
+    """New render paths, one per candidate (at least one, at most the maximum)."""
+    count = min(max(candidates, 1), THUMBNAIL_MAX_CANDIDATES)
+    return [new_render_path(tool_context) for _ in range(count)]
 
-        # First, check assets directory - we'll need this regardless
-        assets_dir = THUMBNAIL_ASSETS_DIR
 
-        # Create the directory if it doesn't exist
-        if not os.path.exists(assets_dir):
-            os.makedirs(assets_dir, exist_ok=True)
+def _best_render(render_paths: List[str], scores: Optional[List[Dict]]) -> int:
+    """Index of the render with the highest style score, or the first one."""
+    if not scores:
+        return 0
+    return max(range(len(render_paths)), key=lambda index: scores[index]["score"])
 
-        # List all files in the assets directory
-        asset_files_paths = glob.glob(os.path.join(assets_dir, "*"))
 
-        # Track all asset paths for reporting
-        for asset_path in asset_files_paths:
-            asset_paths.append(asset_path)
+def generate_thumbnail(
+    prompt: str,
+    render_mode: str,
+    use_cache: bool,
+    tool_context: Optional[ToolContext],
+    candidates: int = 1,
+) -> Dict:
+    """
+    Generate a thumbnail in the given render mode and record it in state.
 
-        # Check if we already have a generated thumbnail to use as reference
-        if tool_context and tool_context.state.get("thumbnail_generated") is True:
-            previous_thumbnail_path = tool_context.state.get("thumbnail_path")
+    Args:
+        prompt: The prompt to generate an image from
+        render_mode: "draft" for a fast low-quality render, "final" for full quality
+        use_cache: Reuse a previously generated image for an identical request
+        tool_context: The tool context
+        candidates: Number of images to render; the best-scoring one is kept
 
-            if previous_thumbnail_path and os.path.exists(previous_thumbnail_path):
-                # Add the previous thumbnail path to our assets list for reporting
-                if previous_thumbnail_path not in asset_paths:
-                    asset_paths.append(previous_thumbnail_path)
+    Returns:
+        dict: Result containing status and message
+    """
+    try:
+        clean_prompt = prepare_prompt(prompt)
+        input_paths, is_first_generation = resolve_input_paths(tool_context)
+
+        # export_thumbnail's worker starts while a final image renders; drafts
+        # are not exported, so they don't start one
+        if render_mode == "final":
+            warm_process_pool()
+        render_paths = _candidate_paths(tool_context, candidates)
+        try:
+            cache_hit = render_image(
+                clean_prompt,
+                input_paths,
+                render_mode,
+                use_cache,
+                render_paths[0],
+                render_paths[1:],
+            )
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error generating image: {str(e)}",
+            }
 
-                try:
-                    # OpenAI images.edit requires at least one image
-                    # If we have a previous thumbnail AND other assets, we want to use both
-
-                    if asset_files_paths:
-                        # We have both - use previous thumbnail as main and incorporate other assets
-                        try:
-                            # Generate using previous thumbnail and all assets
-                            # Direct array literal works better with type checking
-                            asset_file_objects = [
-                                open(path, "rb") for path in asset_files_paths
-                            ]
-                            all_files = [
-                                open(previous_thumbnail_path, "rb")
-                            ] + asset_file_objects
-
-                            try:
-                                response = client.images.edit(
-                                    model="gpt-image-1",
-                                    # Use direct array literal which has the correct typing
-                                    image=[
-                                        open(previous_thumbnail_path, "rb"),
-                                        *[
-                                            open(path, "rb")
-                                            for path in asset_files_paths
-                                        ],
-                                    ],
-                                    prompt=clean_prompt,
-                                    n=1,
-                                    size=THUMBNAIL_IMAGE_SIZE,
-                                )
-                            finally:
-                                # Close all files
-                                for file in all_files:
-                                    file.close()
-                        except Exception as e:
-                            return {
-                                "status": "error",
-                                "message": f"Error generating image with previous thumbnail and assets: {str(e)}",
-                            }
-                    else:
-                        # We only have the previous thumbnail
-                        with open(previous_thumbnail_path, "rb") as previous_thumbnail:
-                            response = client.images.edit(
-                                model="gpt-image-1",
-                                image=previous_thumbnail,
-                                prompt=clean_prompt,
-                                n=1,
-                                size=THUMBNAIL_IMAGE_SIZE,
-                            )
+        render_paths = [path for path in render_paths if os.path.exists(path)]
+        scores = score_renders(render_paths, tool_context)
+        best = _best_render(render_paths, scores)
+        result = save_thumbnail(
+            render_paths[best], render_mode, clean_prompt, tool_context
+        )
+        return _generation_result(
+            result,
+            input_paths,
+            is_first_generation,
+            cache_hit,
+            use_cache,
+            render_paths,
+            scores,
+            best,
+        )
 
-                except Exception as e:
-                    return {
-                        "status": "error",
-                        "message": f"Error generating image with previous thumbnail: {str(e)}",
-                    }
-            else:
-                # Previous thumbnail path is invalid - fall back to normal flow
-                # (This will be handled in the next section)
-                pass
-        else:
-            # No previous thumbnail exists yet - use normal asset flow
-            # This will be handled in the next section if we don't have a response yet
-            pass
-
-        # If we don't have a response yet (no previous thumbnail or error), try with assets
-        if response is None:
-            if asset_files_paths:
-                # We have assets but no previous thumbnail (or couldn't use it)
-                try:
-                    # Open all asset files and pass them to the API
-                    asset_file_objects = [
-                        open(path, "rb") for path in asset_files_paths
-                    ]
-
-                    try:
-                        # Generate the image using edit endpoint with all assets
-                        # Use direct array literal to avoid typing issues
-                        response = client.images.edit(
-                            model="gpt-image-1",
-                            image=[open(path, "rb") for path in asset_files_paths],
-                            prompt=clean_prompt,
-                            n=1,
-                            size=THUMBNAIL_IMAGE_SIZE,
-                        )
-                    finally:
-                        # Ensure all file handles are closed properly
-                        for file in asset_file_objects:
-                            file.close()
+    except Exception as e:
+        return {"status": "error", "message": f"Error creating image: {str(e)}"}
 
-                except Exception as e:
-                    return {
-                        "status": "error",
-                        "message": f"Error generating image with assets: {str(e)}",
-                    }
-            else:
-                # No assets and no previous thumbnail - use the generate endpoint
-                response = client.images.generate(
-                    model="gpt-image-1",
-                    prompt=clean_prompt,
-                    n=1,
-                    size=THUMBNAIL_IMAGE_SIZE,
-                )
 
-        # Get the base64 image data
-        if response and response.data and len(response.data) > 0:
-            image_base64 = response.data[0].b64_json
-            if image_base64:
-                image_bytes = base64.b64decode(image_base64)
-            else:
-                return {
-                    "status": "error",
-                    "message": "No image data returned from the API",
-                }
-        else:
+async def generate_thumbnail_async(
+    prompt: str,
+    render_mode: str,
+    use_cache: bool,
+    tool_context: Optional[ToolContext],
+    candidates: int = 1,
+) -> Dict:
+    """
+    Async variant of generate_thumbnail. Takes the same arguments and returns the same result.
+    """
+    try:
+        clean_prompt = prepare_prompt(prompt)
+        # Waits for background asset writes, so keep it off the event loop
+        input_paths, is_first_generation = await asyncio.to_thread(
+            resolve_input_paths, tool_context
+        )
+
+        # export_thumbnail's worker starts while a final image renders; drafts
+        # are not exported, so they don't start one
+        if render_mode == "final":
+            warm_process_pool()
+        render_paths = _candidate_paths(tool_context, candidates)
+        try:
+            cache_hit = await render_image_async(
+                clean_prompt,
+                input_paths,
+                render_mode,
+                use_cache,
+                render_paths[0],
+                render_paths[1:],
+            )
+        except Exception as e:
             return {
                 "status": "error",
-                "message": "No data returned from the API",
+                "message": f"Error generating image: {str(e)}",
             }
 
-        # Use simple filename as requested
-        filename = "youtube_thumbnail.png"
+        render_paths = [path for path in render_paths if os.path.exists(path)]
+        scores = await asyncio.to_thread(score_renders, render_paths, tool_context)
+        best = _best_render(render_paths, scores)
+        # Hashes the render and writes the catalog and artifact
+        result = await asyncio.to_thread(
+            save_thumbnail, render_paths[best], render_mode, clean_prompt, tool_context
+        )
+        return _generation_result(
+            result,
+            input_paths,
+            is_first_generation,
+            cache_hit,
+            use_cache,
+            render_paths,
+            scores,
+            best,
+        )
 
-        # Save as an artifact if tool_context is provided
-        artifact_version = None
-        if tool_context:
-            # Create a Part object for the artifact
-            image_artifact = types.Part(
-                inline_data=types.Blob(data=image_bytes, mime_type="image/png")
+    except Exception as e:
+        return {"status": "error", "message": f"Error creating image: {str(e)}"}
+
+
+def _generation_result(
+    result: Dict,
+    input_paths: List[str],
+    is_first_generation: bool,
+    cache_hit: bool,
+    use_cache: bool,
+    render_paths: List[str],
+    scores: Optional[List[Dict]],
+    best: int,
+) -> Dict:
+    """Add generation details and style scores to a successful save_thumbnail result."""
+    if result["status"] != "success":
+        return result
+
+    result.update(
+        {
+            "assets_used": [os.path.basename(path) for path in input_paths],
+            "is_first_generation": is_first_generation,
+            "cache_hit": cache_hit,
+        }
+    )
+    if use_cache:
+        result["cache_stats"] = get_cache_stats()
+    if cache_hit:
+        result["message"] += " (served from the generation cache)"
+
+    if scores:
+        result["style_score"] = scores[best]
+        if len(scores) > 1:
+            result["candidates"] = sorted(
+                (
+                    {"render": os.path.basename(path), "kept": index == best, **score}
+                    for index, (path, score) in enumerate(zip(render_paths, scores))
+                ),
+                key=lambda candidate: candidate["score"],
+                reverse=True,
+            )
+            result["message"] += (
+                f"; kept the best of {len(scores)} candidates"
+                f" ({sum(score['rejected'] for score in scores)} rejected)"
             )
+        if scores[best]["rejected"]:
+            result["message"] += (
+                f"; its style score {scores[best]['score']} is well below the "
+                f"reference thumbnails' {scores[best]['baseline']}"
+            )
+    return result
+
+
+def save_thumbnail(
+    render_path: str,
+    render_mode: str,
+    prompt: str,
+    tool_context: Optional[ToolContext],
+) -> Dict:
+    """
+    Publish a rendered thumbnail as an artifact and local file, and record it in state.
+
+    The render is linked into place rather than copied. With
+    IMAGE_ARTIFACTS_BY_REFERENCE the artifact references the render file
+    instead of holding another copy of the image; if the artifact service
+    rejects the reference, the image is saved inline instead.
 
-            try:
-                # Save the artifact
+    Args:
+        render_path: Path of the rendered PNG, from new_render_path
+        render_mode: "draft" or "final"
+        prompt: The prompt the thumbnail was rendered from
+        tool_context: The tool context
+
+    Returns:
+        dict: Result containing status, message and file details
+    """
+    # Use simple filename as requested
+    filename = "youtube_thumbnail.png"
+
+    # Save as an artifact if tool_context is provided
+    artifact_version = None
+    if tool_context:
+        try:
+            if IMAGE_ARTIFACTS_BY_REFERENCE:
+                reference = types.Part(
+                    file_data=types.FileData(
+                        file_uri=pathlib.Path(render_path).resolve().as_uri(),
+                        mime_type="image/png",
+                    )
+                )
+                try:
+                    artifact_version = tool_context.save_artifact(
+                        filename=filename, artifact=reference
+                    )
+                except Exception as e:
+                    logger.warning("Saving %s inline instead: %s", filename, e)
+            if artifact_version is None:
+                with open(render_path, "rb") as f:
+                    image_artifact = types.Part(
+                        inline_data=types.Blob(data=f.read(), mime_type="image/png")
+                    )
                 artifact_version = tool_context.save_artifact(
                     filename=filename, artifact=image_artifact
                 )
 
-                # Update state to indicate a thumbnail has been generated
-                tool_context.state["thumbnail_generated"] = True
-                tool_context.state["image_filename"] = filename
-                tool_context.state["image_version"] = artifact_version
-
-            except ValueError as e:
-                # Handle the case where artifact_service is not configured
-                return {
-                    "status": "warning",
-                    "message": f"Image generated but could not be saved as an artifact: {str(e)}. Is ArtifactService configured?",
-                }
-            except Exception as e:
-                # Handle other potential artifact storage errors
-                return {
-                    "status": "warning",
-                    "message": f"Image generated but encountered an error saving as artifact: {str(e)}",
-                }
-
-        # Create directory for local file saving
-        os.makedirs(GENERATED_THUMBNAILS_DIR, exist_ok=True)
-
-        # Save the image locally as well
-        filepath = os.path.join(GENERATED_THUMBNAILS_DIR, filename)
-        with open(filepath, "wb") as f:
-            f.write(image_bytes)
-
-        # Update state with thumbnail path
-        if tool_context:
-            tool_context.state["thumbnail_path"] = filepath
+            # Update state to indicate a thumbnail has been generated
             tool_context.state["thumbnail_generated"] = True
+            tool_context.state["image_filename"] = filename
+            tool_context.state["image_version"] = artifact_version
 
-        # Return success with artifact details if available
-        if artifact_version is not None:
+        except ValueError as e:
+            # Handle the case where artifact_service is not configured
             return {
-                "status": "success",
-                "message": f"Image created successfully and saved as artifact '{filename}' (version {artifact_version}) and local file '{filepath}'",
-                "filepath": filepath,
-                "artifact_filename": filename,
-                "artifact_version": artifact_version,
-                "assets_used": (
-                    [os.path.basename(path) for path in asset_paths]
-                    if asset_paths
-                    else []
-                ),
-                "thumbnail_generated": True,
-                "is_first_generation": not (
-                    tool_context
-                    and tool_context.state.get("thumbnail_generated", False)
-                ),
+                "status": "warning",
+                "message": f"Image generated but could not be saved as an artifact: {str(e)}. Is ArtifactService configured?",
             }
-        else:
+        except Exception as e:
+            # Handle other potential artifact storage errors
             return {
-                "status": "success",
-                "message": f"Image created successfully and saved as local file '{filepath}'",
-                "filepath": filepath,
-                "assets_used": (
-                    [os.path.basename(path) for path in asset_paths]
-                    if asset_paths
-                    else []
-                ),
-                "thumbnail_generated": True,
-                "is_first_generation": not (
-                    tool_context
-                    and tool_context.state.get("thumbnail_generated", False)
-                ),
+                "status": "warning",
+                "message": f"Image generated but encountered an error saving as artifact: {str(e)}",
             }
 
-    except Exception as e:
-        return {"status": "error", "message": f"Error creating image: {str(e)}"}
+    # Point the local thumbnail file at the render without rewriting the data
+    workspace = get_workspace(tool_context)
+    filepath = os.path.join(workspace.generated, filename)
+    link_atomic(render_path, filepath)
+
+    # Record both files in the image catalog; they share the same contents
+    render_entry = record_image(render_path, "render", workspace.session_id)
+    record_image(
+        filepath, "thumbnail", workspace.session_id, sha256=render_entry["sha256"]
+    )
+
+    # Update state with thumbnail path
+    if tool_context:
+        tool_context.state["thumbnail_path"] = filepath
+        tool_context.state["thumbnail_generated"] = True
+        tool_context.state["thumbnail_render_mode"] = render_mode
+        tool_context.state["thumbnail_prompt"] = prompt
+
+    result = {
+        "status": "success",
+        "filepath": filepath,
+        "thumbnail_generated": True,
+        "render_mode": render_mode,
+    }
+
+    # Include artifact details if available
+    if artifact_version is not None:
+        result["message"] = (
+            f"Image created successfully and saved as artifact '{filename}' (version {artifact_version}) and local file '{filepath}'"
+        )
+        result["artifact_filename"] = filename
+        result["artifact_version"] = artifact_version
+    else:
+        result["message"] = (
+            f"Image created successfully and saved as local file '{filepath}'"
+        )
+    return result
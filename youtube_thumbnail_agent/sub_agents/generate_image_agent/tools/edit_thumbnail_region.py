@@ -0,0 +1,199 @@
+"""
+Tool for editing a single region of the current thumbnail with a mask.
+"""
+
+import asyncio
+import base64
+import os
+from typing import Dict, List, Optional
+
+from google.adk.tools.tool_context import ToolContext
+from PIL import Image
+
+from ....constants import (
+    IMAGE_GENERATION_TIMEOUT_SECONDS,
+    THUMBNAIL_DRAFT_QUALITY,
+    THUMBNAIL_FINAL_QUALITY,
+    THUMBNAIL_IMAGE_SIZE,
+)
+from ....shared_lib.asset_writer import wait_for_pending_asset_writes
+from ....shared_lib.catalog import query_images
+from ....shared_lib.file_io import write_bytes_atomic
+from ....shared_lib.image_backends import get_image_backend
+from ....shared_lib.image_processing import (
+    build_region_mask,
+    clamp_box,
+    composite_region,
+    find_changed_region,
+)
+from ....shared_lib.workspace import get_session_id
+from .create_image import new_render_path, save_thumbnail
+
+
+def _find_marked_up_region(thumbnail_path: str, session_id: str):
+    """
+    Look for an uploaded marked-up copy of the thumbnail and diff it locally.
+
+    A marked-up copy is any asset with the same dimensions as the thumbnail,
+    found through the image catalog. The most recently uploaded match wins.
+    """
+    with Image.open(thumbnail_path) as thumbnail:
+        width, height = thumbnail.size
+
+    # Uploaded assets are written in the background; make sure they've landed
+    wait_for_pending_asset_writes(session_id)
+    candidates = query_images(
+        session_id=session_id,
+        role="asset",
+        width=width,
+        height=height,
+        order="newest",
+        limit=None,
+    )
+    for entry in candidates:
+        if not os.path.exists(entry["path"]):
+            continue
+        box = find_changed_region(thumbnail_path, entry["path"])
+        if box:
+            return box, entry["path"]
+    return None, None
+
+
+def _write_edited_render(
+    thumbnail_path: str,
+    edited_base64: str,
+    box,
+    tool_context: ToolContext,
+) -> str:
+    """Blend the edited region onto the previous render and write it out."""
+    render_path = new_render_path(tool_context)
+    edited_bytes = base64.b64decode(edited_base64)
+    write_bytes_atomic(composite_region(thumbnail_path, edited_bytes, box), render_path)
+    return render_path
+
+
+async def edit_thumbnail_region(
+    prompt: str,
+    region: Optional[List[int]] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict:
+    """
+    Edit only one region of the current thumbnail, leaving the rest untouched.
+
+    Only the previous thumbnail and a mask are sent to the image backend, and the
+    edited region is composited back onto the previous render. The backend is
+    called through its async client and image work runs on worker threads, so
+    the event loop is never blocked.
+
+    Args:
+        prompt (str): Description of the change to make inside the region
+        region (list, optional): [left, top, right, bottom] in thumbnail pixels.
+            If omitted, the region is detected by diffing the thumbnail against
+            an uploaded marked-up copy of it.
+        tool_context (ToolContext, optional): The tool context
+
+    Returns:
+        dict: Result containing status and message
+    """
+    try:
+        if not tool_context or not tool_context.state.get("thumbnail_generated"):
+            return {
+                "status": "error",
+                "message": "No thumbnail has been generated yet. Use create_image_async first.",
+            }
+
+        thumbnail_path = tool_context.state.get("thumbnail_path")
+        if not thumbnail_path or not os.path.exists(thumbnail_path):
+            return {
+                "status": "error",
+                "message": "The previous thumbnail file could not be found.",
+            }
+
+        with Image.open(thumbnail_path) as thumbnail:
+            thumbnail_size = thumbnail.size
+
+        # Resolve the region to edit
+        marked_up_asset = None
+        if region:
+            if len(region) != 4:
+                return {
+                    "status": "error",
+                    "message": "region must be [left, top, right, bottom] in pixels.",
+                }
+            box = clamp_box(region, thumbnail_size)
+        else:
+            box, marked_up_asset = await asyncio.to_thread(
+                _find_marked_up_region, thumbnail_path, get_session_id(tool_context)
+            )
+            if not box:
+                return {
+                    "status": "error",
+                    "message": "No region provided and no marked-up copy of the thumbnail was found. Provide a region as [left, top, right, bottom].",
+                }
+
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return {"status": "error", "message": f"Region {list(box)} is empty."}
+
+        # Keep the current render tier so draft edits stay cheap
+        render_mode = tool_context.state.get("thumbnail_render_mode", "final")
+        quality = (
+            THUMBNAIL_DRAFT_QUALITY
+            if render_mode == "draft"
+            else THUMBNAIL_FINAL_QUALITY
+        )
+
+        clean_prompt = prompt.strip()
+        mask_bytes = build_region_mask(thumbnail_size, box)
+
+        timeout = IMAGE_GENERATION_TIMEOUT_SECONDS
+        try:
+            payloads = await asyncio.wait_for(
+                get_image_backend().agenerate(
+                    clean_prompt,
+                    size=THUMBNAIL_IMAGE_SIZE,
+                    quality=quality,
+                    images=[thumbnail_path],
+                    mask=mask_bytes,
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            return {
+                "status": "error",
+                "message": f"Error generating image: timed out after {timeout:g} seconds",
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error generating image: {str(e)}",
+            }
+
+        # Only keep the edited region, blended onto the previous render
+        render_path = await asyncio.to_thread(
+            _write_edited_render, thumbnail_path, payloads[0], box, tool_context
+        )
+
+        # Carry the change into the accepted prompt so a final render keeps it
+        base_prompt = tool_context.state.get("thumbnail_prompt", "")
+        accepted_prompt = (
+            f"{base_prompt}\n\nChange: {clean_prompt}" if base_prompt else clean_prompt
+        )
+
+        result = await asyncio.to_thread(
+            save_thumbnail, render_path, render_mode, accepted_prompt, tool_context
+        )
+        if result["status"] != "success":
+            return result
+
+        result["region"] = list(box)
+        result["region_source"] = "marked_up_asset" if marked_up_asset else "provided"
+        if marked_up_asset:
+            result["marked_up_asset"] = os.path.basename(marked_up_asset)
+        result["message"] = f"Edited region {list(box)}. " + result["message"]
+        return result
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error editing thumbnail region: {str(e)}",
+        }
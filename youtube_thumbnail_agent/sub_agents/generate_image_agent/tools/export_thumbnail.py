@@ -0,0 +1,100 @@
+"""
+Tool for converting the generated thumbnail to YouTube's delivery specs.
+"""
+
+import asyncio
+import os
+from typing import Dict
+
+import google.genai.types as types
+from google.adk.tools.tool_context import ToolContext
+
+from ....constants import YOUTUBE_THUMBNAIL_MAX_BYTES
+from ....shared_lib.catalog import record_image
+from ....shared_lib.postprocess import mime_type_for, postprocess_for_youtube
+from ....shared_lib.workspace import get_workspace
+
+
+def _record_outputs(output: Dict, session_id: str) -> bytes:
+    """Record both outputs in the image catalog; return the preview's bytes."""
+    with open(output["preview_path"], "rb") as f:
+        preview_data = f.read()
+    record_image(output["delivery_path"], "export", session_id)
+    record_image(output["preview_path"], "export", session_id, data=preview_data)
+    return preview_data
+
+
+async def export_thumbnail(
+    tool_context: ToolContext,
+    image_format: str = "jpeg",
+) -> Dict:
+    """
+    Crop and resize the current thumbnail to 1280x720 and encode it under 2 MB.
+
+    A small preview is saved as a chat artifact alongside the upload file.
+
+    Args:
+        tool_context: ADK tool context
+        image_format: Output format, "jpeg" or "webp"
+
+    Returns:
+        dict: Result containing status, message and output details
+    """
+    try:
+        thumbnail_path = tool_context.state.get("thumbnail_path")
+        if not thumbnail_path or not os.path.exists(thumbnail_path):
+            return {
+                "status": "error",
+                "message": "No generated thumbnail found. Create a thumbnail first.",
+            }
+
+        image_format = image_format.lower()
+        if image_format == "jpg":
+            image_format = "jpeg"
+
+        workspace = await asyncio.to_thread(get_workspace, tool_context)
+        output = await postprocess_for_youtube(
+            thumbnail_path, workspace.generated, image_format
+        )
+        # Reading the preview and writing the catalog stay off the event loop
+        preview_data = await asyncio.to_thread(
+            _record_outputs, output, workspace.session_id
+        )
+
+        # Save the small preview as the chat artifact
+        preview_filename = os.path.basename(output["preview_path"])
+        preview_artifact = types.Part(
+            inline_data=types.Blob(
+                data=preview_data, mime_type=mime_type_for(image_format)
+            )
+        )
+        try:
+            preview_version = tool_context.save_artifact(
+                filename=preview_filename, artifact=preview_artifact
+            )
+        except ValueError:
+            # Artifact service not configured - the files on disk are still usable
+            preview_version = None
+
+        tool_context.state["thumbnail_export_path"] = output["delivery_path"]
+
+        status = "success" if output["within_budget"] else "warning"
+        message = (
+            f"Thumbnail exported to '{output['delivery_path']}' "
+            f"({output['delivery_bytes']} bytes at quality {output['delivery_quality']})"
+        )
+        if not output["within_budget"]:
+            message += (
+                f", but it is still above the {YOUTUBE_THUMBNAIL_MAX_BYTES} byte limit"
+            )
+
+        return {
+            "status": status,
+            "message": message,
+            **output,
+            "preview_artifact_filename": preview_filename,
+            "preview_artifact_version": preview_version,
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error exporting thumbnail: {str(e)}"}
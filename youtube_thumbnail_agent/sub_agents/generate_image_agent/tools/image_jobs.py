@@ -0,0 +1,191 @@
+"""
+Tools for queueing thumbnail generations in the background and polling them.
+
+Both tools are async: resolving the input images (which waits for pending
+asset writes) and saving a finished render run on worker threads, so
+submitting or polling a job doesn't block other sessions.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from google.adk.tools.tool_context import ToolContext
+
+from ....shared_lib.job_queue import get_image_job_queue
+from .create_image import (
+    new_render_path,
+    prepare_prompt,
+    render_image,
+    resolve_input_paths,
+    save_thumbnail,
+)
+
+
+def _run_generation_job(
+    clean_prompt: str,
+    input_paths: List[str],
+    render_mode: str,
+    use_cache: bool,
+    output_path: str,
+) -> Dict:
+    """Render an image on a worker thread straight into the given render file."""
+    cache_hit = render_image(
+        clean_prompt, input_paths, render_mode, use_cache, output_path
+    )
+    return {"output_path": output_path, "cache_hit": cache_hit}
+
+
+async def submit_image_job(
+    prompt: str,
+    draft: bool = False,
+    use_cache: bool = False,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict:
+    """
+    Queue a thumbnail generation and return immediately with a job ID.
+
+    Uses the same inputs as create_image (previous thumbnail and assets).
+    Poll the job with check_image_job to pick up the result.
+
+    Args:
+        prompt (str): The prompt to generate an image from
+        draft (bool): Render a low-quality draft instead of a final render
+        use_cache (bool): Reuse a previously generated image for an identical request
+        tool_context (ToolContext, optional): The tool context
+
+    Returns:
+        dict: Result containing status, message and the job ID
+    """
+    try:
+        render_mode = "draft" if draft else "final"
+        clean_prompt = prepare_prompt(prompt)
+        input_paths, _ = await asyncio.to_thread(resolve_input_paths, tool_context)
+        # Pick the render file now, while the session's workspace is known
+        output_path = await asyncio.to_thread(new_render_path, tool_context)
+
+        queue = get_image_job_queue()
+        job_id = queue.submit(
+            _run_generation_job,
+            clean_prompt,
+            input_paths,
+            render_mode,
+            use_cache,
+            output_path,
+        )
+        if job_id is None:
+            return {
+                "status": "busy",
+                "message": "The image generation queue is full. Try again shortly.",
+                "queue": queue.stats(),
+            }
+
+        if tool_context:
+            jobs = dict(tool_context.state.get("image_jobs", {}))
+            jobs[job_id] = {
+                "status": "queued",
+                "prompt": clean_prompt,
+                "render_mode": render_mode,
+            }
+            tool_context.state["image_jobs"] = jobs
+            tool_context.state["latest_image_job"] = job_id
+
+        return {
+            "status": "queued",
+            "message": f"Image generation queued as job {job_id}.",
+            "job_id": job_id,
+            "render_mode": render_mode,
+            "queue": queue.stats(),
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error queueing image: {str(e)}"}
+
+
+async def check_image_job(
+    job_id: Optional[str] = None,
+    tool_context: Optional[ToolContext] = None,
+) -> Dict:
+    """
+    Report the status of a queued generation and save its result once it lands.
+
+    Args:
+        job_id (str, optional): The job to check. Defaults to the latest submitted job.
+        tool_context (ToolContext, optional): The tool context
+
+    Returns:
+        dict: Result containing the job status, and the thumbnail details when done
+    """
+    try:
+        session_jobs = (
+            dict(tool_context.state.get("image_jobs", {})) if tool_context else {}
+        )
+        if not job_id and tool_context:
+            job_id = tool_context.state.get("latest_image_job")
+        if not job_id:
+            return {"status": "error", "message": "No image job has been submitted."}
+
+        # The queue is shared by every session; only this session's jobs count
+        job_info = session_jobs.get(job_id)
+        if job_info is None:
+            return {"status": "error", "message": f"Unknown image job: {job_id}"}
+
+        # Checked before the queue, which may have pruned the finished job
+        if job_info["status"] == "applied":
+            return {
+                "status": "success",
+                "message": f"Job {job_id} already finished and its thumbnail was saved.",
+                "job_id": job_id,
+                "job_status": "succeeded",
+            }
+
+        job = get_image_job_queue().get(job_id)
+        if job is None:
+            return {"status": "error", "message": f"Unknown image job: {job_id}"}
+
+        if job["status"] in ("queued", "running"):
+            elapsed = time.time() - job["submitted_at"]
+            return {
+                "status": "pending",
+                "message": f"Job {job_id} is {job['status']} ({elapsed:.0f}s since submission).",
+                "job_id": job_id,
+                "job_status": job["status"],
+            }
+
+        if job["status"] == "failed":
+            session_jobs[job_id] = {**job_info, "status": "failed"}
+            tool_context.state["image_jobs"] = session_jobs
+            return {
+                "status": "error",
+                "message": f"Job {job_id} failed: {job['error']}",
+                "job_id": job_id,
+                "job_status": "failed",
+            }
+
+        # The job succeeded - save the result as this session's thumbnail
+        output_path = job["result"]["output_path"]
+        result = await asyncio.to_thread(
+            save_thumbnail,
+            output_path,
+            job_info["render_mode"],
+            job_info["prompt"],
+            tool_context,
+        )
+        if result["status"] != "success":
+            return result
+
+        session_jobs[job_id] = {**job_info, "status": "applied"}
+        tool_context.state["image_jobs"] = session_jobs
+
+        result.update(
+            {
+                "job_id": job_id,
+                "job_status": "succeeded",
+                "cache_hit": job["result"]["cache_hit"],
+                "generation_seconds": round(job["finished_at"] - job["started_at"], 2),
+            }
+        )
+        return result
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error checking image job: {str(e)}"}
@@ -0,0 +1,48 @@
+"""
+Tool for re-rendering an accepted draft thumbnail at full quality.
+"""
+
+from typing import Dict
+
+from google.adk.tools.tool_context import ToolContext
+
+from .create_image import generate_thumbnail_async
+
+
+async def render_final_thumbnail(tool_context: ToolContext) -> Dict:
+    """
+    Re-run the accepted draft's prompt at full quality.
+
+    The accepted draft is used as the composition reference together with any
+    assets, so the final render keeps the layout the user approved.
+
+    Args:
+        tool_context: ADK tool context
+
+    Returns:
+        dict: Result containing status and message
+    """
+    if not tool_context.state.get("thumbnail_generated"):
+        return {
+            "status": "error",
+            "message": "No thumbnail has been generated yet. Create a draft first.",
+        }
+
+    if tool_context.state.get("thumbnail_render_mode") == "final":
+        return {
+            "status": "success",
+            "message": "The current thumbnail is already a final render.",
+            "filepath": tool_context.state.get("thumbnail_path"),
+            "render_mode": "final",
+        }
+
+    prompt = tool_context.state.get("thumbnail_prompt")
+    if not prompt:
+        return {
+            "status": "error",
+            "message": "No accepted prompt found in state. Create a draft first.",
+        }
+
+    return await generate_thumbnail_async(
+        prompt, render_mode="final", use_cache=True, tool_context=tool_context
+    )
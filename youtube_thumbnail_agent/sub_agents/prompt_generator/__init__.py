@@ -1 +1,8 @@
-from .agent import prompt_generator
+import importlib
+
+
+def __getattr__(name):
+    # Build the agent on first access, not when a submodule is imported
+    if name == "prompt_generator":
+        return importlib.import_module(".agent", __name__).prompt_generator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
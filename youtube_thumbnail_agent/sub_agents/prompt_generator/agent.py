@@ -5,13 +5,26 @@ Sub-agent responsible for generating YouTube thumbnail image prompts that emulat
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 
-from ...constants import GEMINI_MODEL
-from ...shared_lib.callbacks import before_model_callback
+from ...shared_lib.blob_store import put_blob
+from ...shared_lib.callbacks import before_model_callback, resolve_state_blobs_callback
+from ...shared_lib.checkpoints import checkpoint_prompt, restore_prompt_callback
+from ...shared_lib.context_cache import context_cache_callback
+from ...shared_lib.metrics import chain_callbacks
+from ...shared_lib.model_routing import model_for
 
 
 def save_prompt(prompt: str, tool_context: ToolContext) -> dict:
     """Save the final prompt to state."""
-    tool_context.state["prompt"] = prompt
+    state = tool_context.state
+    state["prompt"] = put_blob(prompt)
+    # Batch runs identify their request, so a restart can reuse the prompt
+    if state.get("channel") and state.get("prompt_request"):
+        checkpoint_prompt(
+            state["channel"],
+            state["prompt_request"],
+            state["prompt"],
+            state.get("style_guide", ""),
+        )
     return {"status": "success", "message": "Prompt saved successfully to state."}
 
 
@@ -19,8 +32,12 @@ def save_prompt(prompt: str, tool_context: ToolContext) -> dict:
 prompt_generator = Agent(
     name="thumbnail_prompt_generator",
     description="An agent that generates highly detailed thumbnail prompts that emulate analyzed YouTube channel styles.",
-    model=GEMINI_MODEL,
-    before_model_callback=before_model_callback,
+    model=model_for("thumbnail_prompt_generator"),
+    # The style context is resolved into the instruction, then sent as a cached prefix
+    before_model_callback=chain_callbacks(
+        before_model_callback, resolve_state_blobs_callback, context_cache_callback
+    ),
+    before_agent_callback=restore_prompt_callback,
     tools=[save_prompt],
     instruction="""
     You are a YouTube Thumbnail Style Emulator that creates extremely detailed prompts for generating 
@@ -203,12 +220,6 @@ prompt_generator = Agent(
     - NEVER ask if the user wants to proceed - assume they do and move forward immediately
     - Remember that all user-provided images MUST be incorporated into the final thumbnail design
     
-    Here is the style guide:
-    {style_guide}
-    
-    Here are the individual thumbnail analyses for reference:
-    {thumbnail_analysis}
-    
     ## Style Emulation Guidelines
     
     When emulating thumbnail styles:
@@ -231,5 +242,11 @@ prompt_generator = Agent(
        - "High-contrast, minimalist style with bold typography"
        - "Dynamic composition with asymmetrical balance and vibrant color palette"
        - "Clean, professional aesthetic with strategic use of negative space"
+    
+    Here is the style guide:
+    {style_guide}
+    
+    Here are the individual thumbnail analyses for reference:
+    {thumbnail_analysis}
     """,
 )
@@ -0,0 +1,81 @@
+"""
+Sub-agent that writes thumbnail image prompts for many videos of one channel at once.
+
+Used by the batch runner: instead of one prompt generator conversation per
+video, each re-sending the style context, the videos of a channel are sent
+together and every prompt comes back in one structured response.
+"""
+
+from typing import List
+
+from google.adk.agents import Agent
+from pydantic import BaseModel, Field
+
+from ...shared_lib.callbacks import resolve_state_blobs_callback
+from ...shared_lib.context_cache import context_cache_callback
+from ...shared_lib.metrics import chain_callbacks
+from ...shared_lib.model_routing import model_for
+
+
+class VideoPrompt(BaseModel):
+    """The image prompt written for one video."""
+
+    request_id: str = Field(description="The video's request_id, exactly as given")
+    prompt: str = Field(description="The complete IMAGE GENERATION PROMPT")
+
+
+class BatchPrompts(BaseModel):
+    """Image prompts for a batch of videos."""
+
+    prompts: List[VideoPrompt]
+
+
+# Create the batch prompt generator; its instruction is the same for every
+# batch of a channel, so later batches reuse the cached style context
+batch_prompt_generator = Agent(
+    name="BatchPromptGenerator",
+    description="An agent that writes thumbnail image prompts for many videos of one channel in a single response.",
+    model=model_for("BatchPromptGenerator"),
+    before_model_callback=chain_callbacks(
+        resolve_state_blobs_callback, context_cache_callback
+    ),
+    output_schema=BatchPrompts,
+    output_key="batch_prompts",
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    instruction="""
+    You are a YouTube Thumbnail Style Emulator. You receive a list of videos for one channel,
+    each with a request_id, a title and a brief topic summary, and write an image generation
+    prompt for every one of them in the channel's analyzed style.
+
+    Make every design decision yourself; there is no user to ask. Base each prompt on the
+    style_guide (for the overall style) and the individual thumbnail_analysis entries (for
+    specific examples), and on that video's title and summary.
+
+    Each prompt must be a self-contained, extremely detailed paragraph of at least 150-200
+    words for an image generation model, covering:
+    1. Exact composition and layout, with precise positions of all elements
+    2. Complete color specifications with exact hex codes
+    3. Typography: font style, size, weight, color, effects and the exact text, taken from
+       or shortened from the video title
+    4. The background in exhaustive detail: hex colors, gradients (start/end colors and
+       direction), textures, patterns, lighting, vignetting, and how it interacts with the
+       foreground
+    5. Supporting graphics, icons or visual elements
+    6. Mood, lighting and overall aesthetic
+    7. Technical specifications (landscape 16:9 YouTube thumbnail, high resolution)
+    8. The style being emulated, described objectively WITHOUT naming any creator or channel
+
+    Keep each prompt specific to its video: different videos should get different subjects,
+    text and compositions, while all of them stay unmistakably in the channel's style.
+
+    Respond with a JSON object containing "prompts": one entry per video, in the order given,
+    each with the video's "request_id" exactly as given and its "prompt".
+
+    Here is the style guide:
+    {style_guide}
+
+    Here are the individual thumbnail analyses for reference:
+    {thumbnail_analysis}
+    """,
+)
@@ -5,13 +5,14 @@ This agent analyzes a single thumbnail selected by the thumbnail selector.
 
 from google.adk.agents.llm_agent import LlmAgent
 
-from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.callbacks import resolve_state_blobs_callback
+from youtube_thumbnail_agent.shared_lib.model_routing import model_for
 
 from ..tools.save_analysis import save_analysis
 
 save_analysis_agent = LlmAgent(
     name="SaveAnalysisAgent",
-    model=GEMINI_MODEL,
+    model=model_for("SaveAnalysisAgent"),
     instruction="""
     You are a Thumbnail Analysis Archiver responsible for properly documenting and saving thumbnail analyses.
     
@@ -45,6 +46,7 @@ save_analysis_agent = LlmAgent(
     {thumbnail_analysis_result}
     """,
     description="Archives detailed thumbnail analyses to build a comprehensive style database",
+    before_model_callback=resolve_state_blobs_callback,
     tools=[save_analysis],
     output_key="analysis_save_result",
 )
@@ -5,13 +5,14 @@ This agent analyzes a single thumbnail selected by the thumbnail selector.
 
 from google.adk.agents.llm_agent import LlmAgent
 
-from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.callbacks import save_output_to_blob_store
+from youtube_thumbnail_agent.shared_lib.model_routing import model_for
 
 from ..tools.analyze_thumbnail import analyze_thumbnail
 
 single_thumbnail_analyzer_agent = LlmAgent(
     name="SingleThumbnailAnalyzer",
-    model=GEMINI_MODEL,
+    model=model_for("SingleThumbnailAnalyzer"),
     instruction="""
     You are a Thumbnail Style Analyzer specialized in extracting visual design patterns from YouTube thumbnails.
     
@@ -63,5 +64,7 @@ single_thumbnail_analyzer_agent = LlmAgent(
     """,
     description="Performs detailed analysis of a single YouTube thumbnail",
     tools=[analyze_thumbnail],
-    output_key="thumbnail_analysis_result",
+    # Saved as a blob handle; only the selected filename matters here, so the
+    # handles in {thumbnail_analysis} are left unresolved
+    after_model_callback=save_output_to_blob_store("thumbnail_analysis_result"),
 )
@@ -4,13 +4,20 @@ This agent analyzes all thumbnail analyses to create a comprehensive style guide
 """
 
 from google.adk.agents.llm_agent import LlmAgent
+from google.adk.agents.readonly_context import ReadonlyContext
 
-from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.callbacks import (
+    resolve_state_blobs_callback,
+    save_output_to_blob_store,
+)
+from youtube_thumbnail_agent.shared_lib.model_routing import model_for
+from youtube_thumbnail_agent.shared_lib.style_guides import (
+    refresh_style_guide_callback,
+    save_style_guide_version_callback,
+)
 
-style_guide_generator_agent = LlmAgent(
-    name="StyleGuideGenerator",
-    model=GEMINI_MODEL,
-    instruction="""
+# Full pass over every analysis
+FULL_INSTRUCTION = """
     You are a Thumbnail Style Guide Generator specialized in synthesizing analyses 
     of multiple thumbnails into a comprehensive style guide.
     
@@ -69,7 +76,50 @@ style_guide_generator_agent = LlmAgent(
     
     Here is the current state:
     {thumbnail_analysis}
-    """,
+    """
+
+# Merges the analyses of a channel's new thumbnails into its latest style guide
+UPDATE_INSTRUCTION = """
+    You are a Thumbnail Style Guide Editor. The channel's existing style guide was
+    written from earlier thumbnails; the channel has since posted the new thumbnails
+    analyzed below.
+
+    # YOUR TASK
+
+    - Update the existing style guide with what the new analyses show: confirm the
+      patterns they follow, add new recurring elements, and revise guidance they
+      contradict
+    - Keep everything the new analyses don't contradict, including the examples
+      from earlier thumbnails
+    - Reply with the complete updated style guide in the same structure, not just
+      the changes; it replaces the existing one
+    - Leave out the "Measured statistics" section; it is recomputed from the images
+
+    # EXISTING STYLE GUIDE
+
+    {style_guide}
+
+    # NEW THUMBNAIL ANALYSES
+
+    {new_thumbnail_analysis}
+    """
+
+
+def style_guide_instruction(context: ReadonlyContext) -> str:
+    """Use the short update instruction when only new analyses need merging."""
+    if context.state.get("new_thumbnail_analysis"):
+        return UPDATE_INSTRUCTION
+    return FULL_INSTRUCTION
+
+
+style_guide_generator_agent = LlmAgent(
+    name="StyleGuideGenerator",
+    model=model_for("StyleGuideGenerator"),
+    instruction=style_guide_instruction,
     description="Generates a comprehensive style guide based on all thumbnail analyses",
-    output_key="style_guide",
+    before_model_callback=resolve_state_blobs_callback,
+    after_model_callback=save_output_to_blob_store("style_guide"),
+    # Keep or update the channel's latest style guide instead of rewriting it
+    before_agent_callback=refresh_style_guide_callback,
+    after_agent_callback=save_style_guide_version_callback,
 )
@@ -5,14 +5,14 @@ This agent selects the next thumbnail to analyze or exits the loop if all thumbn
 
 from google.adk.agents.llm_agent import LlmAgent
 
-from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.model_routing import model_for
 
 from ..tools.exit_analysis import exit_analysis
 from ..tools.select_thumbnail import select_thumbnail
 
 thumbnail_selector_agent = LlmAgent(
     name="ThumbnailSelector",
-    model=GEMINI_MODEL,
+    model=model_for("ThumbnailSelector"),
     instruction="""
     You are a Thumbnail Selector responsible for determining which thumbnail needs to be analyzed next.
     
@@ -1,3 +1,4 @@
+import logging
 import os
 import os.path
 from typing import Dict
@@ -5,7 +6,9 @@ from typing import Dict
 import google.genai.types as types
 from google.adk.tools.tool_context import ToolContext
 
-from ....constants import REFERENCE_IMAGES_DIR
+from ....shared_lib.workspace import get_workspace
+
+logger = logging.getLogger(__name__)
 
 
 def analyze_thumbnail(
@@ -24,7 +27,8 @@ def analyze_thumbnail(
     """
     try:
         # Verify the thumbnail exists
-        thumbnail_path = os.path.join(REFERENCE_IMAGES_DIR, thumbnail_filename)
+        ref_dir = get_workspace(tool_context).reference_images
+        thumbnail_path = os.path.join(ref_dir, thumbnail_filename)
         if not os.path.exists(thumbnail_path):
             return {
                 "status": "error",
@@ -90,5 +94,5 @@ def analyze_thumbnail(
 
     except Exception as e:
         error_message = f"Error loading thumbnail: {str(e)}"
-        print(error_message)
+        logger.error(error_message)
         return {"status": "error", "message": error_message}
@@ -1,7 +1,15 @@
+import logging
+import os
 from typing import Dict
 
 from google.adk.tools.tool_context import ToolContext
 
+from ....shared_lib.blob_store import put_blob
+from ....shared_lib.checkpoints import checkpoint_analysis
+from ....shared_lib.workspace import get_workspace
+
+logger = logging.getLogger(__name__)
+
 
 def save_analysis(
     thumbnail_filename: str,
@@ -9,7 +17,8 @@ def save_analysis(
     tool_context: ToolContext,
 ) -> Dict:
     """
-    Save the analysis for a specific thumbnail to state.
+    Save the analysis for a specific thumbnail to state and to the channel's
+    checkpoint.
 
     Args:
         thumbnail_filename: The filename of the analyzed thumbnail
@@ -20,7 +29,7 @@ def save_analysis(
         Dictionary with save status
     """
     try:
-        print(f"Saving analysis for {thumbnail_filename}")
+        logger.info("Saving analysis for %s", thumbnail_filename)
         if not thumbnail_filename:
             return {"status": "error", "message": "No thumbnail filename provided."}
 
@@ -30,18 +39,24 @@ def save_analysis(
                 "message": "No analysis text provided. Analysis must be non-empty.",
             }
 
-        # Ensure thumbnail_analysis exists in state
-        if "thumbnail_analysis" not in tool_context.state:
-            tool_context.state["thumbnail_analysis"] = {}
+        # Copy the dictionary so the update is recorded as a state change.
+        # Thumbnails are normally pre-initialized, but a missing entry is added.
+        analyses = dict(tool_context.state.get("thumbnail_analysis", {}))
 
-        # Check if the thumbnail is already in the dictionary
-        if thumbnail_filename not in tool_context.state["thumbnail_analysis"]:
-            # If not, add it - this shouldn't normally happen since thumbnails are pre-initialized
-            # but this provides a safety mechanism
-            tool_context.state["thumbnail_analysis"][thumbnail_filename] = ""
+        # Save the analysis out of line; state keeps only its blob handle
+        analyses[thumbnail_filename] = put_blob(analysis)
+        tool_context.state["thumbnail_analysis"] = analyses
 
-        # Save the analysis
-        tool_context.state["thumbnail_analysis"][thumbnail_filename] = analysis
+        # Keep the analysis across runs, so a restart doesn't redo it
+        channel = tool_context.state.get("channel")
+        if channel:
+            checkpoint_analysis(
+                channel,
+                os.path.join(
+                    get_workspace(tool_context).reference_images, thumbnail_filename
+                ),
+                analyses[thumbnail_filename],
+            )
 
         # Return success
         return {
@@ -53,5 +68,5 @@ def save_analysis(
 
     except Exception as e:
         error_message = f"Error saving analysis: {str(e)}"
-        print(error_message)
+        logger.error(error_message)
         return {"status": "error", "message": error_message}
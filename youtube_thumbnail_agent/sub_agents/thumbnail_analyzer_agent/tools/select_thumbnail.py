@@ -1,7 +1,10 @@
+import logging
 from typing import Dict
 
 from google.adk.tools.tool_context import ToolContext
 
+logger = logging.getLogger(__name__)
+
 
 def select_thumbnail(
     tool_context: ToolContext,
@@ -54,5 +57,5 @@ def select_thumbnail(
 
     except Exception as e:
         error_message = f"Error selecting thumbnail: {str(e)}"
-        print(error_message)
+        logger.error(error_message)
         return {"status": "error", "message": error_message}
@@ -6,13 +6,13 @@ This agent is responsible for scraping YouTube thumbnails from a specific channe
 
 from google.adk.agents.llm_agent import LlmAgent
 
-from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.model_routing import model_for
 
-from .tools.scrape_channel import scrape_channel
+from .tools.scrape_channel import scrape_channel_async
 
 thumbnail_scraper_agent = LlmAgent(
     name="ThumbnailScraper",
-    model=GEMINI_MODEL,
+    model=model_for("ThumbnailScraper"),
     instruction="""
     You are a YouTube Thumbnail Scraper specialized in downloading thumbnails from YouTube channels.
     
@@ -22,8 +22,10 @@ thumbnail_scraper_agent = LlmAgent(
     # YOUR PROCESS
     
     1. Take the channel URL, handle, or name provided by the user
-    2. Use the scrape_channel tool to download thumbnails from this channel
+    2. Use the scrape_channel_async tool to download thumbnails from this channel
        - If there are API errors, explain clearly what went wrong
+       - Set refresh to true only when the user asks to refresh or update a channel
+         they analyzed before; otherwise a recent scrape is reused
     3. Confirm the successful download of thumbnails
     
     # IMPORTANT NOTES
@@ -35,5 +37,5 @@ thumbnail_scraper_agent = LlmAgent(
     - Once you're done scraping, delegate to the thumbnail_analyzer_agent to start the thumbnail analysis process
     """,
     description="Scrapes thumbnails from YouTube channels for analysis",
-    tools=[scrape_channel],
+    tools=[scrape_channel_async],
 )
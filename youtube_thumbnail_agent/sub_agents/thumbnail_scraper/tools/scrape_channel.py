@@ -1,41 +1,52 @@
+import asyncio
+import logging
 import os
 import os.path
 import re
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 
-import requests
-from dotenv import load_dotenv
 from google.adk.tools.tool_context import ToolContext
 
-from ....constants import IMAGE_ROOT_DIR, REFERENCE_IMAGES_DIR
+from ....constants import YOUTUBE_API_BASE_URL, YOUTUBE_API_TIMEOUT_SECONDS
+from ....shared_lib.catalog import record_image
+from ....shared_lib.checkpoints import (
+    checkpoint_scrape,
+    record_channel_alias,
+    restore_analyses,
+    restore_scrape,
+)
+from ....shared_lib.env import get_env
+from ....shared_lib.file_io import write_bytes_atomic
+from ....shared_lib.style_guides import measure_thumbnail_stats
+from ....shared_lib.workspace import get_session_id, get_workspace
 
-# Load environment variables
-load_dotenv()
+if TYPE_CHECKING:
+    import httpx
 
+# httpx is imported inside the functions that use it, so importing the agent
+# tree doesn't pay for it until a scrape runs
 
-def ensure_reference_images_dir():
-    """Ensure the reference_images directory exists."""
-    # Create the root images directory if it doesn't exist
-    os.makedirs(IMAGE_ROOT_DIR, exist_ok=True)
-    # Create the reference_images directory
-    os.makedirs(REFERENCE_IMAGES_DIR, exist_ok=True)
-    return REFERENCE_IMAGES_DIR
+logger = logging.getLogger(__name__)
 
 
-def download_thumbnail(url: str, save_path: str, index: int) -> Optional[str]:
-    """Download a thumbnail from URL."""
-    response = requests.get(url)
+def youtube_api_base_url() -> str:
+    """Return the YouTube Data API base URL, overridable via YOUTUBE_API_BASE_URL."""
+    return get_env("YOUTUBE_API_BASE_URL") or YOUTUBE_API_BASE_URL
 
-    if response.status_code == 200:
-        # Save the image
-        with open(save_path, "wb") as f:
-            f.write(response.content)
-        return save_path
-    else:
-        print(
-            f"Failed to download thumbnail {index} with status code {response.status_code}"
-        )
-        return None
+
+def ensure_reference_images_dir(tool_context: Optional[ToolContext]) -> str:
+    """Ensure the session's reference_images directory exists."""
+    return get_workspace(tool_context).reference_images
+
+
+def save_reference_image(
+    data: bytes, save_path: str, session_id: Optional[str] = None
+) -> None:
+    """Save a downloaded thumbnail atomically and record it in the image catalog."""
+    write_bytes_atomic(data, save_path)
+    if session_id:
+        record_image(save_path, "reference", session_id, data=data)
 
 
 def extract_channel_id(channel_name: str) -> Optional[str]:
@@ -64,204 +75,343 @@ def extract_channel_id(channel_name: str) -> Optional[str]:
     return channel_name
 
 
-def is_short_video(video_id: str, api_key: str) -> bool:
+def is_short_duration(duration_str: str) -> bool:
     """
-    Determine if a video is a Short or not by checking its duration.
-    YouTube Shorts are typically <= 60 seconds.
+    Determine if an ISO 8601 video duration (e.g. PT1M30S) is short enough to be a Short.
 
     Args:
-        video_id: YouTube video ID
-        api_key: YouTube API key
+        duration_str: Duration from the YouTube API's contentDetails
 
     Returns:
         Boolean indicating if the video is a Short
     """
-    try:
-        # Get video details including duration
-        video_url = f"https://www.googleapis.com/youtube/v3/videos?part=contentDetails&id={video_id}&key={api_key}"
-        response = requests.get(video_url)
-
-        if response.status_code != 200:
-            print(
-                f"Failed to get video details for {video_id}. Status code: {response.status_code}"
-            )
-            return False  # Assume not a short if we can't determine
+    # Parse the duration
+    # Simple check: if duration contains M and number before M is > 1, or if it contains H, it's not a short
+    if "H" in duration_str:
+        return False  # Has hours, definitely not a short
+
+    if "M" in duration_str:
+        minutes_match = re.search(r"PT(\d+)M", duration_str)
+        if minutes_match and int(minutes_match.group(1)) > 1:
+            return False  # More than 1 minute, not a short
+
+    # Check seconds
+    seconds_match = re.search(r"M(\d+)S|PT(\d+)S", duration_str)
+    total_seconds = 0
+
+    if "M" in duration_str:
+        minutes_match = re.search(r"PT(\d+)M", duration_str)
+        if minutes_match:
+            total_seconds += int(minutes_match.group(1)) * 60
+
+    if seconds_match:
+        seconds_group = (
+            seconds_match.group(1) if seconds_match.group(1) else seconds_match.group(2)
+        )
+        total_seconds += int(seconds_group)
 
-        data = response.json()
+    # YouTube Shorts are typically 300 seconds or less
+    return total_seconds <= 300
 
-        if not data.get("items"):
-            return False
 
-        # Extract duration in ISO 8601 format (e.g., PT1M30S for 1 minute 30 seconds)
-        duration_str = data["items"][0]["contentDetails"]["duration"]
+async def _get_json(client: "httpx.AsyncClient", path: str, **params) -> Dict:
+    """GET a YouTube Data API endpoint and return the JSON body."""
+    response = await client.get(f"{youtube_api_base_url()}/{path}", params=params)
+    response.raise_for_status()
+    return response.json()
 
-        # Parse the duration
-        # Simple check: if duration contains M and number before M is > 1, or if it contains H, it's not a short
-        if "H" in duration_str:
-            return False  # Has hours, definitely not a short
 
-        if "M" in duration_str:
-            minutes_match = re.search(r"PT(\d+)M", duration_str)
-            if minutes_match and int(minutes_match.group(1)) > 1:
-                return False  # More than 1 minute, not a short
+async def _fetch_durations(
+    client: "httpx.AsyncClient", video_ids: List[str], api_key: str
+) -> Dict[str, str]:
+    """
+    Look up the durations of up to 50 videos in a single API call.
 
-        # Check seconds
-        seconds_match = re.search(r"M(\d+)S|PT(\d+)S", duration_str)
-        total_seconds = 0
+    Returns an empty mapping if the lookup fails, so no video is treated as a Short.
+    """
+    import httpx
 
-        if "M" in duration_str:
-            minutes_match = re.search(r"PT(\d+)M", duration_str)
-            if minutes_match:
-                total_seconds += int(minutes_match.group(1)) * 60
+    try:
+        data = await _get_json(
+            client,
+            "videos",
+            part="contentDetails",
+            id=",".join(video_ids),
+            key=api_key,
+        )
+    except httpx.HTTPError as e:
+        logger.warning("Failed to get video details: %s", e)
+        return {}
+    return {
+        item["id"]: item["contentDetails"]["duration"] for item in data.get("items", [])
+    }
+
+
+async def _download_thumbnail_async(
+    client: "httpx.AsyncClient",
+    url: str,
+    save_path: str,
+    index: int,
+    session_id: str,
+) -> Optional[str]:
+    """Download a thumbnail and save it without blocking the event loop."""
+    import httpx
 
-        if seconds_match:
-            seconds_group = (
-                seconds_match.group(1)
-                if seconds_match.group(1)
-                else seconds_match.group(2)
-            )
-            total_seconds += int(seconds_group)
+    try:
+        response = await client.get(url)
+    except httpx.HTTPError as e:
+        logger.warning("Failed to download thumbnail %d: %s", index, e)
+        return None
+    if response.status_code != 200:
+        logger.warning(
+            "Failed to download thumbnail %d with status code %d",
+            index,
+            response.status_code,
+        )
+        return None
+    await asyncio.to_thread(
+        save_reference_image, response.content, save_path, session_id
+    )
+    return save_path
 
-        # YouTube Shorts are typically 300 seconds or less
-        return total_seconds <= 300
 
-    except Exception as e:
-        print(f"Error determining if video is a short: {str(e)}")
-        return False  # Assume not a short if we can't determine
+class ScrapeError(Exception):
+    """Scraping a channel failed; the message explains why."""
 
 
-def scrape_channel(
-    tool_context: ToolContext,
+async def iter_channel_thumbnails(
     channel_name: str,
-) -> Dict:
+    ref_dir: str,
+    session_id: str,
+    num_thumbnails: int = 5,
+) -> AsyncIterator[str]:
     """
-    Scrape thumbnails from a YouTube channel, excluding Shorts.
-    Will continue fetching videos until the requested number of longform thumbnails is found
-    or there are no more videos to fetch.
+    Download a channel's latest longform thumbnails, yielding each one as it lands.
+
+    Each page's thumbnails download concurrently, and the next page of search
+    results is requested while they do, so a consumer can start on the first
+    thumbnail while the rest are still being scraped. A consumer that stops
+    early cancels the downloads still in flight.
 
     Args:
-        tool_context: ADK tool context
         channel_name: YouTube channel name/ID/handle
+        ref_dir: Directory to save the thumbnails in
+        session_id: Session the thumbnails are recorded under in the catalog
+        num_thumbnails: Number of longform videos to take thumbnails from
 
-    Returns:
-        Dictionary with scraping results
+    Yields:
+        str: Filename of each saved thumbnail, in the order downloads finish
+
+    Raises:
+        ScrapeError: If the channel or its videos can't be looked up
     """
-    num_thumbnails = 5
-    # Number of videos to fetch per API request
+    import httpx
+
+    # Number of videos to fetch per API request (the videos endpoint takes up to 50 IDs)
     batch_size = 25
     max_attempts = (
         3  # Maximum number of pagination attempts to avoid excessive API usage
     )
 
-    try:
-        # Extract channel ID if needed
-        channel_id = extract_channel_id(channel_name)
-        if not channel_id:
-            return {
-                "status": "error",
-                "message": f"Could not extract channel ID from: {channel_name}",
-            }
-
-        # Prepare reference images directory
-        ref_dir = ensure_reference_images_dir()
+    # Extract channel ID if needed
+    channel_id = extract_channel_id(channel_name)
+    if not channel_id:
+        raise ScrapeError(f"Could not extract channel ID from: {channel_name}")
 
-        # Get YouTube API key from environment variables
-        api_key = os.getenv("YOUTUBE_API_KEY")
-        if not api_key:
-            return {
-                "status": "error",
-                "message": "YouTube API key not found in environment variables. Please add YOUTUBE_API_KEY to your .env file.",
-            }
+    # Get YouTube API key from environment variables
+    api_key = get_env("YOUTUBE_API_KEY")
+    if not api_key:
+        raise ScrapeError(
+            "YouTube API key not found in environment variables. Please add YOUTUBE_API_KEY to your .env file."
+        )
 
-        # Build API URL for channel lookup
-        channel_url = None
+    timeout = httpx.Timeout(YOUTUBE_API_TIMEOUT_SECONDS)
+    async with httpx.AsyncClient(timeout=timeout) as client:
         if channel_id.startswith("@"):
             # Handle format, need to get the channel ID first
-            handle_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&q={channel_id}&type=channel&key={api_key}"
-            handle_response = requests.get(handle_url)
-            if handle_response.status_code != 200:
-                return {
-                    "status": "error",
-                    "message": f"Failed to look up channel with handle {channel_id}. Status code: {handle_response.status_code}",
-                }
-
-            handle_data = handle_response.json()
+            try:
+                handle_data = await _get_json(
+                    client,
+                    "search",
+                    part="snippet",
+                    q=channel_id,
+                    type="channel",
+                    key=api_key,
+                )
+            except httpx.HTTPError as e:
+                raise ScrapeError(
+                    f"Failed to look up channel with handle {channel_id}: {str(e)}"
+                )
             if not handle_data.get("items"):
-                return {
-                    "status": "error",
-                    "message": f"No channel found for handle {channel_id}",
-                }
+                raise ScrapeError(f"No channel found for handle {channel_id}")
 
             # Get the actual channel ID
+            handle = channel_id
             channel_id = handle_data["items"][0]["snippet"]["channelId"]
-
-        # Initialize variables for pagination
-        thumbnails: List[str] = []
-        longform_videos_found = 0
-        next_page_token = None
-        attempts = 0
-
-        # Initialize thumbnail_analysis in state if necessary
-        if tool_context and "thumbnail_analysis" not in tool_context.state:
-            tool_context.state["thumbnail_analysis"] = {}
-
-        # Continue fetching until we have enough thumbnails or run out of videos
-        while longform_videos_found < num_thumbnails and attempts < max_attempts:
-            attempts += 1
-
-            # Build URL for video lookup with pagination token if available
-            page_param = f"&pageToken={next_page_token}" if next_page_token else ""
-            channel_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&channelId={channel_id}&maxResults={batch_size}&order=date&type=video&key={api_key}{page_param}"
-
-            # Fetch videos from the channel
-            response = requests.get(channel_url)
-            if response.status_code != 200:
-                return {
-                    "status": "error",
-                    "message": f"Failed to fetch videos from the channel. Status code: {response.status_code}",
-                }
-
-            data = response.json()
-
-            # Check if we have videos
+            # Checkpoints of the handle and the ID are then the same
+            await asyncio.to_thread(record_channel_alias, handle, channel_id)
+
+        async def fetch_page(page_token: Optional[str]) -> Tuple[Dict, Dict[str, str]]:
+            page_params = {"pageToken": page_token} if page_token else {}
+            try:
+                data = await _get_json(
+                    client,
+                    "search",
+                    part="snippet",
+                    channelId=channel_id,
+                    maxResults=batch_size,
+                    order="date",
+                    type="video",
+                    key=api_key,
+                    **page_params,
+                )
+            except httpx.HTTPError as e:
+                raise ScrapeError(f"Failed to fetch videos from the channel: {str(e)}")
             if not data.get("items"):
-                break  # No more videos to process
+                return data, {}
+            # Skip Shorts, using one duration lookup for the whole page
+            durations = await _fetch_durations(
+                client, [item["id"]["videoId"] for item in data["items"]], api_key
+            )
+            return data, durations
 
-            # Process videos in this batch
-            for item in data["items"]:
-                if longform_videos_found >= num_thumbnails:
-                    break
+        longform_videos_found = 0
+        attempts = 1
+        page: Optional[asyncio.Task] = asyncio.create_task(fetch_page(None))
+        downloads: List[asyncio.Task] = []
+        try:
+            # Continue fetching until we have enough thumbnails or run out of videos
+            while page is not None:
+                data, durations = await page
+                page = None
+                if not data.get("items"):
+                    break  # No more videos to process
+
+                downloads = []
+                for item in data["items"]:
+                    if longform_videos_found >= num_thumbnails:
+                        break
+
+                    duration = durations.get(item["id"]["videoId"])
+                    if duration and is_short_duration(duration):
+                        continue
+
+                    # This is a longform video, process it
+                    longform_videos_found += 1
+                    thumbnail_url = item["snippet"]["thumbnails"]["high"]["url"]
+                    save_path = os.path.join(
+                        ref_dir, f"channel_thumbnail_{longform_videos_found}.jpg"
+                    )
+                    downloads.append(
+                        asyncio.create_task(
+                            _download_thumbnail_async(
+                                client,
+                                thumbnail_url,
+                                save_path,
+                                longform_videos_found,
+                                session_id,
+                            )
+                        )
+                    )
+
+                # Request the next page while this page's thumbnails download
+                next_page_token = data.get("nextPageToken")
+                if (
+                    longform_videos_found < num_thumbnails
+                    and next_page_token
+                    and attempts < max_attempts
+                ):
+                    attempts += 1
+                    page = asyncio.create_task(fetch_page(next_page_token))
+
+                for download in asyncio.as_completed(downloads):
+                    save_path = await download
+                    if save_path:
+                        yield os.path.basename(save_path)
+        finally:
+            for task in [page, *downloads]:
+                if task is not None and not task.done():
+                    task.cancel()
+
+
+def _thumbnail_number(filename: str) -> int:
+    match = re.search(r"(\d+)\.jpg$", filename)
+    return int(match.group(1)) if match else 0
+
+
+async def scrape_channel_async(
+    tool_context: ToolContext,
+    channel_name: str,
+    refresh: bool = False,
+) -> Dict:
+    """
+    Scrape thumbnails from a YouTube channel, excluding Shorts, without blocking
+    other sessions.
 
-                video_id = item["id"]["videoId"]
+    Uses an async HTTP client with per-request timeouts. Video durations for a
+    whole page of results are fetched in one API call, and thumbnails are
+    downloaded concurrently.
 
-                # Skip if this is a short video
-                if is_short_video(video_id, api_key):
-                    continue
+    A recent scrape of the same channel is restored from its checkpoint
+    instead, unless refresh is set, along with the analyses that were already
+    checkpointed.
 
-                # This is a longform video, process it
-                longform_videos_found += 1
-                thumbnail_url = item["snippet"]["thumbnails"]["high"]["url"]
+    Args:
+        tool_context: ADK tool context
+        channel_name: YouTube channel name/ID/handle
+        refresh: Scrape again even if the channel was scraped recently, to
+            pick up new videos
 
-                # Save the thumbnail
-                thumbnail_filename = f"channel_thumbnail_{longform_videos_found}.jpg"
-                save_path = os.path.join(ref_dir, thumbnail_filename)
+    Returns:
+        Dictionary with scraping results
+    """
+    num_thumbnails = 5
 
-                result = download_thumbnail(
-                    thumbnail_url, save_path, longform_videos_found
+    try:
+        # Prepare reference images directory
+        ref_dir = await asyncio.to_thread(ensure_reference_images_dir, tool_context)
+        session_id = get_session_id(tool_context)
+        channel = extract_channel_id(channel_name) or channel_name
+
+        thumbnails = (
+            None
+            if refresh
+            else await asyncio.to_thread(restore_scrape, channel, ref_dir, session_id)
+        )
+        restored = thumbnails is not None
+        if not restored:
+            try:
+                thumbnails = [
+                    filename
+                    async for filename in iter_channel_thumbnails(
+                        channel_name, ref_dir, session_id, num_thumbnails
+                    )
+                ]
+            except ScrapeError as e:
+                return {"status": "error", "message": str(e)}
+            thumbnails.sort(key=_thumbnail_number)
+            if thumbnails:
+                await asyncio.to_thread(
+                    checkpoint_scrape,
+                    channel,
+                    [os.path.join(ref_dir, filename) for filename in thumbnails],
                 )
-                if result:
-                    thumbnails.append(thumbnail_filename)
 
-                    # Add to thumbnail_analysis with empty string value for later analysis
-                    if tool_context:
-                        tool_context.state["thumbnail_analysis"][
-                            thumbnail_filename
-                        ] = ""
-
-            # Check if we have a next page token for pagination
-            next_page_token = data.get("nextPageToken")
-            if not next_page_token:
-                break  # No more pages to fetch
+        # Add to thumbnail_analysis for later analysis; empty values are still to do
+        checkpointed = await asyncio.to_thread(
+            restore_analyses, channel, ref_dir, thumbnails
+        )
+        # Measured here, off the event loop, for the style guide callbacks
+        await asyncio.to_thread(
+            measure_thumbnail_stats,
+            channel,
+            [os.path.join(ref_dir, filename) for filename in thumbnails],
+        )
+        if tool_context:
+            analyses = dict(tool_context.state.get("thumbnail_analysis", {}))
+            analyses.update(checkpointed)
+            tool_context.state["thumbnail_analysis"] = analyses
+            tool_context.state["channel"] = channel
 
         if not thumbnails:
             return {
@@ -275,6 +425,12 @@ def scrape_channel(
         if len(thumbnails) < num_thumbnails:
             status = "partial_success"
             message += f" (requested {num_thumbnails}, but only found {len(thumbnails)} longform videos)"
+        analyzed = sum(1 for analysis in checkpointed.values() if analysis)
+        if restored or analyzed:
+            message += (
+                "; resumed from the last run's checkpoint"
+                f" ({analyzed} already analyzed)"
+            )
 
         return {
             "status": status,
@@ -285,5 +441,35 @@ def scrape_channel(
 
     except Exception as e:
         error_message = f"Error scraping channel: {str(e)}"
-        print(error_message)
+        logger.error(error_message)
         return {"status": "error", "message": error_message}
+
+
+def scrape_channel(
+    tool_context: ToolContext,
+    channel_name: str,
+    refresh: bool = False,
+) -> Dict:
+    """
+    Scrape thumbnails from a YouTube channel, excluding Shorts.
+
+    Synchronous wrapper around scrape_channel_async, kept for existing
+    callers; agents register the async tool. Called from inside a running
+    event loop, the scrape runs on its own loop in a worker thread, and this
+    call blocks until it is done.
+
+    Args:
+        tool_context: ADK tool context
+        channel_name: YouTube channel name/ID/handle
+        refresh: Scrape again even if the channel was scraped recently
+
+    Returns:
+        Dictionary with scraping results
+    """
+    scrape = scrape_channel_async(tool_context, channel_name, refresh)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(scrape)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, scrape).result()
@@ -0,0 +1 @@
+"""Tools of the root thumbnail agent."""
@@ -0,0 +1,199 @@
+"""
+Tools for reusing the styles of channels analyzed before.
+
+A stored style is only reusable while the channel's checkpointed scrape is
+younger than CHECKPOINT_SCRAPE_TTL_SECONDS. After that the channel is scraped
+again, so new videos reach its style guide through the incremental refresh.
+
+The style index (shared_lib/style_index.py) is imported inside the tools: it
+needs NumPy, which the agent tree doesn't load until a lookup runs.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from google.adk.tools.tool_context import ToolContext
+
+from ..constants import CHECKPOINT_SCRAPE_TTL_SECONDS, STYLE_INDEX_REUSE_SIMILARITY
+from ..shared_lib.blob_store import resolve_blobs
+from ..shared_lib.checkpoints import is_scrape_fresh, restore_analyses, restore_scrape
+from ..shared_lib.style_guides import latest_style_guide
+from ..shared_lib.workspace import get_session_id, get_workspace
+from ..sub_agents.thumbnail_scraper.tools.scrape_channel import extract_channel_id
+
+logger = logging.getLogger(__name__)
+
+# Characters of each matching style guide shown in lookup results
+_PREVIEW_CHARS = 400
+
+
+def _indexed_row(index, query: str) -> Optional[int]:
+    """Row of the channel a query names, trying a bare name as a handle too."""
+    query = query.strip()
+    row = index.find(extract_channel_id(query) or query)
+    if row is None and " " not in query and not query.startswith("@"):
+        row = index.find(f"@{query}")
+    return row
+
+
+def _find_similar_styles(query: str, top_k: int) -> Dict:
+    from ..shared_lib.style_index import load_style_index, style_vector
+
+    index = load_style_index()
+    if not len(index):
+        return {
+            "status": "success",
+            "message": "No channel styles have been analyzed yet.",
+            "matches": [],
+        }
+
+    row = _indexed_row(index, query)
+    fresh = False
+    if row is not None:
+        # A named channel is only reused as itself, and only while its scrape
+        # is recent; otherwise it is rescraped to pick up its new videos
+        known = {**index.entries[row], "similarity": 1.0}
+        fresh = is_scrape_fresh(known["channel"])
+        similar = index.search(
+            index.vectors[row], top_k=top_k - 1, exclude=known["channel"]
+        )
+        matches = [known] + similar if top_k > 1 else [known]
+    else:
+        vector = style_vector(text=query)
+        matches = index.search(vector, top_k=top_k) if vector is not None else []
+    # Nothing in common at all is not a match
+    matches = [match for match in matches if match["similarity"] > 0]
+
+    results = [
+        {
+            "channel": match["channel"],
+            "similarity": round(match["similarity"], 3),
+            "reusable": (
+                fresh and position == 0
+                if row is not None
+                else match["similarity"] >= STYLE_INDEX_REUSE_SIMILARITY
+                and is_scrape_fresh(match["channel"])
+            ),
+            "style_guide_version": match["version"],
+            "preview": resolve_blobs(match["style_guide"])[:_PREVIEW_CHARS],
+        }
+        for position, match in enumerate(matches)
+    ]
+    reusable = [result["channel"] for result in results if result["reusable"]]
+    if row is not None and not fresh:
+        hours = CHECKPOINT_SCRAPE_TTL_SECONDS // 3600
+        message = (
+            f"{index.entries[row]['channel']} was analyzed before, but its last "
+            f"scrape is over {hours} hours old; scrape it again to pick up new "
+            "videos."
+        )
+    elif row is not None:
+        message = f"{index.entries[row]['channel']} was analyzed before."
+    elif reusable:
+        message = f"Found near-identical analyzed styles: {', '.join(reusable)}."
+    elif results:
+        message = "No analyzed style is close enough to reuse as is."
+    else:
+        message = "No analyzed style matches the query."
+    return {"status": "success", "message": message, "matches": results}
+
+
+async def find_similar_styles(
+    tool_context: ToolContext, query: str, top_k: int = 3
+) -> Dict:
+    """
+    Look up channel styles that were analyzed before.
+
+    A channel URL, ID or handle that was analyzed before matches itself (with
+    a similarity of 1) followed by the channels whose thumbnails and style
+    guides look most like it; only the channel itself can be reusable. Any
+    other query is treated as a description of a style and matched against
+    the wording of the stored style guides. A style is only reusable while its
+    channel's last scrape is recent enough.
+
+    Args:
+        tool_context: ADK tool context
+        query: A channel URL, ID or handle, or a description of a style
+        top_k: Most matches to return
+
+    Returns:
+        Dict: "matches", most similar first, each with "channel",
+            "similarity", "reusable" (similar enough to use instead of a new
+            analysis), "style_guide_version" and a "preview" of the guide
+    """
+    try:
+        return await asyncio.to_thread(_find_similar_styles, query, max(top_k, 1))
+    except Exception as e:
+        logger.error("Error looking up similar styles: %s", e)
+        return {"status": "error", "message": f"Error looking up styles: {str(e)}"}
+
+
+def _use_stored_style(channel: str, tool_context: ToolContext) -> Dict:
+    from ..shared_lib.style_index import load_style_index
+
+    index = load_style_index()
+    row = _indexed_row(index, channel)
+    if row is None:
+        return {
+            "status": "error",
+            "message": f"{channel} has no stored style; scrape and analyze it instead.",
+        }
+    entry = index.entries[row]
+    channel = entry["channel"]
+    if not is_scrape_fresh(channel):
+        hours = CHECKPOINT_SCRAPE_TTL_SECONDS // 3600
+        return {
+            "status": "error",
+            "message": (
+                f"The last scrape of {channel} is over {hours} hours old; scrape "
+                "and analyze it again instead."
+            ),
+        }
+    latest = latest_style_guide(channel)
+    style_guide = latest["value"] if latest else entry["style_guide"]
+
+    # The scrape is fresh, but restored without an age limit so that it can't
+    # expire between the check above and the restore
+    ref_dir = get_workspace(tool_context).reference_images
+    thumbnails = restore_scrape(
+        channel, ref_dir, get_session_id(tool_context), max_age_seconds=None
+    )
+    state = tool_context.state
+    state["channel"] = channel
+    state["style_guide"] = style_guide
+    state["thumbnail_analysis"] = (
+        restore_analyses(channel, ref_dir, thumbnails) if thumbnails else {}
+    )
+    return {
+        "status": "success",
+        "message": (
+            f"Loaded version {latest['version'] if latest else entry['version']} "
+            f"of the style guide for {channel}"
+            f" with {len(thumbnails or [])} reference thumbnails."
+        ),
+        "channel": channel,
+    }
+
+
+async def use_stored_style(tool_context: ToolContext, channel: str) -> Dict:
+    """
+    Load the stored style guide of a channel analyzed before, instead of
+    scraping and analyzing it again.
+
+    Puts the style guide, the channel's thumbnails and their analyses in
+    state, as if the thumbnail analyzer had just run.
+
+    Args:
+        tool_context: ADK tool context
+        channel: A channel returned by find_similar_styles as reusable
+
+    Returns:
+        Dict: The result, with the "channel" loaded, or an error when the
+            channel has no stored style or its last scrape is too old
+    """
+    try:
+        return await asyncio.to_thread(_use_stored_style, channel, tool_context)
+    except Exception as e:
+        logger.error("Error loading the stored style of %s: %s", channel, e)
+        return {"status": "error", "message": f"Error loading the style: {str(e)}"}